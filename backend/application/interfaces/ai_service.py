@@ -31,6 +31,17 @@ class ChatMessage:
     metadata: Optional[Dict[str, Any]] = None
 
 
+@dataclass(frozen=True)
+class ContextCacheHandle:
+    """Provider-side cache of the leading messages of a prompt."""
+
+    name: str
+    model: str
+    message_count: int  # leading messages of the request the cache covers
+    tokens: int
+    expires_at: float  # time.time() after which the provider drops it
+
+
 @dataclass
 class ChatRequest:
     """Chat request data structure."""
@@ -41,6 +52,9 @@ class ChatRequest:
     max_tokens: Optional[int] = None
     stream: bool = False
     context: Optional[Dict[str, Any]] = None
+    # Optional: `messages` stays complete, so a service that cannot use the
+    # handle (or a different model) simply sends every message
+    context_cache: Optional[ContextCacheHandle] = None
 
 
 @dataclass
@@ -164,6 +178,26 @@ class IAIService(ABC):
         """
         pass
 
+    async def cache_context(
+        self, model: str, messages: List[ChatMessage], ttl_seconds: float
+    ) -> Optional[ContextCacheHandle]:
+        """
+        Register leading prompt messages with the provider's context cache.
+
+        Args:
+            model: The model the cache is used with
+            messages: The messages to cache
+            ttl_seconds: How long the provider should keep them
+
+        Returns:
+            A handle to send with later requests, or None if context
+            caching is not supported
+
+        Raises:
+            AIServiceError: If registration fails
+        """
+        return None
+
     @abstractmethod
     async def check_service_health(self) -> bool:
         """
@@ -0,0 +1,31 @@
+"""
+Application Interface - Knowledge Retrieval
+
+Defines the contract for finding the chunks of a bot's knowledge base that
+are most relevant to a user question. Implementations may combine several
+rankings (e.g. embeddings and keywords) into one result list.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class RetrievedChunk:
+    """A knowledge chunk returned for a query, with its rank in each source ranking."""
+
+    chunk_id: int
+    document_id: int
+    content: str
+    score: float
+    vector_rank: Optional[int] = None
+    keyword_rank: Optional[int] = None
+
+
+class IKnowledgeRetrievalService(ABC):
+    @abstractmethod
+    async def retrieve(self, bot_id: int, query: str, top_k: int = 5) -> List[RetrievedChunk]:
+        """Return up to top_k chunks for the query, most relevant first."""
@@ -0,0 +1,27 @@
+"""
+Application Interface - Message Backplane
+
+Defines the contract for passing realtime notifications between API worker
+processes. A worker publishes a message for a user (or for everyone) and
+every other worker receives it and delivers it to the sockets it holds.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional
+
+# Receives (user_id, message); user_id None means every connected user
+BackplaneHandler = Callable[[Optional[int], str], Awaitable[None]]
+
+
+class IMessageBackplane(ABC):
+    @abstractmethod
+    async def start(self, handler: BackplaneHandler) -> None:
+        """Start receiving messages published by other workers."""
+
+    @abstractmethod
+    async def publish(self, user_id: Optional[int], message: str) -> None:
+        """Send a message to the other workers; user_id None means every user."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Stop receiving and release connections."""
@@ -0,0 +1,34 @@
+"""
+Application Interface - Response Cache
+
+Defines the contract for reusing assistant replies to repeated questions.
+Entries are grouped by bot so that everything cached for a bot can be
+dropped when its configuration or knowledge base changes.
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class CachedResponse:
+    """A stored assistant reply."""
+
+    content: str
+    model: Optional[str] = None
+    tokens_used: int = 0
+
+
+class IResponseCache(ABC):
+    @abstractmethod
+    async def get(self, bot_id: int, key: str) -> Optional[CachedResponse]:
+        """Return the reply stored under key for the bot, if present and not expired."""
+
+    @abstractmethod
+    async def put(self, bot_id: int, key: str, response: CachedResponse) -> None:
+        """Store a reply for the bot."""
+
+    @abstractmethod
+    async def invalidate_bot(self, bot_id: int) -> None:
+        """Drop every reply stored for the bot."""
@@ -0,0 +1,43 @@
+"""
+Application Interface - Vector Store
+
+Defines the contract for storing and searching chunk embeddings per bot.
+Implementations may keep the index in process (NumPy) or delegate to a
+managed service such as Pinecone, using the bot id as the namespace.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Sequence
+
+
+@dataclass
+class VectorMatch:
+    """A search hit: the chunk id and its cosine similarity to the query."""
+
+    id: int
+    score: float
+
+
+class IVectorStore(ABC):
+    @abstractmethod
+    async def upsert(
+        self, bot_id: int, ids: Sequence[int], vectors: Sequence[Sequence[float]]
+    ) -> None:
+        """Insert vectors for a bot, replacing any existing vectors with the same ids."""
+
+    @abstractmethod
+    async def search(
+        self, bot_id: int, vector: Sequence[float], top_k: int = 5
+    ) -> List[VectorMatch]:
+        """Return up to top_k matches for the query vector, best first."""
+
+    @abstractmethod
+    async def delete(self, bot_id: int, ids: Sequence[int]) -> None:
+        """Remove vectors by id; unknown ids are ignored."""
+
+    @abstractmethod
+    async def count(self, bot_id: int) -> int:
+        """Number of live vectors stored for a bot."""
@@ -45,6 +45,7 @@ from domain.repositories.bot_repository import IBotRepository
 from domain.value_objects.bot_id import BotId
 from domain.value_objects.user_id import UserId
 from application.interfaces.unit_of_work import IUnitOfWork
+from application.interfaces.response_cache import IResponseCache
 from application.dtos.bot_dtos import UpdateBotRequestDTO, BotResponseDTO
 from application.exceptions.application_exceptions import (
     BotNotFoundException,
@@ -78,6 +79,7 @@ class UpdateBotUseCase:
     
     bot_repository: IBotRepository
     unit_of_work: IUnitOfWork
+    response_cache: Optional[IResponseCache] = None
     
     async def execute(self, request: UpdateBotRequest) -> BotResponseDTO:
         """
@@ -139,6 +141,10 @@ class UpdateBotUseCase:
                 # Commit transaction
                 await self.unit_of_work.commit()
                 
+                # Cached replies were produced with the old configuration
+                if self.response_cache is not None:
+                    await self.response_cache.invalidate_bot(bot_id.value)
+                
                 # Convert updated bot to response DTO
                 bot_response = BotResponseDTO(
                     bot_id=updated_bot.id.value,
@@ -0,0 +1,7 @@
+"""
+Benchmarks
+
+Standalone load and latency benchmarks, run from the backend directory as
+modules (`python -m benchmarks.<name>`). The fake Gemini server here is also
+used by the test suite.
+"""
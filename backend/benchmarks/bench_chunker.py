@@ -0,0 +1,88 @@
+"""
+Chunker throughput benchmark.
+
+Compares the legacy character-window `DocumentProcessorService.chunk_text`
+with `TokenChunker` on a synthetic corpus and reports MB/s plus chunk stats.
+
+    python -m benchmarks.bench_chunker --mb 16
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, List
+
+from infrastructure.external_services.document_processor_service import DocumentProcessorService
+from infrastructure.external_services.text_chunker import TokenChunker, TokenCounter
+
+_WORDS = (
+    "the of and to in is for on with as by at from customer support order invoice "
+    "refund shipping warranty account password reset router firmware configuration "
+    "error E1042 timeout latency throughput embedding vector retrieval chatbot"
+).split()
+
+
+def build_corpus(megabytes: float, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    target = int(megabytes * 1024 * 1024)
+    parts: List[str] = []
+    size = 0
+    while size < target:
+        sentences = []
+        for _ in range(rng.randint(2, 8)):
+            words = [rng.choice(_WORDS) for _ in range(rng.randint(5, 30))]
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        paragraph = " ".join(sentences)
+        parts.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(parts)
+
+
+def run(
+    name: str, fn: Callable[[str], List[str]], corpus: str, counter: TokenCounter, repeat: int
+) -> None:
+    timings = []
+    chunks: List[str] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = fn(corpus)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    mb = len(corpus.encode("utf-8")) / (1024 * 1024)
+    tokens = counter.count_many(chunks)
+    sentence_ends = sum(1 for c in chunks if c[-1] in ".!?")
+    print(
+        f"{name:<10} {mb / best:8.2f} MB/s  chunks={len(chunks):>7}  "
+        f"tokens mean={statistics.mean(tokens):6.1f} max={max(tokens):5d}  "
+        f"sentence-ends={sentence_ends / len(chunks):6.1%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--mb", type=float, default=8.0, help="corpus size in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-tokens", type=int, default=400)
+    parser.add_argument("--overlap-tokens", type=int, default=50)
+    parser.add_argument(
+        "--estimate", action="store_true", help="skip tiktoken and use the estimator"
+    )
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.mb)
+    counter = TokenCounter(encoding_name=None if args.estimate else "cl100k_base")
+    print(f"corpus={len(corpus) / (1024 * 1024):.1f} MB  exact_tokens={counter.is_exact}")
+
+    chunker = TokenChunker(
+        max_tokens=args.max_tokens, overlap_tokens=args.overlap_tokens, counter=counter
+    )
+    legacy = DocumentProcessorService(chunker=chunker)
+    run("legacy", lambda text: legacy.chunk_text(text), corpus, counter, args.repeat)
+    run("token", chunker.chunk, corpus, counter, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Gemini client load benchmark.
+
+Starts the fake Gemini server (benchmarks/fake_gemini_server.py) on a free
+local port and drives the HTTP `GeminiAIService`, behind the same
+`ResilientAIService` wrapper the app uses, with concurrent streaming chat
+turns. Reports time to first token, full reply latency, throughput and
+errors; `--error-rate` makes the fake server fail that share of calls.
+
+    python -m benchmarks.bench_gemini_client --turns 500 --concurrency 50 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+from typing import List
+
+import uvicorn
+
+from application.interfaces.ai_service import ChatMessage, ChatRequest
+from benchmarks.fake_gemini_server import FakeGeminiConfig, create_app
+from infrastructure.external_services.gemini_ai_service import GeminiAIService
+from infrastructure.external_services.resilient_ai_service import ResilientAIService
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-connections", type=int, default=20)
+    args = parser.parse_args()
+
+    port = _free_port()
+    config = FakeGeminiConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        reply_tokens=args.reply_tokens,
+    )
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning")
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    gemini = GeminiAIService(
+        api_key="bench",
+        model_name="gemini-pro",
+        base_url=f"http://127.0.0.1:{port}",
+        max_connections=args.max_connections,
+    )
+    await gemini.initialize()
+    await gemini.warm(2)
+    service = ResilientAIService(gemini, default_model="gemini-pro", initial_limit=args.concurrency)
+    request = ChatRequest(
+        messages=[
+            ChatMessage(role="system", content="Be brief."),
+            ChatMessage(role="user", content="Hi"),
+        ],
+        model="gemini-pro",
+    )
+    first_token: List[float] = []
+    complete: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def turn() -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            first = None
+            try:
+                async for _ in service.chat_completion_stream(request):
+                    if first is None:
+                        first = time.perf_counter() - start
+            except Exception:
+                errors += 1
+                return
+            first_token.append((first or 0.0) * 1000)
+            complete.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(turn() for _ in range(args.turns)))
+    elapsed = time.perf_counter() - started
+    pool = gemini.stats()
+    await gemini.close()
+    server.should_exit = True
+    await server_task
+
+    print(
+        f"{args.turns} turns, concurrency {args.concurrency}, {elapsed:.2f}s,"
+        f" {args.turns / elapsed:.1f} turns/s"
+    )
+    print(f"{'':>16} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, samples in (("first token", first_token), ("full reply", complete)):
+        print(
+            f"{name:>16} {_percentile(samples, 0.5):>10.1f} {_percentile(samples, 0.95):>10.1f}"
+            f" {_percentile(samples, 0.99):>10.1f}"
+        )
+    print(f"errors: {errors}, limiter: {service.stats()['gemini-pro']['limiter']}")
+    print(f"http pool: {pool}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
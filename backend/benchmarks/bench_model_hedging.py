@@ -0,0 +1,84 @@
+"""
+Model hedging benchmark.
+
+Simulates a primary model whose latency has a heavy tail (a share of calls
+stall for --stall-ms) and a fallback model with steady latency, and reports
+chat latency percentiles with and without hedging.
+
+    python -m benchmarks.bench_model_hedging --requests 2000 --hedge-ms 300
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import List
+
+from application.interfaces.ai_service import ChatMessage, ChatRequest, ChatResponse
+from infrastructure.external_services.model_routing_ai_service import ModelRoutingAIService
+from infrastructure.external_services.stub_ai_service import StubAIService
+
+
+class _SimulatedAIService(StubAIService):
+    def __init__(self, stall_ratio: float, stall_ms: float, seed: int = 7) -> None:
+        super().__init__(api_key="bench", model_name="gemini-pro")
+        self.stall_ratio = stall_ratio
+        self.stall_ms = stall_ms
+        self.random = random.Random(seed)
+
+    async def chat_completion(self, request: ChatRequest) -> ChatResponse:
+        if request.model == "gemini-pro":
+            stalled = self.random.random() < self.stall_ratio
+            delay = self.stall_ms if stalled else self.random.uniform(80, 160)
+        else:
+            delay = self.random.uniform(150, 250)
+        await asyncio.sleep(delay / 1000)
+        return ChatResponse(content="ok", model=request.model or "gemini-pro")
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _run(service: ModelRoutingAIService, requests: int, concurrency: int) -> List[float]:
+    request = ChatRequest(messages=[ChatMessage(role="user", content="Hi")], model="gemini-pro")
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await service.chat_completion(request)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--stall-ratio", type=float, default=0.03)
+    parser.add_argument("--stall-ms", type=float, default=3000.0)
+    parser.add_argument("--hedge-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'hedges':>7}")
+    for mode, hedge_ms in (("no hedge", 0.0), ("hedged", args.hedge_ms)):
+        service = ModelRoutingAIService(
+            _SimulatedAIService(args.stall_ratio, args.stall_ms),
+            default_model="gemini-pro",
+            fallback_chains={"gemini-pro": ["gemini-1.5-flash"]},
+            hedge_after_ms=hedge_ms,
+        )
+        latencies = await _run(service, args.requests, args.concurrency)
+        p50, p95, p99 = (_percentile(latencies, q) for q in (0.5, 0.95, 0.99))
+        print(f"{mode:>10} {p50:>8.0f} {p95:>8.0f} {p99:>8.0f} {service.stats()['hedges']:>7}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""
+Prompt prefix reuse benchmark.
+
+Runs chat turns for a bot with a long system prompt against the stand-in
+Gemini service, once assembling the prompt from scratch each turn and
+once through `PromptPrefixCache` with simulated provider context caching.
+Reports prompt assembly time per turn and the prompt tokens sent to the
+provider versus served from its cache.
+
+    python -m benchmarks.bench_prompt_prefix --turns 2000 --prompt-words 3000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from application.interfaces.ai_service import ChatRequest
+from infrastructure.database.models.bot import BotModel
+from infrastructure.external_services.context_builder import ContextBuilder
+from infrastructure.external_services.prompt_prefix_cache import PromptPrefixCache
+from infrastructure.external_services.stub_ai_service import StubAIService
+from infrastructure.external_services.text_chunker import TokenCounter
+
+_WORDS = (
+    "always answer politely refer customers to the billing portal for invoices never share account "
+    "details escalate outages to the on-call engineer warranty covers hardware faults for two years"
+).split()
+
+
+async def _run(bot: BotModel, turns: int, ai: StubAIService, reuse: bool) -> None:
+    prefixes = PromptPrefixCache(ai, TokenCounter(encoding_name=None))
+    builder = ContextBuilder(TokenCounter(encoding_name=None), max_prompt_tokens=32000)
+    assembly = 0.0
+    for turn in range(turns):
+        start = time.perf_counter()
+        prefix = prefixes.prefix(bot) if reuse else None
+        packed = builder.build(
+            question=f"Question number {turn}?",
+            system_prompt=prefix.text if prefix else bot.system_prompt,
+            system_prompt_tokens=prefix.tokens if prefix else None,
+            model=bot.model_name,
+            reply_tokens=1024,
+        )
+        handle = await prefixes.handle(prefix, bot.model_name) if prefix else None
+        assembly += time.perf_counter() - start
+        await ai.chat_completion(
+            ChatRequest(messages=packed.messages, model=bot.model_name, context_cache=handle)
+        )
+    mode = "prefix cache" if reuse else "from scratch"
+    print(
+        f"{mode:>13} {assembly / turns * 1e6:>14.1f} "
+        f"{ai.prompt_tokens_sent / turns:>12.0f} {ai.prompt_tokens_cached / turns:>14.0f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--prompt-words", type=int, default=3000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    prompt = " ".join(rng.choice(_WORDS) for _ in range(args.prompt_words))
+    bot = BotModel(id=1, name="Support", owner_id=1, model_name="gemini-pro", system_prompt=prompt)
+
+    print(f"{'mode':>13} {'assembly us':>14} {'sent tokens':>12} {'cached tokens':>14}")
+    for reuse in (False, True):
+        await _run(bot, args.turns, StubAIService(api_key="bench", model_name="gemini-pro"), reuse)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
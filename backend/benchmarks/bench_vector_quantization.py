@@ -0,0 +1,159 @@
+"""
+Vector quantization benchmark.
+
+Writes the same clustered vectors to SegmentedVectorStore with float32,
+float16 and int8 storage and reports, for each re-score factor, recall@k
+against exact float32 search and search latency, next to three sizes:
+
+- scan: bytes per vector a search reads (codes plus scale, or float32 row
+  plus norm)
+- disk: the bot's segment files after compaction. Quantized segments keep
+  float32 unit vectors in a separate file for re-scoring, so they take more
+  disk, not less.
+- resident: file-backed pages the searches mapped in, measured from a freshly
+  opened store as the growth of RssFile (Linux only). Quantized segments map
+  only their codes; shortlisted rows are read from the unit vector file
+  without mapping it.
+
+    python -m benchmarks.bench_vector_quantization --vectors 50000 --dim 768 --rescore 1 4
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from benchmarks.bench_vector_store import build_data
+from infrastructure.external_services.segmented_vector_store import SegmentedVectorStore
+from infrastructure.external_services.vector_math import QUANTIZED_DTYPES, normalize, top_k_indices
+
+
+def scanned_bytes(dim: int, quantization: str) -> int:
+    if quantization == "none":
+        return dim * 4 + 4  # float32 row plus its norm
+    return dim * np.dtype(QUANTIZED_DTYPES[quantization][0]).itemsize + 4  # codes plus their scale
+
+
+def disk_bytes(root: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(folder, name))
+        for folder, _, names in os.walk(root)
+        for name in names
+    )
+
+
+def rss_file_bytes() -> Optional[int]:
+    """Resident file-backed memory of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssFile:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+async def run(
+    data: np.ndarray,
+    queries: np.ndarray,
+    truth: List[Set[int]],
+    args: argparse.Namespace,
+    quantization: str,
+    factor: int,
+) -> Tuple[float, float, float, int, Optional[int]]:
+    with tempfile.TemporaryDirectory() as root:
+        writer = SegmentedVectorStore(root, ann_nprobe=args.nprobe, quantization=quantization)
+        for start in range(0, len(data), 4096):
+            await writer.upsert(
+                1, list(range(start, min(start + 4096, len(data)))), data[start : start + 4096]
+            )
+        await writer.close()
+        del writer
+        on_disk = disk_bytes(root)
+
+        # A fresh store maps the segments again, so RssFile grows only by the pages searches touch
+        store = SegmentedVectorStore(
+            root, ann_nprobe=args.nprobe, quantization=quantization, rescore_factor=factor
+        )
+        rss_before = rss_file_bytes()
+        latencies = []
+        found = []
+        for query in queries:
+            started = time.perf_counter()
+            hits = await store.search(1, query, args.top_k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            found.append({m.id for m in hits})
+        rss_after = rss_file_bytes()
+        resident = (
+            rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        )
+        await store.close()
+    recall = float(np.mean([len(a & b) / args.top_k for a, b in zip(truth, found)]))
+    return (
+        recall,
+        float(np.percentile(latencies, 50)),
+        float(np.percentile(latencies, 95)),
+        on_disk,
+        resident,
+    )
+
+
+def _mb(size: Optional[int]) -> str:
+    return "n/a" if size is None else f"{size / 1e6:.1f}"
+
+
+def _change(size: Optional[int], baseline: Optional[int]) -> str:
+    return "n/a" if size is None or not baseline else f"{size / baseline - 1:+.0%}"
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--vectors", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--rescore", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    data = build_data(args.vectors, args.dim)
+    rng = np.random.default_rng(1)
+    queries = data[rng.integers(0, len(data), args.queries)] + 0.1 * rng.normal(
+        size=(args.queries, args.dim)
+    )
+    unit = normalize(data)
+    truth = [set(top_k_indices(unit @ q, args.top_k).tolist()) for q in queries]
+
+    print(f"{args.vectors} vectors, dim {args.dim}, recall@{args.top_k} against exact search")
+    print(
+        f"{'storage':>8} {'rescore':>8} {'recall':>8} {'loss':>8} {'scan B/vec':>11} {'scan':>6}"
+        f" {'disk MB':>8} {'disk':>6} {'resident MB':>12} {'resident':>9}"
+        f" {'p50 ms':>8} {'p95 ms':>8}"
+    )
+    reference: Optional[Tuple[float, int, int, Optional[int]]] = None
+    for quantization in ("none", "float16", "int8"):
+        for factor in args.rescore if quantization != "none" else [1]:
+            recall, p50, p95, on_disk, resident = await run(
+                data, queries, truth, args, quantization, factor
+            )
+            scan = scanned_bytes(args.dim, quantization)
+            if reference is None:
+                reference = (recall, scan, on_disk, resident)
+            print(
+                f"{quantization:>8} {factor:>8} {recall:>8.3f} {reference[0] - recall:>8.3f}"
+                f" {scan:>11} {_change(scan, reference[1]):>6}"
+                f" {_mb(on_disk):>8} {_change(on_disk, reference[2]):>6}"
+                f" {_mb(resident):>12} {_change(resident, reference[3]):>9}"
+                f" {p50:>8.2f} {p95:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
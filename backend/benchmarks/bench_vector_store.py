@@ -0,0 +1,111 @@
+"""
+Vector store search latency benchmark.
+
+Fills one bot index with random clustered vectors and reports p50/p95 search
+latency for exact and IVF modes, plus IVF recall@k against exact search.
+With --segmented the same data is also written to a memory-mapped
+SegmentedVectorStore in a temporary directory and searched after compaction.
+
+    python -m benchmarks.bench_vector_store --vectors 100000 --dim 768
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import List, Set, Tuple
+
+import numpy as np
+
+from infrastructure.external_services.local_vector_store import BotVectorIndex
+from infrastructure.external_services.segmented_vector_store import SegmentedVectorStore
+
+
+def build_data(count: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, count // 500), dim))
+    labels = rng.integers(0, len(centers), count)
+    data: np.ndarray = (centers[labels] + 0.5 * rng.normal(size=(count, dim))).astype(np.float32)
+    return data
+
+
+def fill(index: BotVectorIndex, data: np.ndarray, batch: int = 4096) -> float:
+    started = time.perf_counter()
+    for start in range(0, len(data), batch):
+        index.upsert(list(range(start, min(start + batch, len(data)))), data[start : start + batch])
+    return time.perf_counter() - started
+
+
+def measure(
+    index: BotVectorIndex, queries: np.ndarray, k: int
+) -> Tuple[float, float, List[Set[int]]]:
+    latencies = []
+    results: List[Set[int]] = []
+    for query in queries:
+        started = time.perf_counter()
+        hits = index.search(query, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append({i for i, _ in hits})
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95)), results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--segmented", action="store_true")
+    args = parser.parse_args()
+
+    data = build_data(args.vectors, args.dim)
+    rng = np.random.default_rng(1)
+    queries = data[rng.integers(0, len(data), args.queries)] + 0.1 * rng.normal(
+        size=(args.queries, args.dim)
+    )
+
+    exact = BotVectorIndex(args.dim, ann_min_vectors=args.vectors + 1)
+    print(f"exact fill  {fill(exact, data):7.2f} s")
+    p50, p95, truth = measure(exact, queries, args.top_k)
+    print(f"exact       p50={p50:6.2f} ms  p95={p95:6.2f} ms")
+
+    ivf = BotVectorIndex(args.dim, ann_min_vectors=min(50_000, args.vectors), nprobe=args.nprobe)
+    print(f"ivf fill    {fill(ivf, data):7.2f} s (includes training)")
+    p50, p95, found = measure(ivf, queries, args.top_k)
+    recall = np.mean([len(a & b) / args.top_k for a, b in zip(truth, found)])
+    print(f"ivf         p50={p50:6.2f} ms  p95={p95:6.2f} ms  recall@{args.top_k}={recall:.3f}")
+
+    if args.segmented:
+        asyncio.run(measure_segmented(data, queries, truth, args))
+
+
+async def measure_segmented(
+    data: np.ndarray, queries: np.ndarray, truth: List[Set[int]], args: argparse.Namespace
+) -> None:
+    with tempfile.TemporaryDirectory() as root:
+        store = SegmentedVectorStore(root, ann_nprobe=args.nprobe)
+        started = time.perf_counter()
+        for start in range(0, len(data), 4096):
+            await store.upsert(
+                1, list(range(start, min(start + 4096, len(data)))), data[start : start + 4096]
+            )
+        await store.close()
+        print(f"segmented fill {time.perf_counter() - started:7.2f} s (includes compaction)")
+
+        latencies = []
+        found = []
+        for query in queries:
+            started = time.perf_counter()
+            hits = await store.search(1, query, args.top_k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            found.append({m.id for m in hits})
+        recall = np.mean([len(a & b) / args.top_k for a, b in zip(truth, found)])
+        p50, p95 = np.percentile(latencies, 50), np.percentile(latencies, 95)
+        print(f"segmented   p50={p50:6.2f} ms  p95={p95:6.2f} ms  recall@{args.top_k}={recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
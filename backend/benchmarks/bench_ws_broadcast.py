@@ -0,0 +1,86 @@
+"""
+WebSocket fan-out benchmark.
+
+Broadcasts to N fake connections, a few of which are slow, and reports how
+long `broadcast` takes to return and how long the fast connections wait for
+delivery, compared with awaiting each send in turn.
+
+    python -m benchmarks.bench_ws_broadcast --connections 1000 5000 --slow 5
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List, Tuple
+
+from presentation.api.websocket_router import WebSocketManager
+
+
+class _Socket:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.received = asyncio.Event()
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, message: str) -> None:
+        await asyncio.sleep(self.delay)
+        self.received.set()
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+def _sockets(connections: int, slow: int, slow_delay: float) -> List[_Socket]:
+    return [_Socket(slow_delay if i < slow else 0.0) for i in range(connections)]
+
+
+async def _sequential(sockets: List[_Socket]) -> float:
+    start = time.perf_counter()
+    for ws in sockets:
+        await ws.send_text("progress")
+    return time.perf_counter() - start
+
+
+async def _queued(sockets: List[_Socket], slow: int) -> Tuple[float, float]:
+    manager = WebSocketManager()
+    for i, ws in enumerate(sockets):
+        await manager.connect(i, ws)
+    start = time.perf_counter()
+    await manager.broadcast("progress")
+    returned = time.perf_counter() - start
+    await asyncio.gather(*(ws.received.wait() for ws in sockets[slow:]))
+    delivered = time.perf_counter() - start
+    for i, ws in enumerate(sockets):
+        await manager.disconnect(i, ws)
+    return returned, delivered
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--connections", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument(
+        "--slow", type=int, default=5, help="connections that take --slow-ms per send"
+    )
+    parser.add_argument("--slow-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    print(
+        f"{'connections':>11} {'sequential ms':>14} {'broadcast ms':>13} {'fast delivered ms':>18}"
+    )
+    for count in args.connections:
+        sequential = await _sequential(_sockets(count, args.slow, args.slow_ms / 1000))
+        returned, delivered = await _queued(
+            _sockets(count, args.slow, args.slow_ms / 1000), args.slow
+        )
+        print(
+            f"{count:>11} {sequential * 1000:>14.1f} {returned * 1000:>13.2f}"
+            f" {delivered * 1000:>18.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,198 @@
+"""
+Fake Gemini server.
+
+Serves the parts of the Gemini REST API that `GeminiAIService` uses
+(generateContent, streamGenerateContent with alt=sse, embedContent,
+batchEmbedContents, cachedContents and model lookups) with deterministic,
+configurable behaviour, so load and latency tests exercise the real HTTP
+client without the provider:
+
+- time to first token and tokens per second of replies
+- a share of requests failing with 503
+- embedding dimensionality; vectors are derived from a hash of the text,
+  so the same text always gets the same unit vector
+
+Counters are served from GET /_stats.
+
+    python -m benchmarks.fake_gemini_server --port 8765 --ttft-ms 300 --tokens-per-second 80
+    GEMINI_BASE_URL=http://127.0.0.1:8765 AI_PROVIDER=gemini uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import uuid
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FakeGeminiConfig:
+    ttft_ms: float = 200.0
+    tokens_per_second: float = 50.0
+    error_rate: float = 0.0
+    embedding_dim: int = 768
+    reply_tokens: int = 40
+    seed: int = 7
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4) if text else 0
+
+
+def _content_text(body: Dict[str, Any]) -> str:
+    texts = [
+        part.get("text", "") for part in (body.get("systemInstruction") or {}).get("parts", [])
+    ]
+    for content in (body.get("contents") or []) + (
+        [body["content"]] if body.get("content") else []
+    ):
+        texts.extend(part.get("text", "") for part in content.get("parts", []))
+    return "\n".join(texts)
+
+
+def embed(text: str, dim: int) -> List[float]:
+    """Deterministic unit vector for the text."""
+    values: List[float] = []
+    counter = 0
+    while len(values) < dim:
+        digest = hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        values.extend(byte / 127.5 - 1.0 for byte in digest)
+        counter += 1
+    values = values[:dim]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+def create_app(config: FakeGeminiConfig) -> FastAPI:
+    app = FastAPI(title="Fake Gemini")
+    rng = random.Random(config.seed)
+    caches: Dict[str, int] = {}
+    stats = {"requests": 0, "errors": 0, "streams": 0, "embedded_texts": 0, "cached_contents": 0}
+
+    def failure() -> JSONResponse:
+        stats["errors"] += 1
+        error = {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}
+        return JSONResponse({"error": error}, status_code=503)
+
+    def not_found(name: str) -> JSONResponse:
+        error = {"code": 404, "message": f"{name} is not found.", "status": "NOT_FOUND"}
+        return JSONResponse({"error": error}, status_code=404)
+
+    def usage(body: Dict[str, Any], completion_tokens: int) -> Dict[str, int]:
+        cached = caches.get(body.get("cachedContent") or "", 0)
+        prompt = _estimate_tokens(_content_text(body)) + cached
+        return {
+            "promptTokenCount": prompt,
+            "candidatesTokenCount": completion_tokens,
+            "cachedContentTokenCount": cached,
+            "totalTokenCount": prompt + completion_tokens,
+        }
+
+    def chunk(text: str, finish_reason: str = "") -> Dict[str, Any]:
+        candidate: Dict[str, Any] = {
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "index": 0,
+        }
+        if finish_reason:
+            candidate["finishReason"] = finish_reason
+        return {"candidates": [candidate]}
+
+    async def stream(body: Dict[str, Any]) -> AsyncGenerator[str, None]:
+        await asyncio.sleep(config.ttft_ms / 1000)
+        for i in range(config.reply_tokens):
+            if i:
+                await asyncio.sleep(1 / config.tokens_per_second)
+            last = i == config.reply_tokens - 1
+            data = chunk(f"tok{i} ", "STOP" if last else "")
+            if last:
+                data["usageMetadata"] = usage(body, config.reply_tokens)
+            yield f"data: {json.dumps(data)}\r\n\r\n"
+
+    @app.get("/_stats")
+    async def get_stats() -> Dict[str, int]:
+        return dict(stats, active_caches=len(caches))
+
+    @app.get("/{version}/models/{model}")
+    async def get_model(version: str, model: str) -> Dict[str, Any]:
+        return {"name": f"models/{model}", "inputTokenLimit": 32768, "outputTokenLimit": 8192}
+
+    @app.post("/{version}/cachedContents")
+    async def create_cached_content(version: str, request: Request) -> Any:
+        stats["requests"] += 1
+        if rng.random() < config.error_rate:
+            return failure()
+        body = await request.json()
+        name = f"cachedContents/{uuid.uuid4().hex[:12]}"
+        caches[name] = _estimate_tokens(_content_text(body))
+        stats["cached_contents"] += 1
+        return {
+            "name": name,
+            "model": body.get("model"),
+            "usageMetadata": {"totalTokenCount": caches[name]},
+        }
+
+    @app.post("/{version}/models/{target}")
+    async def model_method(version: str, target: str, request: Request) -> Any:
+        stats["requests"] += 1
+        model, _, method = target.partition(":")
+        if rng.random() < config.error_rate:
+            return failure()
+        body = await request.json()
+        if body.get("cachedContent") and body["cachedContent"] not in caches:
+            return not_found(body["cachedContent"])
+        if method == "generateContent":
+            await asyncio.sleep(
+                config.ttft_ms / 1000 + (config.reply_tokens - 1) / config.tokens_per_second
+            )
+            text = "".join(f"tok{i} " for i in range(config.reply_tokens))
+            return dict(chunk(text, "STOP"), usageMetadata=usage(body, config.reply_tokens))
+        if method == "streamGenerateContent":
+            stats["streams"] += 1
+            return StreamingResponse(stream(body), media_type="text/event-stream")
+        if method == "embedContent":
+            stats["embedded_texts"] += 1
+            return {"embedding": {"values": embed(_content_text(body), config.embedding_dim)}}
+        if method == "batchEmbedContents":
+            texts = [_content_text(item) for item in body.get("requests", [])]
+            stats["embedded_texts"] += len(texts)
+            return {"embeddings": [{"values": embed(text, config.embedding_dim)} for text in texts]}
+        return not_found(f"Method {method} of models/{model}")
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--embedding-dim", type=int, default=768)
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    config = FakeGeminiConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        embedding_dim=args.embedding_dim,
+        reply_tokens=args.reply_tokens,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
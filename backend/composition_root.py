@@ -40,7 +40,10 @@ Service Categories:
 
 from __future__ import annotations
 
-from typing import Dict, Any, AsyncGenerator
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, AsyncGenerator, Optional
 from functools import lru_cache
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 
@@ -56,6 +59,10 @@ from application.interfaces.unit_of_work import IUnitOfWork
 from application.interfaces.ai_service import IAIService
 from application.interfaces.auth_service import IAuthService
 from application.interfaces.analytics_service import IAnalyticsService
+from application.interfaces.vector_store import IVectorStore
+from application.interfaces.knowledge_retrieval import IKnowledgeRetrievalService
+from application.interfaces.message_backplane import IMessageBackplane
+from application.interfaces.response_cache import IResponseCache
 
 # Application use cases
 from application.use_cases.user.create_user_use_case import CreateUserUseCase
@@ -88,6 +95,30 @@ from infrastructure.external_services.jwt_auth_service import JWTAuthService
 from infrastructure.external_services.analytics_service import SqlAlchemyAnalyticsService
 from application.interfaces.webhook_service import IWebhookService
 from infrastructure.external_services.webhook_service import HttpxWebhookService
+from infrastructure.external_services.document_processor_service import DocumentProcessorService
+from infrastructure.external_services.document_ingestion_service import DocumentIngestionService
+from infrastructure.external_services.upload_storage_service import UploadStorageService
+from infrastructure.external_services.text_chunker import TokenChunker, TokenCounter
+from infrastructure.external_services.chat_stream_service import ChatStreamService
+from infrastructure.external_services.conversation_summarizer import ConversationSummarizer
+from infrastructure.external_services.context_builder import ContextBuilder
+from infrastructure.external_services.local_vector_store import LocalVectorStore
+from infrastructure.external_services.segmented_vector_store import SegmentedVectorStore
+from infrastructure.external_services.hybrid_retrieval_service import HybridRetrievalService
+from infrastructure.external_services.batching_embedding_service import BatchingEmbeddingService
+from infrastructure.external_services.caching_embedding_service import (
+    CachingEmbeddingService,
+    SqliteEmbeddingStore,
+)
+from infrastructure.external_services.redis_backplane import RedisBackplane
+from infrastructure.external_services.model_routing_ai_service import ModelRoutingAIService
+from infrastructure.external_services.prompt_prefix_cache import PromptPrefixCache
+from infrastructure.external_services.resilient_ai_service import ResilientAIService
+from infrastructure.external_services.response_cache import InMemoryResponseCache
+from infrastructure.external_services.token_quota_service import TokenQuotaService
+from infrastructure.external_services.single_flight_ai_service import SingleFlightAIService
+from infrastructure.external_services.sqlite_backplane import SqliteBackplane
+from infrastructure.external_services.stub_ai_service import StubAIService
 from infrastructure.database.unit_of_work import SqlAlchemyUnitOfWork
 from infrastructure.config.settings import Settings
 
@@ -128,6 +159,26 @@ class CompositionRoot:
     
     async def teardown(self) -> None:
         """Cleanup async resources."""
+        if 'ingestion_service' in self._services:
+            await self._services['ingestion_service'].stop()
+        if 'embedding_batcher' in self._services:
+            await self._services['embedding_batcher'].close()
+        if 'embedding_cache' in self._services:
+            await self._services['embedding_cache'].close()
+        if 'chat_stream_service' in self._services:
+            await self._services['chat_stream_service'].close()
+        if self._services.get('conversation_summarizer') is not None:
+            await self._services['conversation_summarizer'].close()
+        if self._services.get('token_quota') is not None:
+            await self._services['token_quota'].close()
+        if isinstance(self._services.get('ai_provider'), GeminiAIService):
+            await self._services['ai_provider'].close()
+        if self._services.get('ws_backplane') is not None:
+            await self._services['ws_backplane'].close()
+        if isinstance(self._services.get('vector_store'), SegmentedVectorStore):
+            await self._services['vector_store'].close()
+        if 'pdf_executor' in self._services:
+            self._services['pdf_executor'].shutdown(wait=False, cancel_futures=True)
         if self._async_engine:
             await self._async_engine.dispose()
     
@@ -173,12 +224,109 @@ class CompositionRoot:
     def get_ai_service(self) -> IAIService:
         """Get AI service singleton."""
         if 'ai_service' not in self._services:
-            self._services['ai_service'] = GeminiAIService(
-                api_key=self.settings.ai.google_ai_api_key,
-                model_name=self.settings.ai.default_ai_model
+            ai = self.settings.ai
+            if ai.ai_provider == "gemini":
+                gemini: IAIService = GeminiAIService(
+                    api_key=ai.google_ai_api_key,
+                    model_name=ai.default_ai_model,
+                    base_url=ai.gemini_base_url,
+                    embedding_model=ai.embedding_model,
+                    timeout_seconds=ai.ai_request_timeout_seconds,
+                    connect_timeout_seconds=ai.ai_connect_timeout_seconds,
+                    http2=ai.ai_http2_enabled,
+                    max_connections=ai.ai_pool_max_connections,
+                    max_keepalive_connections=ai.ai_pool_max_keepalive,
+                    keepalive_expiry_seconds=ai.ai_pool_keepalive_expiry_seconds,
+                )
+            else:
+                gemini = StubAIService(api_key=ai.google_ai_api_key, model_name=ai.default_ai_model)
+            self._services['ai_provider'] = gemini
+            # Every upstream call passes the per-model concurrency limit and circuit breaker
+            resilient = ResilientAIService(
+                gemini,
+                default_model=ai.default_ai_model,
+                embedding_model=ai.embedding_model,
+                initial_limit=ai.ai_concurrency_initial,
+                min_limit=ai.ai_concurrency_min,
+                max_limit=ai.ai_concurrency_max,
+                slow_call_seconds=ai.ai_slow_call_seconds,
+                queue_timeout_seconds=ai.ai_queue_timeout_seconds,
+                min_calls=ai.ai_breaker_min_calls,
+                failure_rate_threshold=ai.ai_breaker_failure_rate,
+                open_seconds=ai.ai_breaker_open_seconds,
             )
+            self._services['ai_backend'] = resilient
+            # Fallback chains and hedging across models
+            routing = ModelRoutingAIService(
+                resilient,
+                default_model=ai.default_ai_model,
+                fallback_chains=ai.ai_fallback_models,
+                hedge_after_ms=ai.ai_hedge_after_ms,
+                latency_budgets_ms=ai.ai_latency_budgets_ms,
+            )
+            self._services['ai_routing'] = routing
+            # Coalesce concurrent single-text embedding calls into batches
+            batcher = BatchingEmbeddingService(
+                routing,
+                max_batch_size=ai.embed_batch_size,
+                max_wait_ms=ai.embed_batch_wait_ms,
+                model_batch_limits=ai.embed_model_batch_limits,
+                max_concurrent_batches=ai.embed_max_concurrent_batches,
+            )
+            self._services['embedding_batcher'] = batcher
+            self._services['ai_service'] = batcher
+
+            # Cache in front of the batcher so hits never wait for a batch
+            cache = self.settings.cache
+            if cache.embedding_cache_enabled:
+                store = None
+                if cache.embedding_cache_path:
+                    path = cache.embedding_cache_path
+                    if not os.path.isabs(path):
+                        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+                    store = SqliteEmbeddingStore(path)
+                caching = CachingEmbeddingService(
+                    batcher,
+                    default_model=ai.embedding_model,
+                    store=store,
+                    memory_max_bytes=cache.embedding_cache_memory_mb * 1024 * 1024,
+                )
+                self._services['embedding_cache'] = caching
+                self._services['ai_service'] = caching
+
+            if ai.chat_single_flight_enabled:
+                single_flight = SingleFlightAIService(self._services['ai_service'])
+                self._services['chat_single_flight'] = single_flight
+                self._services['ai_service'] = single_flight
         return self._services['ai_service']
 
+    def get_metrics(self) -> Dict[str, Any]:
+        """Counters of the services created so far, for the metrics endpoint."""
+        metrics: Dict[str, Any] = {}
+        if 'ai_backend' in self._services:
+            metrics['ai_backend'] = self._services['ai_backend'].stats()
+        if isinstance(self._services.get('ai_provider'), GeminiAIService):
+            metrics['ai_http_pool'] = self._services['ai_provider'].stats()
+        if 'ai_routing' in self._services:
+            metrics['ai_routing'] = self._services['ai_routing'].stats()
+        if 'embedding_batcher' in self._services:
+            metrics['embedding_batches'] = self._services['embedding_batcher'].stats()
+        if 'embedding_cache' in self._services:
+            metrics['embedding_cache'] = self._services['embedding_cache'].stats()
+        if 'chat_stream_service' in self._services:
+            metrics['chat_streams'] = self._services['chat_stream_service'].stats()
+        if 'chat_single_flight' in self._services:
+            metrics['chat_single_flight'] = self._services['chat_single_flight'].stats()
+        if self._services.get('response_cache') is not None:
+            metrics['response_cache'] = self._services['response_cache'].stats()
+        if self._services.get('conversation_summarizer') is not None:
+            metrics['conversation_summaries'] = self._services['conversation_summarizer'].stats()
+        if 'prompt_prefixes' in self._services:
+            metrics['prompt_prefixes'] = self._services['prompt_prefixes'].stats()
+        if self._services.get('token_quota') is not None:
+            metrics['token_quota'] = self._services['token_quota'].stats()
+        return metrics
+
     @lru_cache()
     def get_webhook_service(self) -> IWebhookService:
         """Get webhook delivery service singleton."""
@@ -186,6 +334,233 @@ class CompositionRoot:
             self._services['webhook_service'] = HttpxWebhookService()
         return self._services['webhook_service']
     
+    @lru_cache()
+    def get_document_processor(self) -> DocumentProcessorService:
+        """Get document processor singleton."""
+        if 'document_processor' not in self._services:
+            ingestion = self.settings.ingestion
+            executor = None
+            if ingestion.pdf_extraction_processes > 0:
+                # spawn: forking a process that runs an event loop and threads is unsafe
+                executor = ProcessPoolExecutor(
+                    max_workers=ingestion.pdf_extraction_processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self._services['pdf_executor'] = executor
+            self._services['document_processor'] = DocumentProcessorService(
+                executor=executor,
+                pages_per_task=ingestion.pdf_pages_per_task,
+                max_pending_tasks=max(2, ingestion.pdf_extraction_processes * 2),
+                chunker=TokenChunker(
+                    max_tokens=ingestion.chunk_max_tokens,
+                    overlap_tokens=ingestion.chunk_overlap_tokens,
+                    counter=self.get_token_counter(),
+                ),
+            )
+        return self._services['document_processor']
+
+    @lru_cache()
+    def get_upload_storage(self) -> UploadStorageService:
+        """Get upload storage singleton (streams uploads to the documents folder)."""
+        if 'upload_storage' not in self._services:
+            backend_dir = os.path.dirname(os.path.abspath(__file__))
+            self._services['upload_storage'] = UploadStorageService(
+                upload_dir=os.path.join(backend_dir, "documents", "uploads"),
+                max_bytes=self.settings.max_upload_size_mb * 1024 * 1024,
+                chunk_size=self.settings.upload_chunk_size_bytes,
+            )
+        return self._services['upload_storage']
+
+    @lru_cache()
+    def get_vector_store(self) -> IVectorStore:
+        """Get the per-bot vector store singleton."""
+        if 'vector_store' not in self._services:
+            vector_db = self.settings.vector_db
+            if vector_db.store == "memory":
+                self._services['vector_store'] = LocalVectorStore(
+                    ann_min_vectors=vector_db.ann_min_vectors,
+                    ann_nlist=vector_db.ann_nlist,
+                    ann_nprobe=vector_db.ann_nprobe,
+                )
+            else:
+                index_dir = vector_db.index_dir
+                if not os.path.isabs(index_dir):
+                    index_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), index_dir)
+                self._services['vector_store'] = SegmentedVectorStore(
+                    root_dir=index_dir,
+                    max_segments=vector_db.max_segments,
+                    ivf_min_rows=vector_db.segment_ivf_min_rows,
+                    ann_nlist=vector_db.ann_nlist,
+                    ann_nprobe=vector_db.ann_nprobe,
+                    quantization=vector_db.quantization,
+                    rescore_factor=vector_db.rescore_factor,
+                )
+        return self._services['vector_store']
+
+    @lru_cache()
+    def get_knowledge_retrieval_service(self) -> IKnowledgeRetrievalService:
+        """Get hybrid (vector + BM25) knowledge retrieval service singleton."""
+        if 'knowledge_retrieval_service' not in self._services:
+            retrieval = self.settings.retrieval
+            self._services['knowledge_retrieval_service'] = HybridRetrievalService(
+                session_maker=self._session_maker,  # type: ignore[arg-type]
+                ai_service=self.get_ai_service(),
+                vector_store=self.get_vector_store(),
+                candidate_multiplier=retrieval.candidate_multiplier,
+                rrf_k=retrieval.rrf_k,
+                sync_interval_seconds=retrieval.keyword_sync_interval_seconds,
+            )
+        return self._services['knowledge_retrieval_service']
+
+    @lru_cache()
+    def get_token_counter(self) -> TokenCounter:
+        """Get the shared token counter (tiktoken when available)."""
+        if 'token_counter' not in self._services:
+            self._services['token_counter'] = TokenCounter()
+        return self._services['token_counter']
+
+    @lru_cache()
+    def get_chat_stream_service(self) -> ChatStreamService:
+        """Get streaming chat service singleton."""
+        if 'chat_stream_service' not in self._services:
+            chat = self.settings.chat
+            self._services['chat_stream_service'] = ChatStreamService(
+                session_maker=self._session_maker,  # type: ignore[arg-type]
+                ai_service=self.get_ai_service(),
+                token_counter=self.get_token_counter(),
+                history_messages=chat.history_messages,
+                response_cache=self.get_response_cache(),
+                cache_max_temperature=self.settings.cache.response_cache_max_temperature,
+                context_builder=ContextBuilder(
+                    self.get_token_counter(),
+                    max_prompt_tokens=chat.context_max_tokens,
+                    default_context_window=chat.default_context_window,
+                    model_context_windows=chat.context_windows,
+                    knowledge_share=chat.knowledge_share,
+                ),
+                retrieval=(
+                    self.get_knowledge_retrieval_service() if chat.use_knowledge_base else None
+                ),
+                retrieval_top_k=self.settings.retrieval.top_k,
+                default_reply_tokens=self.settings.ai.max_tokens,
+                summarizer=self.get_conversation_summarizer(),
+                quota=self.get_token_quota_service(),
+                prompt_prefixes=self.get_prompt_prefix_cache(),
+            )
+        return self._services['chat_stream_service']
+
+    @lru_cache()
+    def get_prompt_prefix_cache(self) -> PromptPrefixCache:
+        """Get the bot prompt prefix cache singleton."""
+        if 'prompt_prefixes' not in self._services:
+            chat = self.settings.chat
+            self._services['prompt_prefixes'] = PromptPrefixCache(
+                self.get_ai_service(),
+                self.get_token_counter(),
+                provider_cache=chat.prompt_cache_enabled,
+                provider_cache_ttl_seconds=chat.prompt_cache_ttl_seconds,
+                min_provider_cache_tokens=chat.prompt_cache_min_tokens,
+            )
+        return self._services['prompt_prefixes']
+
+    @lru_cache()
+    def get_token_quota_service(self) -> Optional[TokenQuotaService]:
+        """Get the token quota service singleton, or None when disabled."""
+        if 'token_quota' not in self._services:
+            quota = self.settings.quota
+            self._services['token_quota'] = (
+                TokenQuotaService(
+                    session_maker=self._session_maker,  # type: ignore[arg-type]
+                    user_daily_tokens=quota.user_daily_tokens,
+                    window_seconds=quota.window_seconds,
+                    slot_seconds=quota.slot_seconds,
+                    flush_interval_seconds=quota.flush_interval_seconds,
+                )
+                if quota.enabled
+                else None
+            )
+        return self._services['token_quota']
+
+    @lru_cache()
+    def get_conversation_summarizer(self) -> Optional[ConversationSummarizer]:
+        """Get the rolling conversation summarizer singleton, or None when disabled."""
+        if 'conversation_summarizer' not in self._services:
+            chat = self.settings.chat
+            self._services['conversation_summarizer'] = (
+                ConversationSummarizer(
+                    session_maker=self._session_maker,  # type: ignore[arg-type]
+                    ai_service=self.get_ai_service(),
+                    model=chat.summary_model or None,
+                    every_turns=chat.summary_every_turns,
+                    keep_recent_messages=chat.summary_keep_recent_messages,
+                    summary_words=chat.summary_words,
+                )
+                if chat.summary_enabled
+                else None
+            )
+        return self._services['conversation_summarizer']
+
+    @lru_cache()
+    def get_response_cache(self) -> Optional[IResponseCache]:
+        """Get the chat response cache singleton, or None when disabled."""
+        if 'response_cache' not in self._services:
+            cache = self.settings.cache
+            self._services['response_cache'] = (
+                InMemoryResponseCache(
+                    max_entries=cache.response_cache_max_entries,
+                    ttl_seconds=cache.response_cache_ttl_seconds,
+                )
+                if cache.response_cache_enabled
+                else None
+            )
+        return self._services['response_cache']
+
+    @lru_cache()
+    def get_ws_backplane(self) -> Optional[IMessageBackplane]:
+        """Get the cross-worker WebSocket backplane, or None for a single worker."""
+        if 'ws_backplane' not in self._services:
+            ws = self.settings.websocket
+            backplane: Optional[IMessageBackplane] = None
+            if ws.backplane == "redis":
+                if not self.settings.cache.redis_url:
+                    raise ValueError("WS_BACKPLANE=redis requires REDIS_URL")
+                backplane = RedisBackplane(
+                    self.settings.cache.redis_url, channel=ws.backplane_channel
+                )
+            elif ws.backplane == "sqlite":
+                path = ws.backplane_sqlite_path
+                if not os.path.isabs(path):
+                    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+                backplane = SqliteBackplane(path, poll_interval_ms=ws.backplane_poll_interval_ms)
+            elif ws.backplane != "none":
+                raise ValueError(f"Unknown WS_BACKPLANE: {ws.backplane}")
+            self._services['ws_backplane'] = backplane
+        return self._services['ws_backplane']
+
+    def get_ingestion_service(self) -> DocumentIngestionService:
+        """Get background document ingestion service singleton."""
+        if 'ingestion_service' not in self._services:
+            # Imported lazily: the websocket manager lives in the presentation layer
+            from presentation.api.websocket_router import manager as ws_manager
+
+            ingestion = self.settings.ingestion
+            self._services['ingestion_service'] = DocumentIngestionService(
+                session_maker=self._session_maker,  # type: ignore[arg-type]
+                processor=self.get_document_processor(),
+                ai_service=self.get_ai_service(),
+                vector_store=self.get_vector_store(),
+                workers=ingestion.workers,
+                poll_interval_seconds=ingestion.poll_interval_seconds,
+                job_timeout_seconds=ingestion.job_timeout_seconds,
+                embed_batch_size=ingestion.embed_batch_size,
+                notifier=ws_manager.send_to_user,
+                response_cache=self.get_response_cache(),
+                storage=self.get_upload_storage(),
+                orphan_grace_seconds=ingestion.orphan_file_grace_seconds,
+                orphan_sweep_interval_seconds=ingestion.orphan_sweep_interval_seconds,
+            )
+        return self._services['ingestion_service']
+    
     @lru_cache()
     def get_auth_service(self) -> IAuthService:
         """Get auth service singleton."""
@@ -355,7 +730,8 @@ class CompositionRoot:
         
         return UpdateBotUseCase(
             bot_repository=self.get_bot_repository(unit_of_work.session),
-            unit_of_work=unit_of_work
+            unit_of_work=unit_of_work,
+            response_cache=self.get_response_cache(),
         )
     
     def get_delete_bot_use_case(self) -> DeleteBotUseCase:
@@ -419,9 +795,24 @@ class CompositionRoot:
         # Initialize AI service
         ai_service = self.get_ai_service()
         await ai_service.initialize()
+        provider = self._services.get('ai_provider')
+        if isinstance(provider, GeminiAIService) and self.settings.ai.ai_warm_connections > 0:
+            # Pay connection setup before the first chat turn does
+            await provider.warm(self.settings.ai.ai_warm_connections)
+
+        # Let every worker reach the WebSocket connections held by the others
+        backplane = self.get_ws_backplane()
+        if backplane is not None:
+            from presentation.api.websocket_router import manager as ws_manager
+            await ws_manager.attach_backplane(backplane)
         
-        # Setup other external services
-        # ...
+        # Start background document ingestion workers
+        await self.get_ingestion_service().start()
+
+        # Periodically write token usage and pick up other workers' usage
+        quota = self.get_token_quota_service()
+        if quota is not None:
+            await quota.start()
 
 
 # Global composition root instance
@@ -457,6 +848,31 @@ async def get_analytics_service() -> 'IAnalyticsService':
             pass
 
 
+async def get_upload_storage() -> UploadStorageService:
+    """FastAPI dependency for streaming upload storage."""
+    return composition_root.get_upload_storage()
+
+
+async def get_vector_store() -> IVectorStore:
+    """FastAPI dependency for the per-bot vector store."""
+    return composition_root.get_vector_store()
+
+
+async def get_knowledge_retrieval_service() -> IKnowledgeRetrievalService:
+    """FastAPI dependency for hybrid knowledge retrieval."""
+    return composition_root.get_knowledge_retrieval_service()
+
+
+async def get_chat_stream_service() -> ChatStreamService:
+    """FastAPI dependency for streaming chat turns."""
+    return composition_root.get_chat_stream_service()
+
+
+async def get_ingestion_service() -> DocumentIngestionService:
+    """FastAPI dependency for the background document ingestion service."""
+    return composition_root.get_ingestion_service()
+
+
 # Use case dependency providers
 async def get_create_user_use_case() -> CreateUserUseCase:
     """FastAPI dependency for create user use case."""
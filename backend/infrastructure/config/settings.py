@@ -20,7 +20,7 @@ Configuration Sources (Priority Order):
 """
 
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
 from pydantic.networks import HttpUrl
@@ -48,6 +48,57 @@ class AISettings(BaseSettings):
     max_tokens: int = Field(2048, env="MAX_TOKENS")
     temperature: float = Field(0.7, env="AI_TEMPERATURE")
 
+    # "gemini" calls the Gemini REST API at GEMINI_BASE_URL (benchmarks point it at
+    # benchmarks/fake_gemini_server.py); "stub" answers in-process without any I/O
+    ai_provider: str = Field("stub", env="AI_PROVIDER")
+    gemini_base_url: str = Field("https://generativelanguage.googleapis.com", env="GEMINI_BASE_URL")
+    embedding_model: str = Field("text-embedding-004", env="EMBEDDING_MODEL")
+    ai_request_timeout_seconds: float = Field(60.0, env="AI_REQUEST_TIMEOUT_SECONDS")
+    ai_connect_timeout_seconds: float = Field(5.0, env="AI_CONNECT_TIMEOUT_SECONDS")
+    # Connection pool shared by all provider calls (HTTP/2 when h2 is installed). At
+    # startup one HTTP/2 connection is opened, or AI_WARM_CONNECTIONS over HTTP/1.1
+    ai_http2_enabled: bool = Field(True, env="AI_HTTP2_ENABLED")
+    ai_pool_max_connections: int = Field(20, env="AI_POOL_MAX_CONNECTIONS")
+    ai_pool_max_keepalive: int = Field(10, env="AI_POOL_MAX_KEEPALIVE")
+    ai_pool_keepalive_expiry_seconds: float = Field(30.0, env="AI_POOL_KEEPALIVE_EXPIRY_SECONDS")
+    ai_warm_connections: int = Field(2, env="AI_WARM_CONNECTIONS")
+
+    # Concurrent embed_text calls are sent upstream together, up to this many texts
+    # (or the per-model limit, e.g. EMBED_MODEL_BATCH_LIMITS='{"text-embedding-004": 100}')
+    # or after waiting this long for more
+    embed_batch_size: int = Field(100, env="EMBED_BATCH_SIZE")
+    embed_batch_wait_ms: float = Field(5.0, env="EMBED_BATCH_WAIT_MS")
+    embed_model_batch_limits: Dict[str, int] = Field(
+        default_factory=dict, env="EMBED_MODEL_BATCH_LIMITS"
+    )
+    embed_max_concurrent_batches: int = Field(4, env="EMBED_MAX_CONCURRENT_BATCHES")
+
+    # Concurrent identical chat requests share one upstream call
+    chat_single_flight_enabled: bool = Field(True, env="CHAT_SINGLE_FLIGHT_ENABLED")
+
+    # Per-model adaptive concurrency limit for upstream calls (AIMD): grows while calls succeed,
+    # shrinks on failures and calls slower than AI_SLOW_CALL_SECONDS; excess calls wait in line
+    ai_concurrency_initial: int = Field(8, env="AI_CONCURRENCY_INITIAL")
+    ai_concurrency_min: int = Field(1, env="AI_CONCURRENCY_MIN")
+    ai_concurrency_max: int = Field(64, env="AI_CONCURRENCY_MAX")
+    ai_slow_call_seconds: float = Field(20.0, env="AI_SLOW_CALL_SECONDS")
+    ai_queue_timeout_seconds: float = Field(10.0, env="AI_QUEUE_TIMEOUT_SECONDS")
+    # Calls fail fast for AI_BREAKER_OPEN_SECONDS once this share of recent calls failed
+    ai_breaker_failure_rate: float = Field(0.5, env="AI_BREAKER_FAILURE_RATE")
+    ai_breaker_min_calls: int = Field(10, env="AI_BREAKER_MIN_CALLS")
+    ai_breaker_open_seconds: float = Field(30.0, env="AI_BREAKER_OPEN_SECONDS")
+
+    # Fallback models per requested model, e.g.
+    # AI_FALLBACK_MODELS='{"gemini-pro": ["gemini-1.5-flash"]}' ("*" applies to models
+    # without their own chain)
+    ai_fallback_models: Dict[str, List[str]] = Field(default_factory=dict, env="AI_FALLBACK_MODELS")
+    # Start the next fallback model alongside a call still unanswered after this long
+    # (0 disables hedging); AI_LATENCY_BUDGETS_MS overrides it per model
+    ai_hedge_after_ms: float = Field(2500.0, env="AI_HEDGE_AFTER_MS")
+    ai_latency_budgets_ms: Dict[str, float] = Field(
+        default_factory=dict, env="AI_LATENCY_BUDGETS_MS"
+    )
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -89,6 +140,24 @@ class VectorDatabaseSettings(BaseSettings):
     pinecone_index_name: str = Field("default-index", env="PINECONE_INDEX_NAME")
     pinecone_dimension: int = Field(768, env="PINECONE_DIMENSION")
 
+    # "segmented" keeps each bot's index in memory-mapped segment files shared by all
+    # workers; "memory" holds it in process (lost on restart)
+    store: str = Field("segmented", env="VECTOR_STORE")
+    index_dir: str = Field("documents/vector_index", env="VECTOR_INDEX_DIR")
+    max_segments: int = Field(8, env="VECTOR_MAX_SEGMENTS")
+    segment_ivf_min_rows: int = Field(8192, env="VECTOR_SEGMENT_IVF_MIN_ROWS")
+    # "int8" / "float16": segments map scalar-quantized vectors (1/4 / 1/2 of the memory) and
+    # searches re-score VECTOR_RESCORE_FACTOR x top_k candidates per segment from an unmapped
+    # float32 file, so segments take 1.25x / 1.5x the disk space. float16 scans are slower
+    # than int8 or float32 ones, since NumPy widens float16 in software
+    quantization: str = Field("none", env="VECTOR_QUANTIZATION")
+    rescore_factor: int = Field(4, env="VECTOR_RESCORE_FACTOR")
+
+    # In-memory indexes: bots with at least this many vectors get an IVF layer
+    ann_min_vectors: int = Field(50000, env="VECTOR_ANN_MIN_VECTORS")
+    ann_nlist: int = Field(0, env="VECTOR_ANN_NLIST")  # 0 = sqrt(vector count)
+    ann_nprobe: int = Field(16, env="VECTOR_ANN_NPROBE")
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -100,6 +169,119 @@ class CacheSettings(BaseSettings):
     redis_url: Optional[str] = Field(None, env="REDIS_URL")
     cache_ttl: int = Field(3600, env="CACHE_TTL")  # 1 hour default
 
+    # Embeddings by (model, sha256(text)): in-memory LRU in front of a SQLite file
+    embedding_cache_enabled: bool = Field(True, env="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_memory_mb: int = Field(64, env="EMBEDDING_CACHE_MEMORY_MB")
+    embedding_cache_path: Optional[str] = Field(
+        "documents/embedding_cache.sqlite3", env="EMBEDDING_CACHE_PATH"
+    )
+
+    # Chat replies of bots at or below the temperature limit, reused for repeated questions
+    response_cache_enabled: bool = Field(False, env="RESPONSE_CACHE_ENABLED")
+    response_cache_max_entries: int = Field(10000, env="RESPONSE_CACHE_MAX_ENTRIES")
+    response_cache_ttl_seconds: int = Field(3600, env="RESPONSE_CACHE_TTL_SECONDS")
+    response_cache_max_temperature: float = Field(0.3, env="RESPONSE_CACHE_MAX_TEMPERATURE")
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+
+
+class IngestionSettings(BaseSettings):
+    """Background document ingestion settings."""
+
+    workers: int = Field(2, env="INGESTION_WORKERS")
+    poll_interval_seconds: float = Field(2.0, env="INGESTION_POLL_INTERVAL_SECONDS")
+    max_attempts: int = Field(3, env="INGESTION_MAX_ATTEMPTS")
+    job_timeout_seconds: int = Field(600, env="INGESTION_JOB_TIMEOUT_SECONDS")
+    embed_batch_size: int = Field(64, env="INGESTION_EMBED_BATCH_SIZE")
+    pdf_extraction_processes: int = Field(2, env="PDF_EXTRACTION_PROCESSES")  # 0 = thread pool
+    pdf_pages_per_task: int = Field(8, env="PDF_PAGES_PER_TASK")
+    chunk_max_tokens: int = Field(400, env="CHUNK_MAX_TOKENS")
+    chunk_overlap_tokens: int = Field(50, env="CHUNK_OVERLAP_TOKENS")
+    orphan_file_grace_seconds: float = Field(3600.0, env="INGESTION_ORPHAN_FILE_GRACE_SECONDS")
+    orphan_sweep_interval_seconds: float = Field(
+        600.0, env="INGESTION_ORPHAN_SWEEP_INTERVAL_SECONDS"
+    )
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+
+
+class RetrievalSettings(BaseSettings):
+    """Knowledge retrieval settings (hybrid vector + BM25 search)."""
+
+    top_k: int = Field(5, env="RETRIEVAL_TOP_K")
+    # Each ranking contributes top_k * multiplier candidates to the fusion
+    candidate_multiplier: int = Field(4, env="RETRIEVAL_CANDIDATE_MULTIPLIER")
+    rrf_k: int = Field(60, env="RETRIEVAL_RRF_K")
+    keyword_sync_interval_seconds: float = Field(5.0, env="RETRIEVAL_KEYWORD_SYNC_INTERVAL_SECONDS")
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+
+
+class ChatSettings(BaseSettings):
+    """Chat turn settings."""
+
+    # Earlier messages considered for each turn (the token budget may keep fewer)
+    history_messages: int = Field(20, env="CHAT_HISTORY_MESSAGES")
+    # Prompt budget: min(this cap, model context window - reply max_tokens)
+    context_max_tokens: int = Field(8000, env="CHAT_CONTEXT_MAX_TOKENS")
+    default_context_window: int = Field(32768, env="CHAT_DEFAULT_CONTEXT_WINDOW")
+    # Per-model context windows; not "model_context_windows", which pydantic reserves
+    context_windows: Dict[str, int] = Field(default_factory=dict, env="CHAT_CONTEXT_WINDOWS")
+    # Share of the budget knowledge base excerpts may take before history is added
+    knowledge_share: float = Field(0.5, env="CHAT_KNOWLEDGE_SHARE")
+    use_knowledge_base: bool = Field(True, env="CHAT_USE_KNOWLEDGE_BASE")
+    # Rolling summary of older turns (ConversationModel.context_summary), written in the background
+    summary_enabled: bool = Field(True, env="CHAT_SUMMARY_ENABLED")
+    # Cheaper model used for summaries; empty uses the AI service default
+    summary_model: str = Field("gemini-1.5-flash", env="CHAT_SUMMARY_MODEL")
+    # Fold once this many turns beyond the recent window are unsummarized
+    summary_every_turns: int = Field(10, env="CHAT_SUMMARY_EVERY_TURNS")
+    summary_keep_recent_messages: int = Field(10, env="CHAT_SUMMARY_KEEP_RECENT_MESSAGES")
+    summary_words: int = Field(250, env="CHAT_SUMMARY_WORDS")
+    # Register bot system prompts with the provider's context cache and send a handle on each turn
+    prompt_cache_enabled: bool = Field(True, env="CHAT_PROMPT_CACHE_ENABLED")
+    prompt_cache_ttl_seconds: float = Field(3600.0, env="CHAT_PROMPT_CACHE_TTL_SECONDS")
+    # Shorter prompts are always sent in full
+    prompt_cache_min_tokens: int = Field(1024, env="CHAT_PROMPT_CACHE_MIN_TOKENS")
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+
+
+class QuotaSettings(BaseSettings):
+    """Daily token quota settings (bots use BotModel.max_daily_usage)."""
+
+    enabled: bool = Field(True, env="QUOTA_ENABLED")
+    # Tokens (prompt + reply) a user may spend per window; 0 is unlimited
+    user_daily_tokens: int = Field(0, env="QUOTA_USER_DAILY_TOKENS")
+    window_seconds: int = Field(86400, env="QUOTA_WINDOW_SECONDS")
+    slot_seconds: int = Field(600, env="QUOTA_SLOT_SECONDS")
+    # How often usage deltas are written and other workers' usage is picked up
+    flush_interval_seconds: float = Field(5.0, env="QUOTA_FLUSH_INTERVAL_SECONDS")
+
+    class Config:
+        env_file = ".env"
+        extra = "ignore"
+
+
+class WebSocketSettings(BaseSettings):
+    """Realtime notification settings."""
+
+    # "none" (single worker), "redis" (uses REDIS_URL) or "sqlite" (workers on one host)
+    backplane: str = Field("none", env="WS_BACKPLANE")
+    backplane_channel: str = Field("chatsphere:ws", env="WS_BACKPLANE_CHANNEL")
+    backplane_sqlite_path: str = Field(
+        "documents/ws_backplane.sqlite3", env="WS_BACKPLANE_SQLITE_PATH"
+    )
+    backplane_poll_interval_ms: float = Field(50.0, env="WS_BACKPLANE_POLL_INTERVAL_MS")
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -144,6 +326,7 @@ class Settings(BaseSettings):
 
     # File upload settings
     max_upload_size_mb: int = Field(10, env="MAX_UPLOAD_SIZE_MB")
+    upload_chunk_size_bytes: int = Field(1024 * 1024, env="UPLOAD_CHUNK_SIZE_BYTES")
     allowed_file_types: List[str] = Field(
         [".pdf", ".txt", ".docx", ".md"],
         env="ALLOWED_FILE_TYPES"
@@ -157,6 +340,11 @@ class Settings(BaseSettings):
     vector_db: VectorDatabaseSettings = Field(default_factory=VectorDatabaseSettings)
     cache: CacheSettings = Field(default_factory=CacheSettings)
     monitoring: MonitoringSettings = Field(default_factory=MonitoringSettings)
+    ingestion: IngestionSettings = Field(default_factory=IngestionSettings)
+    retrieval: RetrievalSettings = Field(default_factory=RetrievalSettings)
+    chat: ChatSettings = Field(default_factory=ChatSettings)
+    websocket: WebSocketSettings = Field(default_factory=WebSocketSettings)
+    quota: QuotaSettings = Field(default_factory=QuotaSettings)
 
     class Config:
         env_file = ".env"
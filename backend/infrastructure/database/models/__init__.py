@@ -16,6 +16,9 @@ from .user import UserModel
 from .bot import BotModel
 from .conversation import ConversationModel, MessageModel
 from .document import DocumentModel
+from .ingestion_job import IngestionJobModel
+from .document_chunk import DocumentChunkModel
+from .usage_counter import UsageCounterModel
 
 __all__ = [
     "UserModel",
@@ -23,4 +26,7 @@ __all__ = [
     "ConversationModel",
     "MessageModel",
     "DocumentModel",
+    "IngestionJobModel",
+    "DocumentChunkModel",
+    "UsageCounterModel",
 ]
@@ -176,12 +176,11 @@ class BotModel(BaseModel):
         """Increment the bot usage count."""
         self.usage_count += 1
     
-    def is_usage_limit_reached(self) -> bool:
-        """Check if daily usage limit is reached."""
+    def is_usage_limit_reached(self, daily_usage: int) -> bool:
+        """Check if the tokens used over the last day reach max_daily_usage."""
         if not self.max_daily_usage:
             return False
-        # In a real implementation, you'd check daily usage from conversations
-        return self.usage_count >= self.max_daily_usage
+        return daily_usage >= self.max_daily_usage
     
     def add_rating(self, rating: float) -> None:
         """Add a new rating and update average."""
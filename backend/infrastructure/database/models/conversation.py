@@ -86,6 +86,12 @@ class ConversationModel(BaseModel):
         nullable=True
     )
     
+    # Newest message folded into context_summary
+    summary_through_message_id: Mapped[Optional[int]] = mapped_column(
+        Integer,
+        nullable=True
+    )
+    
     settings: Mapped[Optional[dict]] = mapped_column(
         JSON,  # Use generic JSON for cross-dialect support
         nullable=True
@@ -178,6 +184,12 @@ class MessageModel(BaseModel):
         nullable=True
     )
     
+    # Prompt size of the content, cached for context packing
+    token_count: Mapped[Optional[int]] = mapped_column(
+        Integer,
+        nullable=True
+    )
+    
     processing_time_ms: Mapped[Optional[int]] = mapped_column(
         Integer,
         nullable=True
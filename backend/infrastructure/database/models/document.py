@@ -1,7 +1,9 @@
 """
 Document SQLAlchemy Model
 
-Stores metadata for uploaded documents used for bot training.
+Stores metadata for uploaded documents used for bot training. Files are
+stored content-addressed, and `content_sha256` lets an upload of bytes that
+are already known resolve to the existing document.
 """
 
 from typing import Optional
@@ -24,6 +26,7 @@ class DocumentModel(BaseModel):
     file_path: Mapped[str] = mapped_column(String(1024), nullable=False)
     file_type: Mapped[str] = mapped_column(String(50), nullable=False)
     file_size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    content_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     status: Mapped[str] = mapped_column(String(50), nullable=False, default="uploaded")
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -32,6 +35,7 @@ class DocumentModel(BaseModel):
         Index("idx_documents_owner", "owner_id"),
         Index("idx_documents_bot", "bot_id"),
         Index("idx_documents_status", "status"),
+        Index("idx_documents_content_sha256", "content_sha256"),
     )
 
     def __repr__(self) -> str:
@@ -0,0 +1,35 @@
+"""
+Document Chunk SQLAlchemy Model
+
+Stores the text of each chunk produced during ingestion. Chunk ids double as
+vector ids in the bot's vector store, so search hits map straight back here.
+`content_sha256` identifies unchanged chunks when a document is re-ingested,
+so their rows and embeddings are kept instead of recomputed.
+"""
+
+from typing import Optional
+
+from sqlalchemy import Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import BaseModel
+
+
+class DocumentChunkModel(BaseModel):
+    """SQLAlchemy model for document chunks."""
+
+    __tablename__ = "document_chunks"
+
+    document_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+    bot_id: Mapped[Optional[int]] = mapped_column(Integer, index=True, nullable=True)
+    chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    content_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+
+    __table_args__ = (Index("idx_document_chunks_document_index", "document_id", "chunk_index"),)
+
+    def __repr__(self) -> str:
+        return (
+            f"<DocumentChunkModel(id={self.id}, document_id={self.document_id},"
+            f" index={self.chunk_index})>"
+        )
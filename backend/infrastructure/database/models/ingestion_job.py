@@ -0,0 +1,41 @@
+"""
+Ingestion Job SQLAlchemy Model
+
+Persists background document ingestion jobs so queued work survives restarts.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import BaseModel
+
+
+class IngestionJobModel(BaseModel):
+    """SQLAlchemy model for document ingestion jobs."""
+
+    __tablename__ = "ingestion_jobs"
+
+    document_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+    owner_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+
+    # queued -> running -> done | failed (running jobs are re-queued on retry/restart)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=3, server_default="3"
+    )
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (Index("idx_ingestion_jobs_status_id", "status", "id"),)
+
+    def __repr__(self) -> str:
+        return (
+            f"<IngestionJobModel(id={self.id}, document_id={self.document_id},"
+            f" status='{self.status}')>"
+        )
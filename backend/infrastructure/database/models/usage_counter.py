@@ -0,0 +1,36 @@
+"""
+Usage Counter SQLAlchemy Model
+
+Tokens used per user or bot in fixed time slots. The quota service adds
+aggregated deltas to these rows and sums the slots inside its sliding
+window.
+"""
+
+from sqlalchemy import Index, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import BaseModel
+
+
+class UsageCounterModel(BaseModel):
+    """SQLAlchemy model for per-slot token usage."""
+
+    __tablename__ = "usage_counters"
+
+    # "user" or "bot"
+    scope: Mapped[str] = mapped_column(String(10), nullable=False)
+    subject_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Unix time the slot starts at
+    slot_start: Mapped[int] = mapped_column(Integer, nullable=False)
+    tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        UniqueConstraint("scope", "subject_id", "slot_start", name="uq_usage_counters_slot"),
+        Index("idx_usage_counters_slot_start", "slot_start"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<UsageCounterModel(scope='{self.scope}', subject_id={self.subject_id},"
+            f" tokens={self.tokens})>"
+        )
@@ -0,0 +1,180 @@
+"""
+Batching Embedding Service
+
+`IAIService` decorator that coalesces concurrent `embed_text` calls.
+
+Single-text requests are queued per embedding model. A queue is flushed as one
+`embed_texts` call on the wrapped service as soon as it holds the model's batch
+limit, or `max_wait_ms` after its first text arrived, whichever comes first;
+each caller then receives its own vector. Identical texts within a batch are
+sent once. `embed_texts` calls are passed through, split to the model's limit.
+
+Per-model counters (batches, items, how each batch was triggered and the fill
+ratio, i.e. items sent per unit of batch capacity) are available from
+`stats()`. Chat and model methods are delegated unchanged.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Set
+
+from application.interfaces.ai_service import IAIService
+from infrastructure.external_services.delegating_ai_service import DelegatingAIService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Pending:
+    texts: List[str] = field(default_factory=list)
+    futures: List[asyncio.Future] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+@dataclass
+class EmbeddingBatchStats:
+    """Counters for the batches sent for one embedding model."""
+
+    batches: int = 0
+    items: int = 0
+    capacity: int = 0
+    full_batches: int = 0
+    timed_batches: int = 0
+    direct_batches: int = 0
+    failed_batches: int = 0
+
+    @property
+    def fill_ratio(self) -> float:
+        return self.items / self.capacity if self.capacity else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "full_batches": self.full_batches,
+            "timed_batches": self.timed_batches,
+            "direct_batches": self.direct_batches,
+            "failed_batches": self.failed_batches,
+            "fill_ratio": round(self.fill_ratio, 4),
+        }
+
+
+class BatchingEmbeddingService(DelegatingAIService):
+    def __init__(
+        self,
+        inner: IAIService,
+        max_batch_size: int = 100,
+        max_wait_ms: float = 5.0,
+        model_batch_limits: Optional[Mapping[str, int]] = None,
+        max_concurrent_batches: int = 4,
+    ) -> None:
+        super().__init__(inner)
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max(0.0, max_wait_ms) / 1000
+        self._model_limits = {
+            name: max(1, limit) for name, limit in (model_batch_limits or {}).items()
+        }
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrent_batches))
+        self._pending: Dict[Optional[str], _Pending] = {}
+        self._stats: Dict[Optional[str], EmbeddingBatchStats] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def inner(self) -> IAIService:
+        return self._inner
+
+    def batch_limit(self, model: Optional[str]) -> int:
+        return self._model_limits.get(model or "", self._max_batch_size)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {model or "default": stats.as_dict() for model, stats in self._stats.items()}
+
+    async def close(self) -> None:
+        """Send queued texts now and wait for every batch in flight."""
+        for model in list(self._pending):
+            self._flush(model, "timed")
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    # Embeddings
+
+    async def embed_text(self, text: str, model: Optional[str] = None) -> List[float]:
+        loop = asyncio.get_running_loop()
+        pending = self._pending.get(model)
+        if pending is None:
+            pending = self._pending[model] = _Pending()
+            pending.timer = loop.call_later(self._max_wait, self._flush, model, "timed")
+        future = loop.create_future()
+        pending.texts.append(text)
+        pending.futures.append(future)
+        if len(pending.texts) >= self.batch_limit(model):
+            self._flush(model, "full")
+        return await future
+
+    async def embed_texts(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        limit = self.batch_limit(model)
+        if len(texts) <= limit:
+            return await self._send(texts, model, "direct")
+        parts = await asyncio.gather(
+            *(
+                self._send(texts[i : i + limit], model, "direct")
+                for i in range(0, len(texts), limit)
+            )
+        )
+        return [vector for part in parts for vector in part]
+
+    def _flush(self, model: Optional[str], reason: str) -> None:
+        pending = self._pending.pop(model, None)
+        if pending is None:
+            return
+        if pending.timer is not None:
+            pending.timer.cancel()
+        task = asyncio.create_task(self._run_batch(model, pending, reason))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, model: Optional[str], pending: _Pending, reason: str) -> None:
+        # Callers that were cancelled meanwhile no longer need a vector
+        waiting = [
+            (text, future)
+            for text, future in zip(pending.texts, pending.futures)
+            if not future.done()
+        ]
+        if not waiting:
+            return
+        unique = list(dict.fromkeys(text for text, _ in waiting))
+        try:
+            vectors = await self._send(unique, model, reason)
+        except Exception as e:
+            for _, future in waiting:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        by_text = dict(zip(unique, vectors))
+        for text, future in waiting:
+            if not future.done():
+                future.set_result(by_text[text])
+
+    async def _send(self, texts: List[str], model: Optional[str], reason: str) -> List[List[float]]:
+        stats = self._stats.setdefault(model, EmbeddingBatchStats())
+        async with self._semaphore:
+            try:
+                vectors = await self._inner.embed_texts(texts, model)
+                if len(vectors) != len(texts):
+                    raise ValueError(
+                        f"Embedding service returned {len(vectors)} vectors for {len(texts)} texts"
+                    )
+            except Exception as e:
+                stats.failed_batches += 1
+                logger.warning("Embedding batch of %d texts failed: %s", len(texts), e)
+                raise
+        stats.batches += 1
+        stats.items += len(texts)
+        stats.capacity += self.batch_limit(model)
+        if reason == "full":
+            stats.full_batches += 1
+        elif reason == "timed":
+            stats.timed_batches += 1
+        else:
+            stats.direct_batches += 1
+        return vectors
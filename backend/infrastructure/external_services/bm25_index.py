@@ -0,0 +1,192 @@
+"""
+BM25 Inverted Index
+
+In-memory keyword index over document chunks for one bot.
+
+Chunks get dense internal document numbers in insertion order, so every
+posting list only ever grows at its end: adding a chunk appends
+`(docno delta, term frequency)` pairs to each term's postings, encoded as
+varints in a `bytearray`. Searching decodes the postings of the query terms
+with NumPy and scores them with Okapi BM25.
+
+Removed chunks are masked out immediately. Their postings are purged, term by
+term and without touching the chunk text again, once they make up a quarter
+of the index; until then document frequencies still count them.
+
+Tokens are lowercased word runs. Compounds joined by `-`, `.`, `_` or `/`
+(error codes, model numbers, versions) are indexed both whole and by part,
+so "E-1042" matches a query for "e-1042" as well as "1042".
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from infrastructure.external_services.vector_math import top_k_indices
+
+_TOKEN_RE = re.compile(r"\w+(?:[-./]\w+)*")
+_SPLIT_RE = re.compile(r"[-./_]")
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        parts = _SPLIT_RE.split(token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    return tokens
+
+
+class Bm25Index:
+    def __init__(self, k1: float = 1.2, b: float = 0.75, purge_ratio: float = 0.25) -> None:
+        self._k1 = k1
+        self._b = b
+        self._purge_ratio = purge_ratio
+        # term -> varint-encoded (docno delta, tf) pairs, plus the last docno in each list
+        self._postings: Dict[str, bytearray] = {}
+        self._last_docno: Dict[str, int] = {}
+        self._df: Dict[str, int] = {}
+        # Per internal docno, growing by doubling
+        self._size = 0
+        self._chunk_ids = np.empty(1024, dtype=np.int64)
+        self._lengths = np.empty(1024, dtype=np.float32)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._docnos: Dict[int, int] = {}  # chunk id -> live docno
+        self._total_length = 0
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._docnos)
+
+    @property
+    def postings_bytes(self) -> int:
+        return sum(len(p) for p in self._postings.values())
+
+    def add(self, chunk_ids: Sequence[int], texts: Sequence[str]) -> None:
+        """Index chunks; re-adding a chunk id replaces its previous text."""
+        for chunk_id, text in zip(chunk_ids, texts):
+            if chunk_id in self._docnos:
+                self.remove([chunk_id])
+            docno = self._size
+            if docno == len(self._alive):
+                self._resize(2 * docno)
+            counts = Counter(tokenize(text))
+            length = sum(counts.values())
+            self._chunk_ids[docno] = chunk_id
+            self._lengths[docno] = length
+            self._alive[docno] = True
+            self._size += 1
+            self._docnos[chunk_id] = docno
+            self._total_length += length
+            for term, tf in counts.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = bytearray()
+                    self._last_docno[term] = 0
+                    self._df[term] = 0
+                _put_varint(postings, docno - self._last_docno[term])
+                _put_varint(postings, tf)
+                self._last_docno[term] = docno
+                self._df[term] += 1
+
+    def remove(self, chunk_ids: Iterable[int]) -> None:
+        for chunk_id in chunk_ids:
+            docno = self._docnos.pop(chunk_id, None)
+            if docno is None:
+                continue
+            self._alive[docno] = False
+            self._total_length -= self._lengths[docno]
+            self._dead += 1
+        if self._dead > self._purge_ratio * max(1, self._size):
+            self._purge()
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
+        """Return up to top_k (chunk id, BM25 score) pairs, best first."""
+        live = len(self._docnos)
+        terms = [t for t in set(tokenize(query)) if t in self._postings]
+        if not live or not terms or top_k <= 0:
+            return []
+        avg_length = max(self._total_length / live, 1.0)
+        scores = np.zeros(self._size, dtype=np.float32)
+        for term in terms:
+            docnos, tfs = _decode_postings(self._postings[term])
+            df = self._df[term]
+            idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+            norm = self._k1 * (1 - self._b + self._b * self._lengths[docnos] / avg_length)
+            scores[docnos] += idf * tfs * (self._k1 + 1) / (tfs + norm)
+
+        scores[~self._alive[: self._size]] = 0
+        top = top_k_indices(scores, top_k)
+        top = top[scores[top] > 0]
+        return list(zip(self._chunk_ids[top].tolist(), scores[top].tolist()))
+
+    def _purge(self) -> None:
+        """Drop removed chunks from every posting list and renumber the live ones."""
+        alive = self._alive[: self._size]
+        remap = np.cumsum(alive) - 1
+        for term in list(self._postings):
+            docnos, tfs = _decode_postings(self._postings[term])
+            keep = alive[docnos]
+            if not keep.any():
+                del self._postings[term], self._last_docno[term], self._df[term]
+                continue
+            docnos, tfs = remap[docnos[keep]], tfs[keep]
+            self._postings[term] = _encode_postings(docnos, tfs)
+            self._last_docno[term] = int(docnos[-1])
+            self._df[term] = len(docnos)
+        keep = np.flatnonzero(alive)
+        self._size = len(keep)
+        self._chunk_ids[: self._size] = self._chunk_ids[keep]
+        self._lengths[: self._size] = self._lengths[keep]
+        self._alive[: self._size] = True
+        self._alive[self._size :] = False
+        self._docnos = dict(zip(self._chunk_ids[: self._size].tolist(), range(self._size)))
+        self._dead = 0
+
+    def _resize(self, capacity: int) -> None:
+        for name in ("_chunk_ids", "_lengths", "_alive"):
+            old = getattr(self, name)
+            grown = np.zeros(capacity, dtype=old.dtype)
+            grown[: self._size] = old[: self._size]
+            setattr(self, name, grown)
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_varints(data: bytes) -> np.ndarray:
+    buf = np.frombuffer(bytes(data), dtype=np.uint8)
+    ends = np.flatnonzero(buf < 0x80)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    widths = ends - starts + 1
+    values = (buf[starts] & 0x7F).astype(np.int64)
+    for i in range(1, int(widths.max())):
+        wide = widths > i
+        values[wide] |= (buf[starts[wide] + i] & 0x7F).astype(np.int64) << (7 * i)
+    return values
+
+
+def _decode_postings(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    values = _decode_varints(data)
+    return np.cumsum(values[0::2]), values[1::2].astype(np.float32)
+
+
+def _encode_postings(docnos: np.ndarray, tfs: np.ndarray) -> bytearray:
+    out = bytearray()
+    previous = 0
+    for docno, tf in zip(docnos.tolist(), tfs.astype(np.int64).tolist()):
+        _put_varint(out, docno - previous)
+        _put_varint(out, tf)
+        previous = docno
+    return out
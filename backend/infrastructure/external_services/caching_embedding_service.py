@@ -0,0 +1,234 @@
+"""
+Caching Embedding Service
+
+`IAIService` decorator that remembers embeddings by content.
+
+Vectors are keyed by (model, sha256(text)) and stored as float16 in two
+tiers: an in-process LRU bounded by bytes, and a SQLite file shared by all
+workers and kept across restarts. Lookups try memory, then disk, and only
+the texts found in neither are sent to the wrapped service (once per
+distinct text), so re-ingesting unchanged chunks or answering a repeated
+query costs no upstream call.
+
+Every returned vector has been rounded through float16, so results do not
+depend on whether they came from the cache. Hit and miss counters are
+available from `stats()`. Chat and model methods are delegated unchanged.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from application.interfaces.ai_service import IAIService
+from infrastructure.external_services.delegating_ai_service import DelegatingAIService
+
+logger = logging.getLogger(__name__)
+
+_Key = Tuple[str, bytes]
+# Bookkeeping per memory entry (key tuple, digest bytes, ndarray header, dict slot)
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+@dataclass
+class EmbeddingCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def as_dict(self, memory_bytes: int, memory_entries: int) -> Dict[str, float]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4)
+            if lookups
+            else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": memory_entries,
+            "memory_bytes": memory_bytes,
+        }
+
+
+class SqliteEmbeddingStore:
+    """On-disk tier: one row per (model, digest) holding the float16 vector bytes."""
+
+    def __init__(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, digest BLOB NOT NULL, vector BLOB NOT NULL,"
+                " PRIMARY KEY (model, digest)) WITHOUT ROWID"
+            )
+            self._conn.commit()
+
+    def get_many(self, model: str, digests: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(digests), 500):
+                part = digests[start : start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    "SELECT digest, vector FROM embeddings"
+                    f" WHERE model = ? AND digest IN ({placeholders})",
+                    (model, *part),
+                ).fetchall()
+                for digest, blob in rows:
+                    found[digest] = np.frombuffer(blob, dtype=np.float16)
+        return found
+
+    def put_many(self, model: str, items: Sequence[Tuple[bytes, np.ndarray]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, digest, vector) VALUES (?, ?, ?)",
+                [(model, digest, vector.tobytes()) for digest, vector in items],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachingEmbeddingService(DelegatingAIService):
+    def __init__(
+        self,
+        inner: IAIService,
+        default_model: str,
+        store: Optional[SqliteEmbeddingStore] = None,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        super().__init__(inner)
+        self._default_model = default_model
+        self._store = store
+        self._memory_max_bytes = max(0, memory_max_bytes)
+        self._memory: "OrderedDict[_Key, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._stats = EmbeddingCacheStats()
+
+    def stats(self) -> Dict[str, float]:
+        return self._stats.as_dict(self._memory_bytes, len(self._memory))
+
+    async def close(self) -> None:
+        if self._store is not None:
+            await asyncio.to_thread(self._store.close)
+
+    # Embeddings
+
+    async def embed_text(self, text: str, model: Optional[str] = None) -> List[float]:
+        key = (model or self._default_model, _digest(text))
+        vector = self._memory_get(key)
+        if vector is None:
+            found = await self._disk_get(key[0], [key[1]])
+            vector = found.get(key[1])
+            if vector is not None:
+                self._stats.disk_hits += 1
+                self._memory_put(key, vector)
+            else:
+                self._stats.misses += 1
+                vector = _to_float16(await self._inner.embed_text(text, model))
+                self._memory_put(key, vector)
+                await self._disk_put(key[0], [(key[1], vector)])
+        return vector.astype(np.float32).tolist()
+
+    async def embed_texts(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        name = model or self._default_model
+        digests = [_digest(text) for text in texts]
+        vectors: Dict[bytes, np.ndarray] = {}
+        for digest in dict.fromkeys(digests):
+            vector = self._memory_get((name, digest), count=False)
+            if vector is not None:
+                vectors[digest] = vector
+
+        missing = [digest for digest in dict.fromkeys(digests) if digest not in vectors]
+        from_disk = await self._disk_get(name, missing) if missing else {}
+        for digest, vector in from_disk.items():
+            vectors[digest] = vector
+            self._memory_put((name, digest), vector)
+
+        # Texts in neither tier: embed each distinct one once
+        todo = {digest: text for digest, text in zip(digests, texts) if digest not in vectors}
+        if todo:
+            fresh = await self._inner.embed_texts(list(todo.values()), model)
+            if len(fresh) != len(todo):
+                raise ValueError(
+                    f"Embedding service returned {len(fresh)} vectors for {len(todo)} texts"
+                )
+            items = [(digest, _to_float16(vector)) for digest, vector in zip(todo, fresh)]
+            for digest, vector in items:
+                vectors[digest] = vector
+                self._memory_put((name, digest), vector)
+            await self._disk_put(name, items)
+
+        # Counted per requested text; repeats of a text embedded just now count as memory hits
+        for digest in digests:
+            if todo.pop(digest, None) is not None:
+                self._stats.misses += 1
+            elif digest in from_disk:
+                self._stats.disk_hits += 1
+            else:
+                self._stats.memory_hits += 1
+        return [vectors[digest].astype(np.float32).tolist() for digest in digests]
+
+    # Tiers
+
+    def _memory_get(self, key: _Key, count: bool = True) -> Optional[np.ndarray]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            if count:
+                self._stats.memory_hits += 1
+        return vector
+
+    def _memory_put(self, key: _Key, vector: np.ndarray) -> None:
+        size = vector.nbytes + _ENTRY_OVERHEAD_BYTES
+        if size > self._memory_max_bytes or key in self._memory:
+            return
+        self._memory[key] = vector
+        self._memory_bytes += size
+        while self._memory_bytes > self._memory_max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes + _ENTRY_OVERHEAD_BYTES
+            self._stats.evictions += 1
+
+    async def _disk_get(self, model: str, digests: List[bytes]) -> Dict[bytes, np.ndarray]:
+        if self._store is None or not digests:
+            return {}
+        try:
+            return await asyncio.to_thread(self._store.get_many, model, digests)
+        except sqlite3.Error as e:
+            logger.warning("Embedding cache read failed: %s", e)
+            return {}
+
+    async def _disk_put(self, model: str, items: List[Tuple[bytes, np.ndarray]]) -> None:
+        if self._store is None or not items:
+            return
+        try:
+            await asyncio.to_thread(self._store.put_many, model, items)
+        except sqlite3.Error as e:
+            logger.warning("Embedding cache write failed: %s", e)
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def _to_float16(vector: Sequence[float]) -> np.ndarray:
+    return np.asarray(vector, dtype=np.float16)
@@ -0,0 +1,448 @@
+"""
+Chat Stream Service
+
+Runs one chat turn with token streaming.
+
+`start_turn` validates the conversation and stores the user message in a
+short transaction, so no database connection is held while the model is
+generating. The prompt (bot system prompt, knowledge base excerpts and
+recent history) is packed under the model's token budget by
+`ContextBuilder`. `stream` then relays chunks from
+`IAIService.chat_completion_stream` as they arrive and stores the assembled
+assistant message once the stream ends.
+
+The stream is pulled by the consumer, so a slow client slows the upstream
+read instead of buffering the reply in memory. If the consumer goes away,
+the upstream stream is closed and the text generated so far is stored,
+marked as truncated.
+
+With a `ConversationSummarizer`, messages already folded into the
+conversation's `context_summary` are not loaded again; the summary is sent
+in their place and a summary check is scheduled after each stored reply.
+
+With a `TokenQuotaService`, a turn is refused with `AIQuotaExceededError`
+before anything is stored once the user or the bot has used up its daily
+tokens; the prompt and reply tokens of every generated reply are counted.
+
+The bot's system prompt comes from a `PromptPrefixCache`, canonicalized and
+with its token count cached; when the provider supports context caching
+the request carries a handle to the registered prompt.
+
+With a response cache, turns of bots at or below `cache_max_temperature`
+are looked up by (bot, bot configuration, knowledge base state, prompt
+with the question normalized). A hit is replayed without calling the AI
+service; complete replies are stored for the next identical turn. Because
+the configuration and knowledge base state are part of the key, editing a
+bot or ingesting documents makes older entries unreachable even in other
+workers.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import deque
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from application.exceptions.application_exceptions import (
+    ResourceNotFoundException,
+    ValidationException,
+)
+from application.interfaces.ai_service import ChatMessage, ChatRequest, IAIService
+from application.interfaces.knowledge_retrieval import IKnowledgeRetrievalService
+from application.interfaces.response_cache import CachedResponse, IResponseCache
+from infrastructure.database.models.bot import BotModel
+from infrastructure.database.models.conversation import ConversationModel, MessageModel, MessageRole
+from infrastructure.database.models.document import DocumentModel
+from infrastructure.external_services.context_builder import ContextBuilder
+from infrastructure.external_services.conversation_summarizer import ConversationSummarizer
+from infrastructure.external_services.prompt_prefix_cache import PromptPrefixCache
+from infrastructure.external_services.text_chunker import TokenCounter
+from infrastructure.external_services.token_quota_service import TokenQuotaService
+from infrastructure.repositories.sqlalchemy_message_repository import SqlAlchemyMessageRepository
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_CHARS = 10_000
+
+
+@dataclass
+class ChatStreamEvent:
+    """One event of a streamed turn: "start", "token", "done" or "error"."""
+
+    event: str
+    data: Dict[str, Any]
+
+
+@dataclass
+class ChatTurn:
+    conversation_id: int
+    bot_id: int
+    user_id: int
+    user_message_id: int
+    user_tokens: int
+    request: ChatRequest
+    started_at: float = field(default_factory=time.monotonic)
+    cache_key: Optional[str] = None
+
+
+class ChatStreamService:
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        ai_service: IAIService,
+        token_counter: Optional[TokenCounter] = None,
+        history_messages: int = 20,
+        response_cache: Optional[IResponseCache] = None,
+        cache_max_temperature: float = 0.0,
+        context_builder: Optional[ContextBuilder] = None,
+        retrieval: Optional[IKnowledgeRetrievalService] = None,
+        retrieval_top_k: int = 5,
+        default_reply_tokens: int = 2048,
+        summarizer: Optional[ConversationSummarizer] = None,
+        quota: Optional[TokenQuotaService] = None,
+        prompt_prefixes: Optional[PromptPrefixCache] = None,
+    ) -> None:
+        self._session_maker = session_maker
+        self._ai_service = ai_service
+        self._counter = token_counter or TokenCounter(encoding_name=None)
+        self._history_messages = max(0, history_messages)
+        self._context = context_builder or ContextBuilder(self._counter)
+        self._retrieval = retrieval
+        self._retrieval_top_k = retrieval_top_k
+        self._default_reply_tokens = default_reply_tokens
+        self._response_cache = response_cache
+        self._cache_max_temperature = cache_max_temperature
+        self._summarizer = summarizer
+        self._quota = quota
+        self._prefixes = prompt_prefixes or PromptPrefixCache(
+            ai_service, self._counter, provider_cache=False
+        )
+        self._tasks: Set[asyncio.Task] = set()
+        # Recent time-to-first-token samples in milliseconds
+        self._ttft_ms: Deque[float] = deque(maxlen=1000)
+        self._streams = 0
+        self._aborted = 0
+        self._failed = 0
+
+    async def start_turn(self, user_id: int, conversation_id: int, content: str) -> ChatTurn:
+        """
+        Store the user message and prepare the model request.
+
+        Raises:
+            ValidationException: If the message is empty or too long
+            ResourceNotFoundException: If the conversation or its bot is not available to the user
+            AIQuotaExceededError: If the user or the bot has used up its daily tokens
+        """
+        content = (content or "").strip()
+        if not content:
+            raise ValidationException("Message content is required")
+        if len(content) > MAX_MESSAGE_CHARS:
+            raise ValidationException("Message content cannot exceed 10,000 characters")
+
+        async with self._session_maker() as session:
+            conversation = await session.get(ConversationModel, conversation_id)
+            if not conversation or conversation.user_id != user_id or not conversation.is_active:
+                raise ResourceNotFoundException("Conversation not found")
+            bot = await session.get(BotModel, conversation.bot_id)
+            if not bot or not bot.is_active:
+                raise ResourceNotFoundException("Bot not found")
+            if self._quota is not None:
+                self._quota.check(user_id, bot)
+
+            messages = SqlAlchemyMessageRepository(session)
+            summary_through = (
+                conversation.summary_through_message_id if self._summarizer is not None else None
+            )
+            summary = conversation.context_summary if summary_through is not None else None
+            # Newest first, with token counts filled in for messages stored before they were cached
+            history = [
+                (ChatMessage(role=m.role, content=m.content), self._token_count(m))
+                for m in reversed(
+                    await messages.list_recent(
+                        conversation_id, self._history_messages, summary_through
+                    )
+                )
+                if m.content
+            ]
+            user_tokens = self._counter.count(content)
+            user_message = await messages.add(
+                {
+                    "conversation_id": conversation_id,
+                    "role": MessageRole.USER.value,
+                    "content": content,
+                    "tokens_used": user_tokens,
+                    "token_count": user_tokens,
+                }
+            )
+            conversation.message_count += 1
+            knowledge = None
+            if self._response_cache is not None or self._retrieval is not None:
+                knowledge = await _knowledge_fingerprint(session, bot.id)
+            await session.commit()
+
+        chunks = await self._retrieve(bot.id, content) if knowledge and knowledge[0] else []
+        reply_tokens = bot.max_tokens or self._default_reply_tokens
+        prefix = self._prefixes.prefix(bot)
+        packed = self._context.build(
+            question=content,
+            system_prompt=prefix.text if prefix else None,
+            system_prompt_tokens=prefix.tokens if prefix else None,
+            summary=summary,
+            history=history,
+            chunks=chunks,
+            model=bot.model_name,
+            reply_tokens=reply_tokens,
+        )
+        request = ChatRequest(
+            messages=packed.messages,
+            model=bot.model_name,
+            temperature=bot.temperature,
+            max_tokens=reply_tokens,
+            stream=True,
+            context={
+                "conversation_id": conversation_id,
+                "bot_id": bot.id,
+                "prompt_tokens": packed.prompt_tokens,
+            },
+            # The system prompt is always the first message
+            context_cache=await self._prefixes.handle(prefix, bot.model_name) if prefix else None,
+        )
+        cache_key = None
+        if self._response_cache is not None and bot.temperature <= self._cache_max_temperature:
+            cache_key = _cache_key(bot, knowledge or [], packed.messages)
+        return ChatTurn(
+            conversation_id=conversation_id,
+            bot_id=bot.id,
+            user_id=user_id,
+            user_message_id=user_message.id,
+            user_tokens=user_tokens,
+            request=request,
+            cache_key=cache_key,
+        )
+
+    async def stream(self, turn: ChatTurn) -> AsyncGenerator[ChatStreamEvent, None]:
+        """Yield the turn's events; the assistant message is stored before "done" is sent."""
+        self._streams += 1
+        yield ChatStreamEvent(
+            "start",
+            {"conversation_id": turn.conversation_id, "user_message_id": turn.user_message_id},
+        )
+
+        first_token_ms: Optional[float] = None
+        cached = await self._cached_reply(turn)
+        if cached is not None:
+            first_token_ms = (time.monotonic() - turn.started_at) * 1000
+            yield ChatStreamEvent("token", {"text": cached.content})
+            message_id = await self._persist(
+                turn, cached.content, first_token_ms, None, cached=True
+            )
+            yield ChatStreamEvent(
+                "done", self._done_data(turn, message_id, cached.tokens_used, first_token_ms, True)
+            )
+            return
+
+        parts: List[str] = []
+        try:
+            async with aclosing(self._ai_service.chat_completion_stream(turn.request)) as chunks:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if first_token_ms is None:
+                        first_token_ms = (time.monotonic() - turn.started_at) * 1000
+                        self._ttft_ms.append(first_token_ms)
+                    parts.append(chunk)
+                    yield ChatStreamEvent("token", {"text": chunk})
+        except (GeneratorExit, asyncio.CancelledError):
+            # The client went away: keep what it already received
+            self._aborted += 1
+            self._persist_later(turn, "".join(parts), first_token_ms, "Client disconnected")
+            raise
+        except Exception as e:
+            self._failed += 1
+            logger.error("Chat stream for conversation %s failed: %s", turn.conversation_id, e)
+            message_id = await self._persist(turn, "".join(parts), first_token_ms, str(e))
+            yield ChatStreamEvent(
+                "error",
+                {
+                    "conversation_id": turn.conversation_id,
+                    "message_id": message_id,
+                    "detail": "The assistant failed to respond",
+                },
+            )
+            return
+
+        content = "".join(parts)
+        tokens = self._counter.count(content)
+        message_id = await self._persist(turn, content, first_token_ms, None)
+        await self._remember(turn, content, tokens)
+        yield ChatStreamEvent(
+            "done", self._done_data(turn, message_id, tokens, first_token_ms, False)
+        )
+
+    def _token_count(self, message: MessageModel) -> int:
+        if message.token_count is None:
+            message.token_count = self._counter.count(message.content)
+        return message.token_count
+
+    async def _retrieve(self, bot_id: int, question: str) -> List[str]:
+        if self._retrieval is None:
+            return []
+        try:
+            found = await self._retrieval.retrieve(bot_id, question, self._retrieval_top_k)
+        except Exception as e:
+            # Answer without the knowledge base rather than fail the turn
+            logger.warning("Knowledge retrieval for bot %s failed: %s", bot_id, e)
+            return []
+        return [chunk.content for chunk in found]
+
+    async def _cached_reply(self, turn: ChatTurn) -> Optional[CachedResponse]:
+        if self._response_cache is None or turn.cache_key is None:
+            return None
+        try:
+            return await self._response_cache.get(turn.bot_id, turn.cache_key)
+        except Exception as e:
+            logger.warning("Response cache lookup failed: %s", e)
+            return None
+
+    async def _remember(self, turn: ChatTurn, content: str, tokens: int) -> None:
+        if self._response_cache is None or turn.cache_key is None or not content.strip():
+            return
+        reply = CachedResponse(content=content, model=turn.request.model, tokens_used=tokens)
+        try:
+            await self._response_cache.put(turn.bot_id, turn.cache_key, reply)
+        except Exception as e:
+            logger.warning("Response cache store failed: %s", e)
+
+    def _done_data(
+        self,
+        turn: ChatTurn,
+        message_id: Optional[int],
+        tokens: int,
+        first_token_ms: Optional[float],
+        cached: bool,
+    ) -> Dict[str, Any]:
+        return {
+            "conversation_id": turn.conversation_id,
+            "message_id": message_id,
+            "tokens_used": tokens,
+            "time_to_first_token_ms": round(first_token_ms) if first_token_ms is not None else None,
+            "processing_time_ms": round((time.monotonic() - turn.started_at) * 1000),
+            "cached": cached,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self._ttft_ms)
+
+        def percentile(q: float) -> Optional[float]:
+            return (
+                round(samples[min(len(samples) - 1, int(q * len(samples)))], 1) if samples else None
+            )
+
+        return {
+            "streams": self._streams,
+            "aborted": self._aborted,
+            "failed": self._failed,
+            "ttft_p50_ms": percentile(0.5),
+            "ttft_p95_ms": percentile(0.95),
+        }
+
+    async def close(self) -> None:
+        """Wait for messages of aborted streams to be stored."""
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def _persist_later(
+        self, turn: ChatTurn, content: str, first_token_ms: Optional[float], error: str
+    ) -> None:
+        # Awaiting here is not possible: the consuming task is being cancelled or closed
+        task = asyncio.get_running_loop().create_task(
+            self._persist(turn, content, first_token_ms, error)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _persist(
+        self,
+        turn: ChatTurn,
+        content: str,
+        first_token_ms: Optional[float],
+        error: Optional[str],
+        cached: bool = False,
+    ) -> Optional[int]:
+        """Store the assistant message and update the conversation counters."""
+        tokens = self._counter.count(content) if content else 0
+        if self._quota is not None and not cached:
+            prompt_tokens = (turn.request.context or {}).get("prompt_tokens", turn.user_tokens)
+            self._quota.record(turn.user_id, turn.bot_id, prompt_tokens + tokens)
+        if not content.strip():
+            return None
+        metadata: Dict[str, Any] = {"streamed": True}
+        if cached:
+            metadata["cached"] = True
+        if first_token_ms is not None:
+            metadata["time_to_first_token_ms"] = round(first_token_ms)
+        if error is not None:
+            metadata["truncated"] = True
+        try:
+            async with self._session_maker() as session:
+                message = await SqlAlchemyMessageRepository(session).add(
+                    {
+                        "conversation_id": turn.conversation_id,
+                        "role": MessageRole.ASSISTANT.value,
+                        "content": content,
+                        "tokens_used": tokens,
+                        "token_count": tokens,
+                        "processing_time_ms": round((time.monotonic() - turn.started_at) * 1000),
+                        "model_name": turn.request.model,
+                        "temperature": turn.request.temperature,
+                        "message_metadata": metadata,
+                        "error_message": error,
+                    }
+                )
+                conversation = await session.get(ConversationModel, turn.conversation_id)
+                if conversation is not None:
+                    conversation.increment_message_count()
+                    conversation.add_tokens_used(turn.user_tokens + tokens)
+                await session.commit()
+            if self._summarizer is not None:
+                self._summarizer.schedule(turn.conversation_id)
+            return message.id
+        except Exception as e:
+            logger.error(
+                "Failed to store assistant message for conversation %s: %s", turn.conversation_id, e
+            )
+            return None
+
+
+async def _knowledge_fingerprint(session: AsyncSession, bot_id: int) -> List[Any]:
+    """Changes whenever a document of the bot is processed, re-processed or removed."""
+    stmt = select(
+        func.count(DocumentModel.id), func.max(DocumentModel.id), func.max(DocumentModel.updated_at)
+    ).where(DocumentModel.bot_id == bot_id, DocumentModel.status == "processed")
+    count, last_id, last_update = (await session.execute(stmt)).one()
+    return [count, last_id, str(last_update) if last_update else None]
+
+
+def _cache_key(bot: BotModel, knowledge: List[Any], prompt: List[ChatMessage]) -> str:
+    config = [
+        bot.model_name,
+        bot.temperature,
+        bot.max_tokens,
+        bot.system_prompt,
+        str(bot.updated_at),
+    ]
+    messages = [[m.role, " ".join(m.content.split())] for m in prompt[:-1]]
+    payload = [config, knowledge, messages, _normalize_question(prompt[-1].content)]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _normalize_question(text: str) -> str:
+    # "What are your opening hours?" and "what are your opening hours" ask the same thing
+    return re.sub(r"[\s?!.]+$", "", " ".join(text.split()).casefold())
@@ -0,0 +1,160 @@
+"""
+Context Builder
+
+Packs a chat prompt under a token budget.
+
+The budget is the model's context window minus the tokens reserved for the
+reply, capped at `max_prompt_tokens`. Parts are admitted in priority order:
+
+1. the bot's system prompt, the summary of older conversation turns and
+   the new user message (always kept),
+2. retrieved knowledge chunks, best ranked first, up to `knowledge_share`
+   of what is left,
+3. conversation history, newest first, until the next message no longer
+   fits; older messages are dropped,
+4. remaining room goes to knowledge chunks that did not fit in step 2.
+
+History is consumed lazily and token counts come with each message (they
+are cached on the stored messages), so packing costs O(messages kept).
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from application.interfaces.ai_service import ChatMessage
+from infrastructure.external_services.text_chunker import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+# Role markers and separators the model adds around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+KNOWLEDGE_HEADER = "Use the following excerpts from the knowledge base when they are relevant:"
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+
+@dataclass
+class PackedContext:
+    messages: List[ChatMessage]
+    prompt_tokens: int
+    budget: int
+    history_kept: int
+    chunks_kept: int
+    chunks_dropped: int
+
+
+class ContextBuilder:
+    def __init__(
+        self,
+        counter: Optional[TokenCounter] = None,
+        max_prompt_tokens: int = 8000,
+        default_context_window: int = 32768,
+        model_context_windows: Optional[Mapping[str, int]] = None,
+        knowledge_share: float = 0.5,
+    ) -> None:
+        self._counter = counter or TokenCounter(encoding_name=None)
+        self._max_prompt_tokens = max(1, max_prompt_tokens)
+        self._default_context_window = default_context_window
+        self._model_context_windows = dict(model_context_windows or {})
+        self._knowledge_share = min(1.0, max(0.0, knowledge_share))
+
+    def count(self, text: str) -> int:
+        return self._counter.count(text)
+
+    def budget(self, model: Optional[str], reply_tokens: int) -> int:
+        window = self._model_context_windows.get(model or "", self._default_context_window)
+        return max(0, min(self._max_prompt_tokens, window - max(0, reply_tokens)))
+
+    def build(
+        self,
+        question: str,
+        system_prompt: Optional[str] = None,
+        system_prompt_tokens: Optional[int] = None,
+        summary: Optional[str] = None,
+        history: Iterable[Tuple[ChatMessage, int]] = (),
+        chunks: Sequence[str] = (),
+        model: Optional[str] = None,
+        reply_tokens: int = 0,
+    ) -> PackedContext:
+        """
+        Args:
+            question: The new user message
+            system_prompt: The bot's instructions, if any
+            system_prompt_tokens: Token count of `system_prompt`, when already known
+            summary: Rolling summary of the messages older than `history`, if any
+            history: Earlier messages newest first, each with its token count
+            chunks: Retrieved knowledge, most relevant first
+        """
+        budget = self.budget(model, reply_tokens)
+        question_message = ChatMessage(role="user", content=question)
+        used = self._size(self.count(question))
+        system_message = None
+        if system_prompt:
+            system_message = ChatMessage(role="system", content=system_prompt)
+            used += self._size(
+                self.count(system_prompt) if system_prompt_tokens is None else system_prompt_tokens
+            )
+        summary_message = None
+        if summary:
+            summary_message = ChatMessage(role="system", content=f"{SUMMARY_HEADER}\n{summary}")
+            used += self._size(self.count(summary_message.content))
+        if used > budget:
+            logger.warning(
+                "System prompt, summary and question alone use %d of %d prompt tokens", used, budget
+            )
+
+        chunk_sizes = [self.count(chunk) + 1 for chunk in chunks]
+        knowledge_cap = int(max(0, budget - used) * self._knowledge_share)
+        kept_chunks, knowledge_tokens = self._take_chunks(chunks, chunk_sizes, knowledge_cap)
+        used += knowledge_tokens
+
+        kept_history: List[ChatMessage] = []
+        for message, tokens in history:
+            size = self._size(tokens)
+            if used + size > budget:
+                break
+            kept_history.append(message)
+            used += size
+
+        if len(kept_chunks) < len(chunks) and used < budget:
+            # History left room: admit more knowledge
+            kept_chunks, more_tokens = self._take_chunks(
+                chunks, chunk_sizes, knowledge_tokens + budget - used
+            )
+            used += more_tokens - knowledge_tokens
+
+        messages: List[ChatMessage] = []
+        if system_message is not None:
+            messages.append(system_message)
+        if kept_chunks:
+            body = "\n\n".join(f"[{i}] {chunk}" for i, chunk in enumerate(kept_chunks, start=1))
+            messages.append(ChatMessage(role="system", content=f"{KNOWLEDGE_HEADER}\n\n{body}"))
+        if summary_message is not None:
+            messages.append(summary_message)
+        messages.extend(reversed(kept_history))
+        messages.append(question_message)
+        return PackedContext(
+            messages=messages,
+            prompt_tokens=used,
+            budget=budget,
+            history_kept=len(kept_history),
+            chunks_kept=len(kept_chunks),
+            chunks_dropped=len(chunks) - len(kept_chunks),
+        )
+
+    @staticmethod
+    def _size(tokens: int) -> int:
+        return tokens + MESSAGE_OVERHEAD_TOKENS
+
+    def _take_chunks(
+        self, chunks: Sequence[str], sizes: Sequence[int], limit: int
+    ) -> Tuple[List[str], int]:
+        """Best ranked chunks that fit in `limit` tokens together with the knowledge header."""
+        used = self.count(KNOWLEDGE_HEADER) + MESSAGE_OVERHEAD_TOKENS
+        kept: List[str] = []
+        for chunk, size in zip(chunks, sizes):
+            if used + size > limit:
+                break
+            kept.append(chunk)
+            used += size
+        return kept, used if kept else 0
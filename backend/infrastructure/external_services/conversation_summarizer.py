@@ -0,0 +1,156 @@
+"""
+Conversation Summarizer
+
+Keeps `ConversationModel.context_summary` as a rolling summary of the
+history that no longer needs to be sent verbatim.
+
+After each stored reply the chat path calls `schedule`. In the background
+the summarizer counts the messages newer than the summary; once more than
+`keep_recent_messages` plus `every_turns` turns have piled up, it folds
+everything except the newest `keep_recent_messages` into the summary with
+one call to a cheaper model and advances `summary_through_message_id`.
+Chat turns then send the summary plus the messages after it, so prompt
+size stays roughly constant however long the conversation gets.
+
+Work for a conversation never runs twice at once in a process, and the
+summary is written with a conditional update so two workers cannot fold
+the same messages twice.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from application.interfaces.ai_service import ChatMessage, ChatRequest, IAIService
+from infrastructure.database.models.conversation import ConversationModel, MessageModel
+from infrastructure.repositories.sqlalchemy_message_repository import SqlAlchemyMessageRepository
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Merge the new messages into the existing summary. Keep facts about the user, their problem, "
+    "what was tried, decisions and open questions; drop greetings and small talk. "
+    "Reply with the updated summary only, in at most {words} words."
+)
+# Long messages are cut before summarizing so one pass has a bounded prompt
+_MAX_MESSAGE_CHARS = 2000
+
+
+class ConversationSummarizer:
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        ai_service: IAIService,
+        model: Optional[str] = None,
+        every_turns: int = 10,
+        keep_recent_messages: int = 10,
+        max_messages_per_pass: int = 40,
+        summary_words: int = 250,
+    ) -> None:
+        self._session_maker = session_maker
+        self._ai_service = ai_service
+        self._model = model
+        self._every_messages = max(1, every_turns) * 2
+        self._keep_recent = max(0, keep_recent_messages)
+        self._max_per_pass = max(1, max_messages_per_pass)
+        self._summary_words = summary_words
+        self._running: Dict[int, asyncio.Task] = {}
+        self._passes = 0
+        self._folded_messages = 0
+        self._failures = 0
+
+    def schedule(self, conversation_id: int) -> None:
+        """Check the conversation in the background; a no-op while a check for it is running."""
+        if conversation_id in self._running:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(conversation_id))
+        self._running[conversation_id] = task
+        task.add_done_callback(lambda _: self._running.pop(conversation_id, None))
+
+    async def close(self) -> None:
+        await asyncio.gather(*list(self._running.values()), return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "passes": self._passes,
+            "folded_messages": self._folded_messages,
+            "failures": self._failures,
+            "running": len(self._running),
+        }
+
+    async def _run(self, conversation_id: int) -> None:
+        try:
+            # A conversation with a long backlog is caught up in several bounded passes
+            while await self._fold_once(conversation_id):
+                pass
+        except Exception as e:
+            self._failures += 1
+            logger.warning("Summarizing conversation %s failed: %s", conversation_id, e)
+
+    async def _fold_once(self, conversation_id: int) -> bool:
+        """Fold one batch of old messages into the summary; False when there is nothing to do."""
+        async with self._session_maker() as session:
+            conversation = await session.get(ConversationModel, conversation_id)
+            if conversation is None:
+                return False
+            through = conversation.summary_through_message_id
+            summary = conversation.context_summary if through is not None else None
+            messages = SqlAlchemyMessageRepository(session)
+            pending = await messages.count_after(conversation_id, through)
+            if pending < self._keep_recent + self._every_messages:
+                return False
+            batch = await messages.list_after(
+                conversation_id, through, min(self._max_per_pass, pending - self._keep_recent)
+            )
+        if not batch:
+            return False
+
+        new_summary = await self._summarize(summary, batch)
+        async with self._session_maker() as session:
+            stmt = update(ConversationModel).where(ConversationModel.id == conversation_id)
+            stmt = stmt.where(
+                ConversationModel.summary_through_message_id.is_(None)
+                if through is None
+                else ConversationModel.summary_through_message_id == through
+            )
+            result = await session.execute(
+                stmt.values(
+                    context_summary=new_summary, summary_through_message_id=batch[-1].id
+                ).execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        if result.rowcount != 1:
+            # Another worker folded these messages first
+            return False
+        self._passes += 1
+        self._folded_messages += len(batch)
+        return True
+
+    async def _summarize(self, summary: Optional[str], batch: List[MessageModel]) -> str:
+        transcript = "\n".join(f"{m.role}: {(m.content or '')[:_MAX_MESSAGE_CHARS]}" for m in batch)
+        request = ChatRequest(
+            messages=[
+                ChatMessage(
+                    role="system", content=SUMMARY_INSTRUCTIONS.format(words=self._summary_words)
+                ),
+                ChatMessage(
+                    role="user",
+                    content=(
+                        f"Existing summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"
+                    ),
+                ),
+            ],
+            model=self._model,
+            temperature=0.2,
+            # Roughly 4 tokens per 3 words
+            max_tokens=self._summary_words * 4 // 3 + 50,
+        )
+        response = await self._ai_service.chat_completion(request)
+        content = response.content.strip()
+        if not content:
+            raise ValueError("Summarizer returned an empty summary")
+        return content
@@ -0,0 +1,52 @@
+"""
+Delegating AI Service
+
+Base class for `IAIService` decorators. Every operation is forwarded
+unchanged to the wrapped service in `self._inner`, so a decorator only
+overrides the operations it changes.
+"""
+
+from typing import AsyncGenerator, List, Optional
+
+from application.interfaces.ai_service import (
+    ChatMessage,
+    ChatRequest,
+    ChatResponse,
+    ContextCacheHandle,
+    IAIService,
+)
+
+
+class DelegatingAIService(IAIService):
+    def __init__(self, inner: IAIService) -> None:
+        self._inner = inner
+
+    async def initialize(self) -> None:
+        await self._inner.initialize()
+
+    async def chat_completion(self, request: ChatRequest) -> ChatResponse:
+        return await self._inner.chat_completion(request)
+
+    async def chat_completion_stream(self, request: ChatRequest) -> AsyncGenerator[str, None]:
+        async for chunk in self._inner.chat_completion_stream(request):
+            yield chunk
+
+    async def embed_text(self, text: str, model: Optional[str] = None) -> List[float]:
+        return await self._inner.embed_text(text, model)
+
+    async def embed_texts(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        return await self._inner.embed_texts(texts, model)
+
+    def get_available_models(self) -> List[str]:
+        return self._inner.get_available_models()
+
+    def validate_model(self, model_name: str) -> bool:
+        return self._inner.validate_model(model_name)
+
+    async def cache_context(
+        self, model: str, messages: List[ChatMessage], ttl_seconds: float
+    ) -> Optional[ContextCacheHandle]:
+        return await self._inner.cache_context(model, messages, ttl_seconds)
+
+    async def check_service_health(self) -> bool:
+        return await self._inner.check_service_health()
@@ -0,0 +1,356 @@
+"""
+Document Ingestion Service
+
+Background worker pool that turns uploaded documents into chunks and embeddings.
+
+Uploads only persist the file plus a row in the `ingestion_jobs` table; a fixed
+number of worker tasks claim queued jobs, run extraction, chunking and embedding,
+and report progress through `SqlAlchemyDocumentRepository.update_status`.
+Chunk text is stored in `document_chunks` and, for documents attached to a bot,
+the embeddings are upserted into the vector store under the chunk ids.
+
+Re-ingestion is incremental: chunks whose text hash matches a chunk stored by
+the previous run keep their row and embedding, only new or changed chunks are
+embedded, and chunks that disappeared are deleted and tombstoned in the vector
+store once the run commits. A document whose content another processed
+document already has copies that document's chunks instead of re-extracting.
+Because the queue lives in the database, jobs that were queued or interrupted
+when the process stopped are picked up again on the next start. A run is cut
+off after `job_timeout_seconds`, and only jobs running for twice that long are
+treated as abandoned, so a live worker never races a re-queued copy of its job.
+
+Idle workers also sweep the upload storage: stored files that no document
+references and that no upload has touched within the grace period are removed.
+Doing this in one place, rather than after each request, keeps a replaced file
+from being deleted under a concurrent upload of the same bytes.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from application.interfaces.ai_service import IAIService
+from application.interfaces.response_cache import IResponseCache
+from application.interfaces.vector_store import IVectorStore
+from infrastructure.database.models.document import DocumentModel
+from infrastructure.database.models.document_chunk import DocumentChunkModel
+from infrastructure.external_services.document_processor_service import DocumentProcessorService
+from infrastructure.external_services.upload_storage_service import UploadStorageService
+from infrastructure.repositories.sqlalchemy_document_chunk_repository import (
+    SqlAlchemyDocumentChunkRepository,
+    hash_chunk,
+)
+from infrastructure.repositories.sqlalchemy_document_repository import SqlAlchemyDocumentRepository
+from infrastructure.repositories.sqlalchemy_ingestion_job_repository import (
+    SqlAlchemyIngestionJobRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+# (user_id, message) -> None; used to push progress events to connected clients
+Notifier = Callable[[int, str], Awaitable[None]]
+
+
+class DocumentIngestionService:
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        processor: DocumentProcessorService,
+        ai_service: IAIService,
+        vector_store: Optional[IVectorStore] = None,
+        workers: int = 2,
+        poll_interval_seconds: float = 2.0,
+        job_timeout_seconds: int = 600,
+        embed_batch_size: int = 64,
+        notifier: Optional[Notifier] = None,
+        response_cache: Optional[IResponseCache] = None,
+        storage: Optional[UploadStorageService] = None,
+        orphan_grace_seconds: float = 3600.0,
+        orphan_sweep_interval_seconds: float = 600.0,
+    ) -> None:
+        self._session_maker = session_maker
+        self._processor = processor
+        self._ai_service = ai_service
+        self._vector_store = vector_store
+        self._workers = max(1, workers)
+        self._poll_interval = poll_interval_seconds
+        self._job_timeout = timedelta(seconds=job_timeout_seconds)
+        self._embed_batch_size = max(1, embed_batch_size)
+        self._notifier = notifier
+        self._response_cache = response_cache
+        self._storage = storage
+        self._orphan_grace = orphan_grace_seconds
+        self._orphan_sweep_interval = orphan_sweep_interval_seconds
+        self._next_orphan_sweep = 0.0
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        await self._requeue_stale_jobs()
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"ingestion-worker-{i}")
+            for i in range(self._workers)
+        ]
+        logger.info("Document ingestion started with %d workers", self._workers)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle workers after a job has been committed."""
+        self._wakeup.set()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                job_id = await self._claim_next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Ingestion worker %d failed to claim job: %s", index, e)
+                job_id = None
+
+            if job_id is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+                except asyncio.TimeoutError:
+                    await self._requeue_stale_jobs()
+                    await self._sweep_orphan_files()
+                continue
+
+            await self._run_job(job_id)
+
+    async def _claim_next(self) -> Optional[int]:
+        async with self._session_maker() as session:
+            job = await SqlAlchemyIngestionJobRepository(session).claim_next()
+            await session.commit()
+            return job.id if job else None
+
+    async def _requeue_stale_jobs(self) -> None:
+        try:
+            async with self._session_maker() as session:
+                # Live runs are cut off after one timeout; past two, the worker is gone
+                count, failed = await SqlAlchemyIngestionJobRepository(session).requeue_stale(
+                    datetime.now(timezone.utc) - 2 * self._job_timeout
+                )
+                documents = SqlAlchemyDocumentRepository(session)
+                for job in failed:
+                    await documents.update_status(job.document_id, "failed", job.error_message)
+                await session.commit()
+            if count:
+                logger.warning("Re-queued %d stale ingestion jobs", count)
+            for job in failed:
+                logger.warning(
+                    "Ingestion job %s ran out of attempts after its worker stopped", job.id
+                )
+                await self._notify(job.owner_id, f"document:{job.document_id}:failed")
+        except Exception as e:
+            logger.error("Failed to re-queue stale ingestion jobs: %s", e)
+
+    async def _sweep_orphan_files(self) -> None:
+        """Remove stored uploads that no document references any more."""
+        loop = asyncio.get_running_loop()
+        if self._storage is None or loop.time() < self._next_orphan_sweep:
+            return
+        # Claimed before awaiting so other idle workers skip this round
+        self._next_orphan_sweep = loop.time() + self._orphan_sweep_interval
+        storage = self._storage
+        try:
+            paths = await asyncio.to_thread(storage.list_files, self._orphan_grace)
+            removed = 0
+            for start in range(0, len(paths), 500):
+                batch = paths[start : start + 500]
+                async with self._session_maker() as session:
+                    referenced = await SqlAlchemyDocumentRepository(session).referenced_file_paths(
+                        batch
+                    )
+                for path in batch:
+                    # Re-checks the mtime, so a file an upload reused meanwhile is kept
+                    if path not in referenced and await asyncio.to_thread(
+                        storage.remove_if_older, path, self._orphan_grace
+                    ):
+                        removed += 1
+            if removed:
+                logger.info("Removed %d unreferenced upload files", removed)
+        except Exception as e:
+            logger.error("Failed to sweep unreferenced upload files: %s", e)
+
+    async def _run_job(self, job_id: int) -> None:
+        async with self._session_maker() as session:
+            jobs = SqlAlchemyIngestionJobRepository(session)
+            documents = SqlAlchemyDocumentRepository(session)
+            job = await jobs.get_by_id(job_id)
+            if not job:
+                return
+            document = await documents.get_by_id(job.document_id)
+            if not document:
+                await jobs.mark_failed(job_id, "Document no longer exists")
+                await session.commit()
+                return
+
+            # Plain values: a rollback below expires the ORM instance
+            document_id, owner_id, bot_id = document.id, document.owner_id, document.bot_id
+            await documents.update_status(document_id, "processing", None)
+            await session.commit()
+
+            indexed: List[int] = []
+            removed: List[int] = []
+            try:
+                chunk_count = await asyncio.wait_for(
+                    self._ingest(session, document, indexed, removed),
+                    timeout=self._job_timeout.total_seconds(),
+                )
+            except asyncio.CancelledError:
+                # Leave the job running; the stale sweep re-queues it after a restart
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    error = (
+                        f"Ingestion did not finish within {self._job_timeout.total_seconds():g}s"
+                    )
+                else:
+                    error = str(e)
+                logger.error("Ingestion of document %s failed: %s", document_id, error)
+                await session.rollback()
+                await self._unindex(bot_id, indexed)
+                job = await jobs.mark_failed(job_id, error)
+                if job and job.status == "failed":
+                    await documents.update_status(document_id, "failed", error)
+                    await session.commit()
+                    await self._notify(owner_id, f"document:{document_id}:failed")
+                else:
+                    await documents.update_status(document_id, "queued", error)
+                    await session.commit()
+                    self.notify()
+                return
+
+            await jobs.mark_done(job_id)
+            await documents.update_status(document_id, "processed", None)
+            await session.commit()
+            await self._unindex(bot_id, removed)
+            await self._invalidate_answers(bot_id)
+            await self._notify(owner_id, f"document:{document_id}:processed:{chunk_count}")
+
+    async def _ingest(
+        self, session: AsyncSession, document: DocumentModel, indexed: List[int], removed: List[int]
+    ) -> int:
+        """Store the document's chunks; ids to drop from the vector index go to `removed`."""
+        chunks = SqlAlchemyDocumentChunkRepository(session)
+        # Chunks of an earlier run, by text hash; unchanged ones are kept as they are
+        previous: Dict[str, List[DocumentChunkModel]] = {}
+        stale: List[DocumentChunkModel] = []
+        for model in await chunks.list_by_documents([document.id]):
+            if model.content_sha256:
+                previous.setdefault(model.content_sha256, []).append(model)
+            else:
+                stale.append(model)
+
+        # New chunks are embedded batch by batch while later PDF pages are still being parsed
+        count = embedded = 0
+        batch: List[Tuple[int, str]] = []
+        async for chunk in self._iter_chunks(session, document):
+            kept = previous.get(hash_chunk(chunk))
+            if kept:
+                kept.pop().chunk_index = count
+            else:
+                batch.append((count, chunk))
+                embedded += 1
+                if len(batch) >= self._embed_batch_size:
+                    await self._store_batch(chunks, document, batch, indexed)
+                    batch = []
+            count += 1
+        if batch:
+            await self._store_batch(chunks, document, batch, indexed)
+
+        stale.extend(model for models in previous.values() for model in models)
+        removed.extend(model.id for model in stale)
+        await chunks.delete_many(removed)
+        if stale:
+            logger.info(
+                "Re-ingested document %s: %d chunks kept, %d embedded, %d removed",
+                document.id,
+                count - embedded,
+                embedded,
+                len(stale),
+            )
+        return count
+
+    async def _iter_chunks(
+        self, session: AsyncSession, document: DocumentModel
+    ) -> AsyncGenerator[str, None]:
+        if document.content_sha256:
+            twin = await SqlAlchemyDocumentRepository(session).get_processed_by_hash(
+                document.content_sha256, exclude_id=document.id
+            )
+            if twin is not None:
+                for model in await SqlAlchemyDocumentChunkRepository(session).list_by_documents(
+                    [twin.id]
+                ):
+                    yield model.content
+                return
+        async for chunk in self._processor.chunk_text_stream(self._iter_text(document)):
+            yield chunk
+
+    async def _store_batch(
+        self,
+        chunks: SqlAlchemyDocumentChunkRepository,
+        document: DocumentModel,
+        batch: List[Tuple[int, str]],
+        indexed: List[int],
+    ) -> None:
+        texts = [text for _, text in batch]
+        models = await chunks.add_many(
+            document.id, document.bot_id, texts, [index for index, _ in batch]
+        )
+        embeddings = await self._ai_service.embed_texts(texts)
+        if self._vector_store is None or document.bot_id is None:
+            return
+        ids = [model.id for model in models]
+        await self._vector_store.upsert(document.bot_id, ids, embeddings)
+        indexed.extend(ids)
+
+    async def _unindex(self, bot_id: Optional[int], chunk_ids: List[int]) -> None:
+        if self._vector_store is None or bot_id is None or not chunk_ids:
+            return
+        try:
+            await self._vector_store.delete(bot_id, chunk_ids)
+        except Exception as e:
+            logger.warning("Failed to remove %d vectors for bot %s: %s", len(chunk_ids), bot_id, e)
+
+    async def _iter_text(self, document: DocumentModel) -> AsyncGenerator[str, None]:
+        if document.file_type == ".pdf":
+            async for page in self._processor.iter_pdf_pages(document.file_path):
+                yield page
+        else:
+            yield await asyncio.to_thread(_read_text_file, document.file_path)
+
+    async def _invalidate_answers(self, bot_id: Optional[int]) -> None:
+        # Cached replies were produced without this document
+        if self._response_cache is None or bot_id is None:
+            return
+        try:
+            await self._response_cache.invalidate_bot(bot_id)
+        except Exception as e:
+            logger.warning("Failed to invalidate cached replies for bot %s: %s", bot_id, e)
+
+    async def _notify(self, user_id: int, message: str) -> None:
+        if not self._notifier:
+            return
+        try:
+            await self._notifier(user_id, message)
+        except Exception as e:
+            logger.warning("Failed to send ingestion event to user %s: %s", user_id, e)
+
+
+def _read_text_file(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
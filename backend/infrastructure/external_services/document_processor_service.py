@@ -2,41 +2,91 @@
 Document Processing Service
 
 Extracts text/content from uploaded documents. Minimal implementation with graceful fallbacks.
+
+PDF parsing is CPU-bound, so it runs in an executor (normally a process pool)
+instead of on the event loop. Large PDFs are split into page ranges that are
+parsed in parallel and yielded back in page order, letting chunking start
+before the whole document has been read. Chunking itself is token-aware
+(see `text_chunker.TokenChunker`).
 """
 
+import asyncio
 import logging
-from typing import Optional
+from collections import deque
+from concurrent.futures import Executor
+from typing import AsyncGenerator, AsyncIterable, Deque, List, Optional
+
+from infrastructure.external_services.text_chunker import TokenChunker
 
 
 logger = logging.getLogger(__name__)
 
 
 class DocumentProcessorService:
-    def __init__(self) -> None:
-        pass
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        pages_per_task: int = 8,
+        max_pending_tasks: int = 4,
+        chunker: Optional[TokenChunker] = None,
+    ) -> None:
+        # executor=None falls back to the loop's default thread pool
+        self._executor = executor
+        self._chunker = chunker or TokenChunker()
+        self._pages_per_task = max(1, pages_per_task)
+        self._max_pending_tasks = max(1, max_pending_tasks)
 
     async def extract_text_from_pdf(self, file_path: str) -> Optional[str]:
         try:
-            try:
-                import PyPDF2  # type: ignore
-            except Exception:
-                logger.warning("PyPDF2 not available; skipping PDF extraction")
-                return None
-
-            text_parts = []
-            with open(file_path, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                for page in reader.pages:
-                    try:
-                        text_parts.append(page.extract_text() or "")
-                    except Exception:
-                        continue
+            text_parts = [page async for page in self.iter_pdf_pages(file_path)]
             return "\n".join(text_parts).strip() or None
+        except ImportError:
+            logger.warning("PyPDF2 not available; skipping PDF extraction")
+            return None
         except Exception as e:
             logger.error("PDF extraction error: %s", e)
             return None
 
+    async def iter_pdf_pages(self, file_path: str) -> AsyncGenerator[str, None]:
+        """
+        Yield the text of each PDF page in order.
+
+        Page ranges of `pages_per_task` pages are submitted to the executor with at
+        most `max_pending_tasks` in flight, so memory stays bounded for huge files.
+
+        Raises:
+            ImportError: If PyPDF2 is not installed
+        """
+        loop = asyncio.get_running_loop()
+        page_count = await loop.run_in_executor(self._executor, _count_pdf_pages, file_path)
+        ranges = iter(
+            (start, min(start + self._pages_per_task, page_count))
+            for start in range(0, page_count, self._pages_per_task)
+        )
+        pending: Deque[asyncio.Future] = deque()
+
+        def submit_next() -> None:
+            page_range = next(ranges, None)
+            if page_range is not None:
+                start, end = page_range
+                pending.append(
+                    loop.run_in_executor(self._executor, _extract_page_range, file_path, start, end)
+                )
+
+        for _ in range(self._max_pending_tasks):
+            submit_next()
+        try:
+            while pending:
+                pages = await pending.popleft()
+                submit_next()
+                for page in pages:
+                    yield page
+        finally:
+            for future in pending:
+                future.cancel()
+
     def chunk_text(self, text: str, max_chars: int = 1200, overlap: int = 150) -> list[str]:
+        """Legacy fixed-size character windows; ingestion uses `chunk_document`."""
         if not text:
             return []
         chunks: list[str] = []
@@ -51,4 +101,33 @@ class DocumentProcessorService:
             start = max(0, end - overlap)
         return chunks
 
+    def chunk_document(self, text: str) -> list[str]:
+        """Split text into token-budgeted chunks cut at paragraph/sentence boundaries."""
+        return self._chunker.chunk(text)
+
+    async def chunk_text_stream(self, parts: AsyncIterable[str]) -> AsyncGenerator[str, None]:
+        """Token-aware chunking of text arriving in parts (e.g. PDF pages), joined with newlines."""
+        async for chunk in self._chunker.chunk_stream(parts):
+            yield chunk
+
+
+def _count_pdf_pages(file_path: str) -> int:
+    import PyPDF2  # type: ignore
+
+    with open(file_path, "rb") as f:
+        return len(PyPDF2.PdfReader(f).pages)
 
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract pages [start, stop); runs in a worker process, so it must stay module-level."""
+    import PyPDF2  # type: ignore
+
+    texts: List[str] = []
+    with open(file_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        for index in range(start, stop):
+            try:
+                texts.append(reader.pages[index].extract_text() or "")
+            except Exception:
+                texts.append("")
+    return texts
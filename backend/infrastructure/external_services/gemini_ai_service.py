@@ -1,45 +1,333 @@
 """
 Infrastructure Implementation - Google Gemini AI Service
 
-Concrete implementation of the `IAIService` interface using Google Gemini.
+Concrete implementation of the `IAIService` interface using the Gemini
+REST API (`generateContent`, `streamGenerateContent` with server-sent
+events, `embedContent`/`batchEmbedContents` and `cachedContents`).
 This module belongs to the Infrastructure layer.
 
-Minimal stub for import success.
+`base_url` points at Google by default; benchmarks point it at the local
+fake server (`benchmarks/fake_gemini_server.py`), which speaks the same
+wire format. HTTP errors are mapped to the `AIServiceError` family: 429
+to `AIQuotaExceededError`, 401/403 to `AIConfigurationError`, other 4xx
+to `AIModelError`.
+
+All calls share one long-lived connection pool, created in `initialize()`
+and closed by `close()`, so chat turns reuse open (TLS) connections
+instead of handshaking each time. HTTP/2 is used when the `h2` package is
+installed (`httpx[http2]`), multiplexing concurrent calls over few
+connections; otherwise the pool falls back to HTTP/1.1 keep-alive.
+`warm()` opens connections ahead of the first request: one over HTTP/2,
+where every concurrent call shares it, or several over HTTP/1.1. `stats()`
+reports pool utilisation when httpcore's pool can be read.
 """
 
-from typing import List, Optional, AsyncGenerator
-from application.interfaces.ai_service import IAIService, ChatRequest, ChatResponse
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from application.interfaces.ai_service import (
+    AIConfigurationError,
+    AIModelError,
+    AIQuotaExceededError,
+    AIServiceError,
+    ChatMessage,
+    ChatRequest,
+    ChatResponse,
+    ContextCacheHandle,
+    IAIService,
+)
+
+try:
+    import h2  # noqa: F401  # needed by httpx for HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com"
+# Texts per batchEmbedContents call accepted by the API
+MAX_EMBED_BATCH = 100
+
+_KNOWN_MODELS = ["gemini-pro", "gemini-1.5-flash", "gemini-1.5-pro", "text-embedding-004"]
+
 
 class GeminiAIService(IAIService):
-    """Stub Gemini AI service."""
-    
-    def __init__(self, api_key: str, model_name: str):
+    """Gemini AI service over HTTP."""
+
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str,
+        base_url: str = DEFAULT_BASE_URL,
+        api_version: str = "v1beta",
+        embedding_model: str = "text-embedding-004",
+        timeout_seconds: float = 60.0,
+        connect_timeout_seconds: float = 5.0,
+        http2: bool = True,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry_seconds: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
         self.api_key = api_key
         self.model_name = model_name
-    
+        self.embedding_model = embedding_model
+        self._base = f"{base_url.rstrip('/')}/{api_version}"
+        self._timeout = httpx.Timeout(timeout_seconds, connect=connect_timeout_seconds)
+        self._http2 = http2 and HTTP2_AVAILABLE
+        if http2 and not HTTP2_AVAILABLE and transport is None:
+            logger.warning("h2 is not installed; the Gemini client uses HTTP/1.1 keep-alive")
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_seconds,
+        )
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._requests = 0
+
     async def initialize(self) -> None:
-        pass
-    
+        self._http()
+
+    async def warm(self, connections: int = 1) -> int:
+        """Open pooled connections ahead of traffic; returns how many calls succeeded.
+
+        Over HTTP/2 concurrent calls multiplex on one connection, so a single
+        connection is opened whatever `connections` says; over HTTP/1.1 each
+        concurrent call opens its own, up to `connections`.
+        """
+        count = 1 if self._http2 else max(1, connections)
+        results = await asyncio.gather(
+            *(self.check_service_health() for _ in range(count)), return_exceptions=True
+        )
+        warmed = sum(1 for ok in results if ok is True)
+        if not warmed:
+            logger.warning("Could not open connections to the Gemini API at startup")
+        return warmed
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "http2": self._http2,
+            "max_connections": self._limits.max_connections,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "requests": self._requests,
+        }
+        # httpx does not expose its pool, so these fields come from httpcore
+        # internals and are left out when those are missing or change shape
+        try:
+            pool = getattr(self._client, "_transport")._pool
+            connections = list(pool.connections)
+            idle = sum(1 for connection in connections if connection.is_idle())
+        except (AttributeError, TypeError):
+            return stats
+        stats["connections"] = len(connections)
+        stats["idle_connections"] = idle
+        busy = len(connections) - idle
+        stats["utilisation"] = round(busy / (self._limits.max_connections or 1), 4)
+        return stats
+
     async def chat_completion(self, request: ChatRequest) -> ChatResponse:
-        return ChatResponse(content="AI response", model=self.model_name)
-    
+        model = request.model or self.model_name
+        body = self._generate_body(request, model)
+        data = await self._post(f"models/{model}:generateContent", body)
+        text, finish_reason = _candidate_text(data)
+        usage = data.get("usageMetadata") or {}
+        return ChatResponse(
+            content=text,
+            model=model,
+            usage={
+                "prompt_tokens": usage.get("promptTokenCount", 0),
+                "completion_tokens": usage.get("candidatesTokenCount", 0),
+                "cached_tokens": usage.get("cachedContentTokenCount", 0),
+                "total_tokens": usage.get("totalTokenCount", 0),
+            },
+            finish_reason=finish_reason,
+        )
+
     async def chat_completion_stream(self, request: ChatRequest) -> AsyncGenerator[str, None]:
-        yield "AI"
-        yield " response"
-    
+        model = request.model or self.model_name
+        try:
+            async with self._tracked(), self._http().stream(
+                "POST",
+                f"models/{model}:streamGenerateContent",
+                params={"alt": "sse"},
+                json=self._generate_body(request, model),
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    _raise_for_status(response)
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    text, _ = _candidate_text(json.loads(line[5:]))
+                    if text:
+                        yield text
+        except httpx.TimeoutException as e:
+            raise AIServiceError(f"Gemini stream timed out: {e}", original_error=e)
+        except httpx.HTTPError as e:
+            raise AIServiceError(f"Gemini stream failed: {e}", original_error=e)
+
+    async def cache_context(
+        self, model: str, messages: List[ChatMessage], ttl_seconds: float
+    ) -> Optional[ContextCacheHandle]:
+        system, contents = _to_contents(messages)
+        body: Dict[str, Any] = {"model": f"models/{model}", "ttl": f"{int(ttl_seconds)}s"}
+        if system:
+            body["systemInstruction"] = {"parts": [{"text": system}]}
+        if contents:
+            body["contents"] = contents
+        requested_at = time.time()
+        data = await self._post("cachedContents", body)
+        return ContextCacheHandle(
+            name=data["name"],
+            model=model,
+            message_count=len(messages),
+            tokens=(data.get("usageMetadata") or {}).get("totalTokenCount", 0),
+            expires_at=requested_at + ttl_seconds,
+        )
+
     async def embed_text(self, text: str, model: Optional[str] = None) -> List[float]:
-        return [0.1, 0.2, 0.3]
-    
+        model = model or self.embedding_model
+        body = {"content": {"parts": [{"text": text}]}}
+        data = await self._post(f"models/{model}:embedContent", body)
+        return list(data["embedding"]["values"])
+
     async def embed_texts(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
-        return [[0.1, 0.2, 0.3] for _ in texts]
-    
+        model = model or self.embedding_model
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), MAX_EMBED_BATCH):
+            body = {
+                "requests": [
+                    {"model": f"models/{model}", "content": {"parts": [{"text": text}]}}
+                    for text in texts[start:start + MAX_EMBED_BATCH]
+                ]
+            }
+            data = await self._post(f"models/{model}:batchEmbedContents", body)
+            vectors.extend(embedding["values"] for embedding in data["embeddings"])
+        return vectors
+
     def get_available_models(self) -> List[str]:
-        return ["gemini-pro"]
-    
+        return list(_KNOWN_MODELS)
+
     def validate_model(self, model_name: str) -> bool:
-        return True
-    
+        return model_name in _KNOWN_MODELS or model_name.startswith("gemini-")
+
     async def check_service_health(self) -> bool:
-        return True
+        try:
+            async with self._tracked():
+                response = await self._http().get(f"models/{self.model_name}")
+        except httpx.HTTPError as e:
+            logger.warning("Gemini health check failed: %s", e)
+            return False
+        return response.status_code == 200
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=f"{self._base}/",
+                headers={"x-goog-api-key": self.api_key},
+                timeout=self._timeout,
+                limits=self._limits,
+                http2=self._http2,
+                transport=self._transport,
+            )
+        return self._client
+
+    @asynccontextmanager
+    async def _tracked(self) -> AsyncIterator[None]:
+        self._requests += 1
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+
+    async def _post(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            async with self._tracked():
+                response = await self._http().post(path, json=body)
+        except httpx.TimeoutException as e:
+            raise AIServiceError(f"Gemini request timed out: {e}", original_error=e)
+        except httpx.HTTPError as e:
+            raise AIServiceError(f"Gemini request failed: {e}", original_error=e)
+        _raise_for_status(response)
+        data: Dict[str, Any] = response.json()
+        return data
+
+    def _generate_body(self, request: ChatRequest, model: str) -> Dict[str, Any]:
+        messages = request.messages
+        body: Dict[str, Any] = {}
+        handle = request.context_cache
+        cached = False
+        if handle is not None and handle.model == model and handle.expires_at > time.time():
+            cached = True
+            body["cachedContent"] = handle.name
+            messages = messages[handle.message_count:]
+        system, contents = _to_contents(messages)
+        if system and cached:
+            # A request using cached content cannot also set a system instruction
+            contents.insert(0, {"role": "user", "parts": [{"text": system}]})
+        elif system:
+            body["systemInstruction"] = {"parts": [{"text": system}]}
+        body["contents"] = contents
+        config: Dict[str, Any] = {}
+        if request.temperature is not None:
+            config["temperature"] = request.temperature
+        if request.max_tokens:
+            config["maxOutputTokens"] = request.max_tokens
+        if config:
+            body["generationConfig"] = config
+        return body
+
+
+def _to_contents(messages: List[ChatMessage]) -> Tuple[str, List[Dict[str, Any]]]:
+    """System instruction text and the remaining turns in Gemini's format."""
+    system = "\n\n".join(m.content for m in messages if m.role == "system")
+    contents = [
+        {"role": "model" if m.role == "assistant" else "user", "parts": [{"text": m.content}]}
+        for m in messages
+        if m.role != "system"
+    ]
+    return system, contents
+
+
+def _candidate_text(data: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    candidates = data.get("candidates") or []
+    if not candidates:
+        return "", None
+    parts = (candidates[0].get("content") or {}).get("parts") or []
+    return "".join(part.get("text", "") for part in parts), candidates[0].get("finishReason")
 
 
+def _raise_for_status(response: httpx.Response) -> None:
+    if response.status_code < 400:
+        return
+    try:
+        message = response.json()["error"]["message"]
+    except Exception:
+        message = response.text[:200]
+    detail = f"Gemini returned {response.status_code}: {message}"
+    if response.status_code == 429:
+        raise AIQuotaExceededError(detail)
+    if response.status_code in (401, 403):
+        raise AIConfigurationError(detail)
+    if response.status_code < 500:
+        raise AIModelError(detail)
+    raise AIServiceError(detail)
@@ -0,0 +1,165 @@
+"""
+Hybrid Retrieval Service
+
+Implements `IKnowledgeRetrievalService` by combining embedding search in the
+bot's vector store with BM25 keyword search, fused with reciprocal rank fusion.
+Keyword search catches exact product names and error codes that embeddings
+tend to blur.
+
+Each bot's `Bm25Index` lives in process and is kept current incrementally:
+before searching, the service compares the bot's processed documents (id and
+`updated_at`) with what the index holds, indexes the chunks of new documents
+and drops those of removed or re-ingested ones. Only documents that changed
+are touched, so the index is never rebuilt, and every worker process catches
+up with ingestion done by the others.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from application.interfaces.ai_service import IAIService
+from application.interfaces.knowledge_retrieval import IKnowledgeRetrievalService, RetrievedChunk
+from application.interfaces.vector_store import IVectorStore
+from infrastructure.external_services.bm25_index import Bm25Index
+from infrastructure.repositories.sqlalchemy_document_chunk_repository import (
+    SqlAlchemyDocumentChunkRepository,
+)
+from infrastructure.repositories.sqlalchemy_document_repository import SqlAlchemyDocumentRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _KeywordState:
+    index: Bm25Index = field(default_factory=Bm25Index)
+    # document id -> (updated_at when indexed, chunk ids)
+    documents: Dict[int, Tuple[Optional[datetime], List[int]]] = field(default_factory=dict)
+    synced_at: float = float("-inf")
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[int]], k: int = 60
+) -> List[Tuple[int, float]]:
+    """Fuse rankings of ids: each id scores sum(1 / (k + rank)) over the rankings it appears in."""
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridRetrievalService(IKnowledgeRetrievalService):
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        ai_service: IAIService,
+        vector_store: IVectorStore,
+        candidate_multiplier: int = 4,
+        rrf_k: int = 60,
+        sync_interval_seconds: float = 5.0,
+    ) -> None:
+        self._session_maker = session_maker
+        self._ai_service = ai_service
+        self._vector_store = vector_store
+        self._candidate_multiplier = max(1, candidate_multiplier)
+        self._rrf_k = rrf_k
+        self._sync_interval = sync_interval_seconds
+        self._keyword: Dict[int, _KeywordState] = {}
+
+    async def retrieve(self, bot_id: int, query: str, top_k: int = 5) -> List[RetrievedChunk]:
+        if not query.strip() or top_k <= 0:
+            return []
+        candidates = top_k * self._candidate_multiplier
+        vector_ids, keyword_ids = await asyncio.gather(
+            self._vector_search(bot_id, query, candidates),
+            self._keyword_search(bot_id, query, candidates),
+        )
+        fused = reciprocal_rank_fusion([vector_ids, keyword_ids], k=self._rrf_k)
+        if not fused:
+            return []
+
+        async with self._session_maker() as session:
+            chunks = await SqlAlchemyDocumentChunkRepository(session).get_many(
+                [chunk_id for chunk_id, _ in fused]
+            )
+        by_id = {chunk.id: chunk for chunk in chunks}
+        vector_ranks = {chunk_id: rank for rank, chunk_id in enumerate(vector_ids, start=1)}
+        keyword_ranks = {chunk_id: rank for rank, chunk_id in enumerate(keyword_ids, start=1)}
+
+        results: List[RetrievedChunk] = []
+        for chunk_id, score in fused:
+            chunk = by_id.get(chunk_id)
+            if chunk is None:
+                continue  # deleted since it was indexed
+            results.append(
+                RetrievedChunk(
+                    chunk_id=chunk_id,
+                    document_id=chunk.document_id,
+                    content=chunk.content,
+                    score=score,
+                    vector_rank=vector_ranks.get(chunk_id),
+                    keyword_rank=keyword_ranks.get(chunk_id),
+                )
+            )
+            if len(results) >= top_k:
+                break
+        return results
+
+    async def _vector_search(self, bot_id: int, query: str, limit: int) -> List[int]:
+        try:
+            embedding = await self._ai_service.embed_text(query)
+            return [match.id for match in await self._vector_store.search(bot_id, embedding, limit)]
+        except Exception as e:
+            # Keyword results alone still answer the query
+            logger.warning("Vector search for bot %s failed: %s", bot_id, e)
+            return []
+
+    async def _keyword_search(self, bot_id: int, query: str, limit: int) -> List[int]:
+        state = self._keyword.setdefault(bot_id, _KeywordState())
+        await self._sync(bot_id, state)
+        async with state.lock:
+            return [chunk_id for chunk_id, _ in state.index.search(query, limit)]
+
+    async def _sync(self, bot_id: int, state: _KeywordState) -> None:
+        """Bring the keyword index in line with the bot's processed documents."""
+        if time.monotonic() - state.synced_at < self._sync_interval:
+            return
+        async with state.lock:
+            if time.monotonic() - state.synced_at < self._sync_interval:
+                return
+            async with self._session_maker() as session:
+                documents = await SqlAlchemyDocumentRepository(session).list_by_bot(
+                    bot_id, status="processed"
+                )
+                current = {document.id: document.updated_at for document in documents}
+                stale = [
+                    doc_id
+                    for doc_id, (version, _) in state.documents.items()
+                    if doc_id not in current or current[doc_id] != version
+                ]
+                for doc_id in stale:
+                    state.index.remove(state.documents.pop(doc_id)[1])
+                added = [doc_id for doc_id in current if doc_id not in state.documents]
+                chunks = await SqlAlchemyDocumentChunkRepository(session).list_by_documents(added)
+
+            chunk_ids: Dict[int, List[int]] = {doc_id: [] for doc_id in added}
+            for chunk in chunks:
+                chunk_ids[chunk.document_id].append(chunk.id)
+            if chunks:
+                await asyncio.to_thread(
+                    state.index.add, [c.id for c in chunks], [c.content for c in chunks]
+                )
+            for doc_id in added:
+                state.documents[doc_id] = (current[doc_id], chunk_ids[doc_id])
+            state.synced_at = time.monotonic()
+            if stale or added:
+                logger.debug(
+                    "Keyword index for bot %s: +%d/-%d documents", bot_id, len(added), len(stale)
+                )
@@ -0,0 +1,284 @@
+"""
+Local Vector Store
+
+In-process implementation of `IVectorStore` with one index per bot.
+
+Each index is an append-only float32 matrix of unit-normalised vectors plus a
+chunk id column, so cosine similarity is a single matrix-vector product over
+the live rows and top-k selection uses `argpartition`. Replaced and deleted
+rows are masked out and reclaimed by compaction once they outnumber live ones.
+
+Bots with many vectors additionally get an IVF layer: spherical k-means
+centroids partition the rows into lists, and a search only scores the rows
+in the `nprobe` lists closest to the query (plus rows appended since the lists
+were last rebuilt). Rows are kept sorted by list, so each probe is a matrix
+product over a contiguous slice rather than a gather.
+
+Searches take a snapshot of the arrays under a short lock and run the NumPy
+work in a thread, so they never block the event loop or each other.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from application.interfaces.vector_store import IVectorStore, VectorMatch
+from infrastructure.external_services.vector_math import (
+    VectorRows,
+    nearest_centroid,
+    normalize,
+    spherical_kmeans,
+    top_k_indices,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BotVectorIndex:
+    def __init__(
+        self,
+        dimension: int,
+        ann_min_vectors: int = 50_000,
+        nlist: int = 0,
+        nprobe: int = 16,
+        initial_capacity: int = 1024,
+    ) -> None:
+        self.dimension = dimension
+        self._ann_min_vectors = ann_min_vectors
+        self._nlist = nlist
+        self._nprobe = max(1, nprobe)
+        capacity = max(1, initial_capacity)
+        self._vectors = np.empty((capacity, dimension), dtype=np.float32)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._size = 0
+        self._dead = 0
+        self._rows: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        # Incremented whenever row numbers change (see `_rewrite`)
+        self._generation = 0
+
+        # IVF state; list i holds rows offsets[i]:offsets[i + 1], and rows from `_listed_rows`
+        # on are unsorted
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.empty(capacity, dtype=np.int32)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._listed_rows = 0
+        self._trained_count = 0
+        self._training = False
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def is_approximate(self) -> bool:
+        return self._centroids is not None
+
+    def upsert(self, ids: Sequence[int], vectors: VectorRows) -> None:
+        ids_arr = np.asarray(ids, dtype=np.int64).reshape(-1)
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape != (len(ids_arr), self.dimension):
+            raise ValueError(
+                f"Expected {len(ids_arr)} vectors of dimension {self.dimension},"
+                f" got shape {matrix.shape}"
+            )
+        if not len(ids_arr):
+            return
+        matrix = normalize(matrix)
+
+        with self._lock:
+            start = self._size
+            end = start + len(ids_arr)
+            self._reserve(end)
+            self._vectors[start:end] = matrix
+            self._ids[start:end] = ids_arr
+            self._alive[start:end] = True
+            for row, vector_id in enumerate(ids_arr.tolist(), start):
+                old = self._rows.get(vector_id)
+                if old is not None:
+                    self._alive[old] = False
+                    self._dead += 1
+                self._rows[vector_id] = row
+            self._size = end
+            if self._centroids is not None:
+                self._assign[start:end] = nearest_centroid(matrix, self._centroids)
+            unlisted = self._size - self._listed_rows
+            if self._dead > max(1024, len(self._rows)) or (
+                self._centroids is not None and unlisted > max(1024, self._listed_rows // 16)
+            ):
+                self._rewrite()
+            train = self._needs_training()
+            if train:
+                self._training = True
+
+        if train:
+            self._train()
+
+    def delete(self, ids: Sequence[int]) -> None:
+        with self._lock:
+            for vector_id in ids:
+                row = self._rows.pop(int(vector_id), None)
+                if row is not None:
+                    self._alive[row] = False
+                    self._dead += 1
+            if self._dead > max(1024, len(self._rows)):
+                self._rewrite()
+
+    def search(self, query: Sequence[float], top_k: int) -> List[Tuple[int, float]]:
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        if q.shape[0] != self.dimension:
+            raise ValueError(f"Expected query of dimension {self.dimension}, got {q.shape[0]}")
+        q = normalize(q.reshape(1, -1))[0]
+
+        # Rows below `size` are never rewritten in place, so views stay valid without the lock
+        with self._lock:
+            size = self._size
+            vectors = self._vectors[:size]
+            ids = self._ids[:size]
+            alive = self._alive[:size].copy()
+            centroids = self._centroids
+            offsets = self._offsets
+            listed = self._listed_rows
+        if size == 0 or top_k <= 0:
+            return []
+
+        if centroids is not None and self._nprobe < len(centroids):
+            probe = top_k_indices(centroids @ q, self._nprobe)
+            ranges = [(offsets[i], offsets[i + 1]) for i in probe] + [(listed, size)]
+            rows = np.concatenate([np.arange(start, end) for start, end in ranges])
+            scores = np.concatenate([vectors[start:end] @ q for start, end in ranges])
+            scores[~alive[rows]] = -np.inf
+        else:
+            rows = None
+            scores = vectors @ q
+            scores[~alive] = -np.inf
+
+        top = top_k_indices(scores, top_k)
+        top = top[np.isfinite(scores[top])]
+        hit_rows = top if rows is None else rows[top]
+        return list(zip(ids[hit_rows].tolist(), scores[top].tolist()))
+
+    def _reserve(self, needed: int) -> None:
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        self._vectors = _grow(self._vectors, capacity, self._size)
+        self._ids = _grow(self._ids, capacity, self._size)
+        self._alive = _grow(self._alive, capacity, self._size, fill=False)
+        self._assign = _grow(self._assign, capacity, self._size)
+
+    def _rewrite(self) -> None:
+        """Copy live rows into fresh arrays, dropping dead rows and sorting by IVF list."""
+        keep = np.flatnonzero(self._alive[: self._size])
+        if self._centroids is not None:
+            keep = keep[np.argsort(self._assign[keep], kind="stable")]
+        capacity = max(1024, len(keep) + len(keep) // 4)
+        vectors = np.empty((capacity, self.dimension), dtype=np.float32)
+        vectors[: len(keep)] = self._vectors[keep]
+        ids = np.empty(capacity, dtype=np.int64)
+        ids[: len(keep)] = self._ids[keep]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[: len(keep)] = True
+        assign = np.empty(capacity, dtype=np.int32)
+        assign[: len(keep)] = self._assign[keep]
+
+        self._vectors, self._ids, self._alive, self._assign = vectors, ids, alive, assign
+        self._size = len(keep)
+        self._dead = 0
+        self._rows = dict(zip(ids[: self._size].tolist(), range(self._size)))
+        self._generation += 1
+        if self._centroids is not None:
+            counts = np.bincount(assign[: self._size], minlength=len(self._centroids))
+            self._offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+            self._offsets[1:] = np.cumsum(counts)
+            self._listed_rows = self._size
+
+    def _needs_training(self) -> bool:
+        live = len(self._rows)
+        if self._training or live < self._ann_min_vectors:
+            return False
+        return self._centroids is None or live >= 2 * self._trained_count
+
+    def _train(self) -> None:
+        """Fit IVF centroids outside the lock, then install them for the rows seen meanwhile."""
+        try:
+            with self._lock:
+                size = self._size
+                generation = self._generation
+                vectors = self._vectors[:size]
+                live_rows = np.flatnonzero(self._alive[:size])
+            nlist = self._nlist or int(np.sqrt(len(live_rows)))
+            nlist = max(1, min(nlist, len(live_rows)))
+            centroids = spherical_kmeans(vectors[live_rows], nlist)
+            assign = nearest_centroid(vectors, centroids)
+
+            with self._lock:
+                if generation != self._generation:
+                    return  # rows were renumbered; the next upsert retrains
+                self._centroids = centroids
+                self._assign[:size] = assign
+                if self._size > size:
+                    self._assign[size : self._size] = nearest_centroid(
+                        self._vectors[size : self._size], centroids
+                    )
+                self._rewrite()
+                self._trained_count = len(self._rows)
+            logger.info("Trained IVF index with %d lists over %d vectors", nlist, len(live_rows))
+        finally:
+            self._training = False
+
+
+class LocalVectorStore(IVectorStore):
+    def __init__(
+        self, ann_min_vectors: int = 50_000, ann_nlist: int = 0, ann_nprobe: int = 16
+    ) -> None:
+        self._ann_min_vectors = ann_min_vectors
+        self._ann_nlist = ann_nlist
+        self._ann_nprobe = ann_nprobe
+        self._indexes: Dict[int, BotVectorIndex] = {}
+
+    async def upsert(
+        self, bot_id: int, ids: Sequence[int], vectors: Sequence[Sequence[float]]
+    ) -> None:
+        if not len(ids):
+            return
+        index = self._indexes.get(bot_id)
+        if index is None:
+            index = BotVectorIndex(
+                dimension=len(vectors[0]),
+                ann_min_vectors=self._ann_min_vectors,
+                nlist=self._ann_nlist,
+                nprobe=self._ann_nprobe,
+            )
+            self._indexes[bot_id] = index
+        await asyncio.to_thread(index.upsert, ids, vectors)
+
+    async def search(
+        self, bot_id: int, vector: Sequence[float], top_k: int = 5
+    ) -> List[VectorMatch]:
+        index = self._indexes.get(bot_id)
+        if index is None:
+            return []
+        hits = await asyncio.to_thread(index.search, vector, top_k)
+        return [VectorMatch(id=vector_id, score=score) for vector_id, score in hits]
+
+    async def delete(self, bot_id: int, ids: Sequence[int]) -> None:
+        index = self._indexes.get(bot_id)
+        if index is not None and len(ids):
+            await asyncio.to_thread(index.delete, ids)
+
+    async def count(self, bot_id: int) -> int:
+        index = self._indexes.get(bot_id)
+        return len(index) if index is not None else 0
+
+
+def _grow(array: np.ndarray, capacity: int, used: int, fill: Optional[bool] = None) -> np.ndarray:
+    grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    if fill is not None:
+        grown[used:] = fill
+    grown[:used] = array[:used]
+    return grown
@@ -0,0 +1,238 @@
+"""
+Model Routing AI Service
+
+`IAIService` decorator that sends each chat request to the requested model
+(the bot's `model_name`, or the default) and falls back along a declared
+chain of other models.
+
+- Fallback: when an attempt fails, the next model of the chain is tried.
+- Hedging: when an attempt has not answered within its model's latency
+  budget, the next model is started alongside it. Whichever answers first
+  wins and the other call is cancelled. At most `max_parallel` attempts
+  run at once.
+
+For streams "answered" means the first chunk arrived; once a stream has
+produced a chunk it is the winner and later failures reach the caller,
+since a reply cannot be spliced from two models.
+
+Chains come from `fallback_chains` (model -> fallback models); the `"*"`
+entry applies to models without their own chain. Models rejected by
+`validate_model` are skipped. Per-model p50/p95 latency of completed
+attempts (to the first chunk for streams) and hedge/fallback counters are
+available from `stats()`. Embedding calls are delegated unchanged.
+"""
+
+import asyncio
+import dataclasses
+import logging
+import time
+from collections import deque
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from application.interfaces.ai_service import AIServiceError, ChatRequest, ChatResponse, IAIService
+from infrastructure.external_services.delegating_ai_service import DelegatingAIService
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _ModelStats:
+    def __init__(self) -> None:
+        # Recent latency samples in milliseconds
+        self.latencies_ms: Deque[float] = deque(maxlen=500)
+        self.attempts = 0
+        self.failures = 0
+        self.wins = 0
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies_ms:
+            return None
+        ordered = sorted(self.latencies_ms)
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+
+class ModelRoutingAIService(DelegatingAIService):
+    def __init__(
+        self,
+        inner: IAIService,
+        default_model: str,
+        fallback_chains: Optional[Mapping[str, Sequence[str]]] = None,
+        hedge_after_ms: float = 0.0,
+        latency_budgets_ms: Optional[Mapping[str, float]] = None,
+        max_parallel: int = 2,
+    ) -> None:
+        super().__init__(inner)
+        self._default_model = default_model
+        self._chains = {model: list(chain) for model, chain in (fallback_chains or {}).items()}
+        # 0 disables hedging; failed attempts still fall back
+        self._hedge_after_ms = hedge_after_ms
+        self._budgets_ms = dict(latency_budgets_ms or {})
+        self._max_parallel = max(1, max_parallel)
+        self._models: Dict[str, _ModelStats] = {}
+        self._hedges = 0
+        self._fallbacks = 0
+
+    def candidates(self, model: Optional[str]) -> List[str]:
+        """The requested model followed by its fallback chain."""
+        primary = model or self._default_model
+        chain = self._chains.get(primary, self._chains.get("*", []))
+        models: List[str] = []
+        for candidate in [primary, *chain]:
+            if candidate not in models and (
+                candidate == primary or self._inner.validate_model(candidate)
+            ):
+                models.append(candidate)
+        return models
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hedges": self._hedges,
+            "fallbacks": self._fallbacks,
+            "models": {
+                model: {
+                    "p50_ms": stats.percentile(0.5),
+                    "p95_ms": stats.percentile(0.95),
+                    "attempts": stats.attempts,
+                    "failures": stats.failures,
+                    "wins": stats.wins,
+                }
+                for model, stats in self._models.items()
+            },
+        }
+
+    async def chat_completion(self, request: ChatRequest) -> ChatResponse:
+        _, response = await self._route(
+            self.candidates(request.model),
+            lambda model: self._inner.chat_completion(dataclasses.replace(request, model=model)),
+        )
+        return response
+
+    async def chat_completion_stream(self, request: ChatRequest) -> AsyncGenerator[str, None]:
+        async def first_chunk(model: str) -> Tuple[AsyncGenerator[str, None], Optional[str]]:
+            stream = self._inner.chat_completion_stream(dataclasses.replace(request, model=model))
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                await stream.aclose()
+                return stream, None
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        _, (stream, chunk) = await self._route(
+            self.candidates(request.model), first_chunk, discard=lambda result: result[0].aclose()
+        )
+        if chunk is None:
+            return
+        try:
+            yield chunk
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    async def _route(
+        self,
+        models: List[str],
+        attempt: Callable[[str], Awaitable[T]],
+        discard: Optional[Callable[[T], Awaitable[Any]]] = None,
+    ) -> Tuple[str, T]:
+        """Run attempts along the chain; returns the first successful (model, result)."""
+        remaining = list(models)
+        running: Dict["asyncio.Task[T]", str] = {}
+        last_launch = 0.0
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            nonlocal last_launch
+            model = remaining.pop(0)
+            running[asyncio.ensure_future(self._timed(model, attempt(model)))] = model
+            last_launch = time.monotonic()
+
+        launch()
+        try:
+            while running:
+                timeout = None
+                newest = list(running.values())[-1]
+                budget_ms = self._budgets_ms.get(newest, self._hedge_after_ms)
+                if remaining and len(running) < self._max_parallel and budget_ms > 0:
+                    timeout = max(0.0, last_launch + budget_ms / 1000 - time.monotonic())
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self._hedges += 1
+                    logger.info(
+                        "Model %s exceeded its %.0f ms budget, hedging with %s",
+                        newest,
+                        budget_ms,
+                        remaining[0],
+                    )
+                    launch()
+                    continue
+                for task in done:
+                    model = running.pop(task)
+                    if task.exception() is None:
+                        self._stats(model).wins += 1
+                        return model, task.result()
+                    last_error = task.exception()
+                    logger.warning("Model %s failed: %s", model, last_error)
+                if not running and remaining:
+                    self._fallbacks += 1
+                    launch()
+        finally:
+            await self._cancel(running, discard)
+        if isinstance(last_error, AIServiceError):
+            raise last_error
+        error = last_error if isinstance(last_error, Exception) else None
+        raise AIServiceError(f"All models failed: {', '.join(models)}", original_error=error)
+
+    async def _timed(self, model: str, call: Awaitable[T]) -> T:
+        stats = self._stats(model)
+        stats.attempts += 1
+        started = time.monotonic()
+        try:
+            result = await call
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            stats.failures += 1
+            raise
+        stats.latencies_ms.append((time.monotonic() - started) * 1000)
+        return result
+
+    async def _cancel(
+        self,
+        running: Dict["asyncio.Task[T]", str],
+        discard: Optional[Callable[[T], Awaitable[Any]]],
+    ) -> None:
+        """Cancel losing attempts; results that arrived anyway are discarded."""
+        for task in running:
+            task.cancel()
+        for task in running:
+            try:
+                result = await task
+            except BaseException:
+                continue
+            if discard is not None:
+                await discard(result)
+
+    def _stats(self, model: str) -> _ModelStats:
+        stats = self._models.get(model)
+        if stats is None:
+            stats = self._models[model] = _ModelStats()
+        return stats
@@ -0,0 +1,162 @@
+"""
+Prompt Prefix Cache
+
+Prepares the static start of a bot's chat prompt, its system prompt, once
+instead of on every turn.
+
+`prefix(bot)` canonicalizes the system prompt (line endings, trailing
+whitespace, runs of blank lines) and keeps the rendered text with its
+token count. Entries are keyed by bot and prompt hash, so an edited prompt
+is picked up without invalidation; the least recently used entries are
+evicted past `max_entries`.
+
+With `provider_cache` on, `handle(prefix, model)` registers the prefix
+with the AI service's context cache once per (prefix, model) and returns
+the handle to send with each turn. Concurrent turns share one
+registration and handles are renewed shortly before they expire.
+Prefixes under `min_provider_cache_tokens` are not registered (providers
+reject or do not discount them). Models whose service does not support
+context caching, or whose registration failed, are sent the full prompt;
+a failed registration is retried after `retry_after_seconds`.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+from application.interfaces.ai_service import ChatMessage, ContextCacheHandle, IAIService
+from infrastructure.database.models.bot import BotModel
+from infrastructure.external_services.text_chunker import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+@dataclass(frozen=True)
+class PromptPrefix:
+    key: str
+    text: str
+    tokens: int
+
+    @property
+    def message(self) -> ChatMessage:
+        return ChatMessage(role="system", content=self.text)
+
+
+class PromptPrefixCache:
+    def __init__(
+        self,
+        ai_service: IAIService,
+        counter: Optional[TokenCounter] = None,
+        max_entries: int = 1024,
+        provider_cache: bool = True,
+        provider_cache_ttl_seconds: float = 3600.0,
+        min_provider_cache_tokens: int = 1024,
+        retry_after_seconds: float = 60.0,
+    ) -> None:
+        self._ai_service = ai_service
+        self._counter = counter or TokenCounter(encoding_name=None)
+        self._max_entries = max(1, max_entries)
+        self._provider_cache = provider_cache
+        self._ttl = provider_cache_ttl_seconds
+        self._min_tokens = min_provider_cache_tokens
+        self._retry_after = retry_after_seconds
+        self._prefixes: "OrderedDict[Tuple[int, str], PromptPrefix]" = OrderedDict()
+        self._handles: Dict[Tuple[str, str], ContextCacheHandle] = {}
+        self._registering: Dict[
+            Tuple[str, str], "asyncio.Future[Optional[ContextCacheHandle]]"
+        ] = {}
+        self._failed_at: Dict[Tuple[str, str], float] = {}
+        self._unsupported: Set[str] = set()
+        self._hits = 0
+        self._misses = 0
+        self._registrations = 0
+
+    def prefix(self, bot: BotModel) -> Optional[PromptPrefix]:
+        """The bot's canonical system prompt with its token count, or None without one."""
+        if not bot.system_prompt:
+            return None
+        raw_hash = hashlib.sha256(bot.system_prompt.encode("utf-8")).hexdigest()
+        entry = self._prefixes.get((bot.id, raw_hash))
+        if entry is not None:
+            self._prefixes.move_to_end((bot.id, raw_hash))
+            self._hits += 1
+            return entry
+        self._misses += 1
+        text = canonicalize(bot.system_prompt)
+        if not text:
+            return None
+        entry = PromptPrefix(
+            key=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            text=text,
+            tokens=self._counter.count(text),
+        )
+        self._prefixes[(bot.id, raw_hash)] = entry
+        while len(self._prefixes) > self._max_entries:
+            self._prefixes.popitem(last=False)
+        return entry
+
+    async def handle(self, prefix: PromptPrefix, model: str) -> Optional[ContextCacheHandle]:
+        """A provider cache handle for the prefix, registering it if needed."""
+        if (
+            not self._provider_cache
+            or prefix.tokens < self._min_tokens
+            or model in self._unsupported
+        ):
+            return None
+        key = (prefix.key, model)
+        handle = self._handles.get(key)
+        # Renewed a little before the provider drops it, so turns in flight can still use it
+        if handle is not None and handle.expires_at - time.time() > min(60.0, self._ttl / 10):
+            return handle
+        if time.monotonic() - self._failed_at.get(key, float("-inf")) < self._retry_after:
+            return None
+        registering = self._registering.get(key)
+        if registering is None:
+            registering = asyncio.ensure_future(self._register(key, prefix, model))
+            self._registering[key] = registering
+            registering.add_done_callback(lambda _: self._registering.pop(key, None))
+        return await asyncio.shield(registering)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "prefixes": len(self._prefixes),
+            "hits": self._hits,
+            "misses": self._misses,
+            "provider_handles": len(self._handles),
+            "registrations": self._registrations,
+        }
+
+    async def _register(
+        self, key: Tuple[str, str], prefix: PromptPrefix, model: str
+    ) -> Optional[ContextCacheHandle]:
+        try:
+            handle = await self._ai_service.cache_context(model, [prefix.message], self._ttl)
+        except Exception as e:
+            logger.warning(
+                "Registering a prompt prefix with the %s context cache failed: %s", model, e
+            )
+            self._failed_at[key] = time.monotonic()
+            return None
+        if handle is None:
+            self._unsupported.add(model)
+            return None
+        self._registrations += 1
+        now = time.time()
+        for stale in [k for k, h in self._handles.items() if h.expires_at <= now]:
+            del self._handles[stale]
+        self._handles[key] = handle
+        self._failed_at.pop(key, None)
+        return handle
+
+
+def canonicalize(text: str) -> str:
+    """Same prompt, same bytes: normalized line endings, no trailing spaces or extra blank lines."""
+    lines = [line.rstrip() for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
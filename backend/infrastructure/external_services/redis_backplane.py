@@ -0,0 +1,86 @@
+"""
+Redis Backplane
+
+Relays realtime notifications between workers over one Redis pub/sub
+channel. Each instance tags what it publishes with a random origin id and
+ignores its own messages, since the publishing worker has already delivered
+them to its local sockets.
+
+The subscriber reconnects with backoff if the connection drops; messages
+published while it is disconnected are lost, as with any Redis pub/sub.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Optional
+
+import redis.asyncio as redis
+
+from application.interfaces.message_backplane import BackplaneHandler, IMessageBackplane
+
+logger = logging.getLogger(__name__)
+
+
+class RedisBackplane(IMessageBackplane):
+    def __init__(self, url: str, channel: str = "chatsphere:ws") -> None:
+        self._redis = redis.from_url(url)
+        self._channel = channel
+        self._origin = uuid.uuid4().hex
+        self._handler: Optional[BackplaneHandler] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, handler: BackplaneHandler) -> None:
+        self._handler = handler
+        subscribed = asyncio.get_running_loop().create_future()
+        self._listener = asyncio.create_task(self._listen(subscribed))
+        # Do not report started before the subscription exists
+        await subscribed
+
+    async def publish(self, user_id: Optional[int], message: str) -> None:
+        payload = json.dumps({"origin": self._origin, "user_id": user_id, "message": message})
+        await self._redis.publish(self._channel, payload)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        await self._redis.aclose()
+
+    async def _listen(self, subscribed: "asyncio.Future[None]") -> None:
+        delay = 0.5
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self._channel)
+                if not subscribed.done():
+                    subscribed.set_result(None)
+                delay = 0.5
+                async for item in pubsub.listen():
+                    if item.get("type") == "message":
+                        await self._dispatch(item["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not subscribed.done():
+                    subscribed.set_exception(e)
+                    return
+                logger.warning("Redis backplane disconnected, retrying in %.1fs: %s", delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                await pubsub.aclose()
+
+    async def _dispatch(self, raw: Any) -> None:
+        try:
+            payload = json.loads(raw)
+        except (TypeError, ValueError):
+            logger.warning("Ignoring malformed backplane message")
+            return
+        if payload.get("origin") == self._origin or self._handler is None:
+            return
+        try:
+            await self._handler(payload.get("user_id"), payload.get("message", ""))
+        except Exception as e:
+            logger.error("Backplane handler failed: %s", e)
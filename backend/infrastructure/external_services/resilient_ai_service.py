@@ -0,0 +1,345 @@
+"""
+Resilient AI Service
+
+`IAIService` decorator that bounds and isolates upstream calls per model.
+Embedding calls without an explicit model are guarded under the embedding
+model, not the chat model.
+
+Adaptive concurrency (AIMD): each model has a concurrency limit that grows
+by about one slot per round of successful calls and is cut by
+`backoff_ratio` when a call fails or is slower than `slow_call_seconds`.
+Calls beyond the limit wait in line for up to `queue_timeout_seconds` and
+then fail, so a slow provider cannot pile up an unbounded number of
+waiting requests in the worker. Only one decrease is applied per round of
+calls: calls that started before the previous decrease do not cut the
+limit again.
+
+Circuit breaker: each model keeps the outcomes of its last `window_size`
+calls. Once at least `min_calls` are recorded and the failure rate reaches
+`failure_rate_threshold`, the circuit opens and calls fail immediately
+with `AIServiceError` for `open_seconds`. Then a single probe call is let
+through; its success closes the circuit, its failure opens it again.
+
+For streams the permit is held until the stream ends, and the latency is
+the time to the first chunk. Calls abandoned by the caller do not count
+either way. `check_service_health` reports False while the default model's
+circuit is not closed; limiter and breaker state is available from
+`stats()`.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+from application.interfaces.ai_service import (
+    AIServiceError,
+    ChatMessage,
+    ChatRequest,
+    ChatResponse,
+    ContextCacheHandle,
+    IAIService,
+)
+from infrastructure.external_services.delegating_ai_service import DelegatingAIService
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class AdaptiveLimiter:
+    """Additive-increase / multiplicative-decrease concurrency limit."""
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff_ratio: float = 0.5,
+        queue_timeout_seconds: float = 10.0,
+    ) -> None:
+        self._min_limit = max(1, min_limit)
+        self._max_limit = max(self._min_limit, max_limit)
+        self._limit = float(min(self._max_limit, max(self._min_limit, initial_limit)))
+        self._backoff_ratio = min(1.0, max(0.1, backoff_ratio))
+        self._queue_timeout = queue_timeout_seconds
+        self._in_flight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        # Bumped on every decrease; a permit only cuts the limit if it started in the current round
+        self._round = 0
+        self._decreases = 0
+        self._rejected = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    async def acquire(self) -> int:
+        """Wait for a slot; returns the round the call started in.
+
+        Raises:
+            AIServiceError: If no slot frees up within the queue timeout
+        """
+        if self._in_flight >= self.limit or self._waiters:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait_for(waiter, self._queue_timeout)
+            except asyncio.TimeoutError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was handed over just as the wait timed out
+                    self._in_flight -= 1
+                    self._wake()
+                self._rejected += 1
+                raise AIServiceError("AI backend is overloaded, try again shortly")
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was already handed over
+                    self._in_flight -= 1
+                    self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        else:
+            self._in_flight += 1
+        return self._round
+
+    def release(self, started_round: int, ok: Optional[bool]) -> None:
+        """Free the slot; `ok` is None when the outcome says nothing about the backend."""
+        if ok is True and self._in_flight * 2 >= self._limit:
+            # Grow by about one slot per limit's worth of successes, but only while the
+            # limit is being used
+            self._limit = min(float(self._max_limit), self._limit + 1.0 / self._limit)
+        elif ok is False and started_round == self._round:
+            self._limit = max(float(self._min_limit), self._limit * self._backoff_ratio)
+            self._round += 1
+            self._decreases += 1
+        self._in_flight -= 1
+        self._wake()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "decreases": self._decreases,
+            "rejected": self._rejected,
+        }
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Counted here so a newcomer cannot take the slot before the waiter runs
+                self._in_flight += 1
+                waiter.set_result(None)
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker over a window of recent calls."""
+
+    def __init__(
+        self,
+        window_size: int = 20,
+        min_calls: int = 10,
+        failure_rate_threshold: float = 0.5,
+        open_seconds: float = 30.0,
+    ) -> None:
+        self._outcomes: Deque[bool] = deque(maxlen=max(1, window_size))
+        self._min_calls = max(1, min_calls)
+        self._threshold = failure_rate_threshold
+        self._open_seconds = open_seconds
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._opened = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self._open_seconds:
+            self._state = HALF_OPEN
+        return self._state
+
+    def allow(self) -> None:
+        """
+        Raises:
+            AIServiceError: If the circuit is open, or half-open with the probe call already running
+        """
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self._rejected += 1
+        raise AIServiceError("AI backend is unavailable (circuit open)")
+
+    def record(self, ok: Optional[bool]) -> None:
+        if self._state == HALF_OPEN and self._probing:
+            self._probing = False
+            if ok is True:
+                self._state = CLOSED
+                self._outcomes.clear()
+            elif ok is False:
+                self._open()
+            return
+        if ok is None or self._state != CLOSED:
+            return
+        self._outcomes.append(ok)
+        failures = self._outcomes.count(False)
+        if (
+            len(self._outcomes) >= self._min_calls
+            and failures / len(self._outcomes) >= self._threshold
+        ):
+            self._open()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failure_rate": round(self._outcomes.count(False) / len(self._outcomes), 4)
+            if self._outcomes
+            else 0.0,
+            "opened": self._opened,
+            "rejected": self._rejected,
+        }
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._opened += 1
+        logger.warning("AI backend circuit opened")
+
+
+class _ModelGuard:
+    def __init__(self, limiter: AdaptiveLimiter, breaker: CircuitBreaker) -> None:
+        self.limiter = limiter
+        self.breaker = breaker
+
+
+class ResilientAIService(DelegatingAIService):
+    def __init__(
+        self,
+        inner: IAIService,
+        default_model: str,
+        embedding_model: Optional[str] = None,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff_ratio: float = 0.5,
+        slow_call_seconds: float = 20.0,
+        queue_timeout_seconds: float = 10.0,
+        window_size: int = 20,
+        min_calls: int = 10,
+        failure_rate_threshold: float = 0.5,
+        open_seconds: float = 30.0,
+    ) -> None:
+        super().__init__(inner)
+        self._default_model = default_model
+        # Ingestion bursts must not use up the chat model's slots or open its breaker
+        self._embedding_model = embedding_model or default_model
+        self._slow_call_seconds = slow_call_seconds
+
+        def guard() -> _ModelGuard:
+            return _ModelGuard(
+                AdaptiveLimiter(
+                    initial_limit, min_limit, max_limit, backoff_ratio, queue_timeout_seconds
+                ),
+                CircuitBreaker(window_size, min_calls, failure_rate_threshold, open_seconds),
+            )
+
+        self._new_guard = guard
+        self._guards: Dict[str, _ModelGuard] = {}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            model: {"limiter": guard.limiter.stats(), "breaker": guard.breaker.stats()}
+            for model, guard in self._guards.items()
+        }
+
+    def _guard(self, model: Optional[str]) -> _ModelGuard:
+        key = model or self._default_model
+        guard = self._guards.get(key)
+        if guard is None:
+            guard = self._guards[key] = self._new_guard()
+        return guard
+
+    async def _call(self, model: Optional[str], call: Callable[[], Awaitable[T]]) -> T:
+        guard = self._guard(model)
+        guard.breaker.allow()
+        ok: Optional[bool] = None
+        try:
+            started_round = await guard.limiter.acquire()
+        except BaseException:
+            guard.breaker.record(None)
+            raise
+        started = time.monotonic()
+        try:
+            result = await call()
+            ok = time.monotonic() - started <= self._slow_call_seconds
+            return result
+        except Exception:
+            ok = False
+            raise
+        finally:
+            guard.limiter.release(started_round, ok)
+            guard.breaker.record(ok)
+
+    async def chat_completion(self, request: ChatRequest) -> ChatResponse:
+        return await self._call(request.model, lambda: self._inner.chat_completion(request))
+
+    async def chat_completion_stream(self, request: ChatRequest) -> AsyncGenerator[str, None]:
+        guard = self._guard(request.model)
+        guard.breaker.allow()
+        try:
+            started_round = await guard.limiter.acquire()
+        except BaseException:
+            guard.breaker.record(None)
+            raise
+        started = time.monotonic()
+        first_chunk: Optional[float] = None
+        ok: Optional[bool] = None
+        try:
+            async with aclosing(self._inner.chat_completion_stream(request)) as chunks:
+                async for chunk in chunks:
+                    if first_chunk is None:
+                        first_chunk = time.monotonic() - started
+                    yield chunk
+            ok = (first_chunk or time.monotonic() - started) <= self._slow_call_seconds
+        except Exception:
+            ok = False
+            raise
+        finally:
+            guard.limiter.release(started_round, ok)
+            guard.breaker.record(ok)
+
+    async def embed_text(self, text: str, model: Optional[str] = None) -> List[float]:
+        return await self._call(
+            model or self._embedding_model, lambda: self._inner.embed_text(text, model)
+        )
+
+    async def embed_texts(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        return await self._call(
+            model or self._embedding_model, lambda: self._inner.embed_texts(texts, model)
+        )
+
+    async def cache_context(
+        self, model: str, messages: List[ChatMessage], ttl_seconds: float
+    ) -> Optional[ContextCacheHandle]:
+        return await self._call(
+            model, lambda: self._inner.cache_context(model, messages, ttl_seconds)
+        )
+
+    async def check_service_health(self) -> bool:
+        guard = self._guards.get(self._default_model)
+        if guard is not None and guard.breaker.state != CLOSED:
+            return False
+        return await self._inner.check_service_health()
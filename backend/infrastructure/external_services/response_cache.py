@@ -0,0 +1,74 @@
+"""
+In-Memory Response Cache
+
+Process-local `IResponseCache` with a TTL per entry and LRU eviction once
+`max_entries` is reached. Keys are tracked per bot so `invalidate_bot`
+only touches that bot's entries. Hit, miss and eviction counters are
+available from `stats()`.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from application.interfaces.response_cache import CachedResponse, IResponseCache
+
+_Key = Tuple[int, str]
+
+
+class InMemoryResponseCache(IResponseCache):
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 3600.0) -> None:
+        self._max_entries = max(1, max_entries)
+        self._ttl = ttl_seconds
+        self._entries: "OrderedDict[_Key, Tuple[float, CachedResponse]]" = OrderedDict()
+        self._keys_by_bot: Dict[int, Set[str]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    async def get(self, bot_id: int, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get((bot_id, key))
+        if entry is not None and entry[0] < time.monotonic():
+            self._remove((bot_id, key))
+            entry = None
+        if entry is None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end((bot_id, key))
+        self._hits += 1
+        return entry[1]
+
+    async def put(self, bot_id: int, key: str, response: CachedResponse) -> None:
+        self._entries[(bot_id, key)] = (time.monotonic() + self._ttl, response)
+        self._entries.move_to_end((bot_id, key))
+        self._keys_by_bot.setdefault(bot_id, set()).add(key)
+        while len(self._entries) > self._max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+
+    async def invalidate_bot(self, bot_id: int) -> None:
+        keys = self._keys_by_bot.pop(bot_id, set())
+        for key in keys:
+            self._entries.pop((bot_id, key), None)
+        self._invalidations += 1
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+            "evictions": self._evictions,
+            "invalidations": self._invalidations,
+        }
+
+    def _remove(self, entry_key: _Key) -> None:
+        self._entries.pop(entry_key, None)
+        keys = self._keys_by_bot.get(entry_key[0])
+        if keys is not None:
+            keys.discard(entry_key[1])
+            if not keys:
+                del self._keys_by_bot[entry_key[0]]
@@ -0,0 +1,597 @@
+"""
+Segmented Vector Store
+
+Disk-backed implementation of `IVectorStore` for large knowledge bases.
+
+Each bot has a directory of immutable segments. A segment is three `.npy`
+files (raw float32 vectors, their L2 norms and the chunk ids) opened with
+`mmap_mode="r"`, so every uvicorn worker maps the same pages from the OS page
+cache instead of keeping its own copy. `manifest.json` lists the live segments
+in write order plus tombstones for replaced or deleted ids. It is rewritten
+atomically with `os.replace` under a per-bot file lock, and readers reload it
+whenever the file changes.
+
+Every upsert appends a new small segment. Background compaction merges the
+newest segments in size tiers, drops dead rows, and gives merged segments
+of at least `ivf_min_rows` an IVF layout (centroids plus rows sorted by
+list) so searches only scan the lists closest to the query. Rows not yet in
+an IVF segment are merged into one as soon as there are that many of them.
+
+A tombstone `(id, seq)` hides that id in every segment whose sequence number
+is `<= seq`; upserting an existing id writes a tombstone just below the new
+segment, deleting one writes it at the newest segment.
+
+With `quantization` set to "int8" or "float16", a segment's memory-mapped
+part is its unit vectors scalar-quantized with a float32 scale per vector
+(1/4 or 1/2 of the bytes of a float32 row) instead of the float32 vectors.
+Searches scan only those codes, shortlist `rescore_factor * top_k` rows per
+segment and re-score the shortlist against a separate file of float32 unit
+vectors. That file is never mapped: the shortlisted rows are read with
+`pread`, so it stays on disk (or in the evictable page cache) rather than in
+each worker's resident memory. Disk use is about 1.25x (int8) or 1.5x
+(float16) that of a float32 segment. Segments written under another setting
+keep their layout until compaction rewrites them.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from application.interfaces.vector_store import IVectorStore, VectorMatch
+from infrastructure.external_services.vector_math import (
+    QUANTIZED_DTYPES,
+    VectorRows,
+    nearest_centroid,
+    normalize,
+    quantize,
+    quantized_scores,
+    spherical_kmeans,
+    top_k_indices,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of this process are serialised
+    fcntl = None  # type: ignore[assignment]
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+_LOCK_FILE = ".lock"
+_SEGMENT_FILES = ("vectors", "norms", "ids", "centroids", "offsets", "codes", "scales", "unit")
+
+
+class _RowFile:
+    """Rows of a 2-D `.npy` file read on demand with `pread` instead of a memory map."""
+
+    def __init__(self, path: str) -> None:
+        header = np.load(path, mmap_mode="r")
+        self.path = path
+        self._dtype = header.dtype
+        self._width = header.shape[1]
+        self._offset = header.offset
+        self._row_bytes = header.dtype.itemsize * header.shape[1]
+        # Kept open so a compaction that removes the file does not break readers of this view
+        self._fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        self._lock = threading.Lock()
+        weakref.finalize(self, os.close, self._fd)
+
+    def rows(self, indices: np.ndarray) -> np.ndarray:
+        """The rows at `indices`; reading them in ascending order keeps disk access sequential."""
+        data = b"".join(self._read(self._offset + int(i) * self._row_bytes) for i in indices)
+        return np.frombuffer(data, dtype=self._dtype).reshape(len(indices), self._width)
+
+    def _read(self, offset: int) -> bytes:
+        if hasattr(os, "pread"):
+            return os.pread(self._fd, self._row_bytes, offset)
+        with self._lock:  # Windows has no pread
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            return os.read(self._fd, self._row_bytes)
+
+
+@dataclass
+class _Segment:
+    name: str
+    seq: int
+    ids: np.ndarray
+    # Exact segments map the float32 vectors and norms; quantized ones map codes and
+    # scales and read full-precision unit vectors for re-scoring from `unit`
+    vectors: Optional[np.ndarray] = None
+    norms: Optional[np.ndarray] = None
+    dead: Optional[np.ndarray] = None
+    centroids: Optional[np.ndarray] = None
+    offsets: Optional[np.ndarray] = None
+    codes: Optional[np.ndarray] = None
+    scales: Optional[np.ndarray] = None
+    unit: Optional[_RowFile] = None
+
+    @property
+    def live_count(self) -> int:
+        return len(self.ids) - (int(self.dead.sum()) if self.dead is not None else 0)
+
+
+@dataclass
+class _View:
+    """Segments of one manifest version, opened as memory maps."""
+
+    key: Tuple[int, int, int]
+    dimension: int
+    segments: List[_Segment]
+
+    @property
+    def live_count(self) -> int:
+        return sum(segment.live_count for segment in self.segments)
+
+
+class SegmentedVectorStore(IVectorStore):
+    def __init__(
+        self,
+        root_dir: str,
+        max_segments: int = 8,
+        ivf_min_rows: int = 8192,
+        ann_nlist: int = 0,
+        ann_nprobe: int = 16,
+        quantization: str = "none",
+        rescore_factor: int = 4,
+    ) -> None:
+        if quantization != "none" and quantization not in QUANTIZED_DTYPES:
+            raise ValueError(f"Unknown vector quantization {quantization!r}")
+        self._root_dir = root_dir
+        self._max_segments = max(2, max_segments)
+        self._ivf_min_rows = ivf_min_rows
+        self._ann_nlist = ann_nlist
+        self._ann_nprobe = max(1, ann_nprobe)
+        self._quantization = None if quantization == "none" else quantization
+        self._rescore_factor = max(1, rescore_factor)
+        self._views: Dict[int, _View] = {}
+        self._thread_locks: Dict[str, threading.Lock] = {}
+        self._compacting: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        os.makedirs(root_dir, exist_ok=True)
+
+    async def upsert(self, bot_id: int, ids: Sequence[int], vectors: VectorRows) -> None:
+        if not len(ids):
+            return
+        if await asyncio.to_thread(self._write_segment, bot_id, ids, vectors):
+            self._schedule_compaction(bot_id)
+
+    async def search(
+        self, bot_id: int, vector: Sequence[float], top_k: int = 5
+    ) -> List[VectorMatch]:
+        hits = await asyncio.to_thread(self._search, bot_id, vector, top_k)
+        return [VectorMatch(id=vector_id, score=score) for vector_id, score in hits]
+
+    async def delete(self, bot_id: int, ids: Sequence[int]) -> None:
+        if not len(ids):
+            return
+        if await asyncio.to_thread(self._write_tombstones, bot_id, ids):
+            self._schedule_compaction(bot_id)
+
+    async def count(self, bot_id: int) -> int:
+        view = await asyncio.to_thread(self._load, bot_id)
+        return view.live_count if view else 0
+
+    async def close(self) -> None:
+        """Wait for running compactions to finish."""
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    # Reads
+
+    def _search(self, bot_id: int, vector: Sequence[float], top_k: int) -> List[Tuple[int, float]]:
+        view = self._load(bot_id)
+        if view is None or top_k <= 0:
+            return []
+        q = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if q.shape[0] != view.dimension:
+            raise ValueError(f"Expected query of dimension {view.dimension}, got {q.shape[0]}")
+        q = normalize(q.reshape(1, -1))[0]
+
+        hit_ids: List[np.ndarray] = []
+        hit_scores: List[np.ndarray] = []
+        for segment in view.segments:
+            offsets = segment.offsets
+            if (
+                segment.centroids is not None
+                and offsets is not None
+                and self._ann_nprobe < len(segment.centroids)
+            ):
+                probe = top_k_indices(segment.centroids @ q, self._ann_nprobe)
+                ranges = [(offsets[i], offsets[i + 1]) for i in probe]
+                rows = np.concatenate([np.arange(start, end) for start, end in ranges])
+            else:
+                ranges = [(0, len(segment.ids))]
+                rows = None
+            codes, scales, unit = segment.codes, segment.scales, segment.unit
+            vectors, norms = segment.vectors, segment.norms
+            if codes is not None and scales is not None and unit is not None:
+                scores = np.concatenate(
+                    [
+                        quantized_scores(codes[start:end], scales[start:end], q)
+                        for start, end in ranges
+                    ]
+                )
+            elif vectors is not None and norms is not None:
+                scores = np.concatenate([vectors[start:end] @ q for start, end in ranges])
+                scores /= norms if rows is None else norms[rows]
+            else:
+                raise RuntimeError(f"Vector segment {segment.name} has neither vectors nor codes")
+            if segment.dead is not None:
+                scores[segment.dead if rows is None else segment.dead[rows]] = -np.inf
+            top = top_k_indices(scores, top_k if unit is None else top_k * self._rescore_factor)
+            top = top[np.isfinite(scores[top])]
+            hits = top if rows is None else rows[top]
+            hits_scores = scores[top]
+            if unit is not None and len(hits):
+                # Re-score the shortlist in full precision, reading rows in file order
+                hits = np.sort(hits)
+                hits_scores = unit.rows(hits) @ q
+                best = top_k_indices(hits_scores, top_k)
+                hits, hits_scores = hits[best], hits_scores[best]
+            hit_ids.append(segment.ids[hits])
+            hit_scores.append(hits_scores)
+
+        if not hit_ids:
+            return []
+        ids = np.concatenate(hit_ids)
+        scores = np.concatenate(hit_scores)
+        best = top_k_indices(scores, top_k)
+        return list(zip(ids[best].tolist(), scores[best].tolist()))
+
+    def _load(self, bot_id: int) -> Optional[_View]:
+        """Return the bot's current view, reopening segments only when the manifest changed."""
+        bot_dir = self._bot_dir(bot_id)
+        for _ in range(3):
+            try:
+                stat = os.stat(os.path.join(bot_dir, MANIFEST_FILE))
+            except FileNotFoundError:
+                self._views.pop(bot_id, None)
+                return None
+            key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            cached = self._views.get(bot_id)
+            if cached is not None and cached.key == key:
+                return cached
+            try:
+                view = self._open_view(bot_dir, _read_manifest(bot_dir), key)
+            except FileNotFoundError:
+                continue  # a compaction replaced the manifest while we were opening it
+            self._views[bot_id] = view
+            return view
+        raise RuntimeError(f"Vector index for bot {bot_id} kept changing while loading")
+
+    def _open_view(
+        self, bot_dir: str, manifest: Dict[str, Any], key: Tuple[int, int, int]
+    ) -> _View:
+        tombstones = manifest["tombstones"]
+        tomb_ids = np.array([t[0] for t in tombstones], dtype=np.int64)
+        tomb_seqs = np.array([t[1] for t in tombstones], dtype=np.int64)
+        segments = []
+        for entry in manifest["segments"]:
+            segment = _open_segment(bot_dir, entry)
+            hidden = tomb_ids[tomb_seqs >= segment.seq]
+            if len(hidden):
+                dead = np.isin(segment.ids, hidden)
+                segment.dead = dead if dead.any() else None
+            segments.append(segment)
+        return _View(key=key, dimension=manifest["dimension"], segments=segments)
+
+    # Writes
+
+    def _write_segment(self, bot_id: int, ids: Sequence[int], vectors: VectorRows) -> bool:
+        ids_arr = np.asarray(ids, dtype=np.int64).reshape(-1)
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids_arr):
+            raise ValueError(f"Expected {len(ids_arr)} vectors, got shape {matrix.shape}")
+        # Within one batch the last vector for an id wins
+        _, last = np.unique(ids_arr[::-1], return_index=True)
+        keep = np.sort(len(ids_arr) - 1 - last)
+        ids_arr, matrix = ids_arr[keep], matrix[keep]
+
+        bot_dir = self._bot_dir(bot_id)
+        os.makedirs(bot_dir, exist_ok=True)
+        name = uuid.uuid4().hex
+        _save_segment(
+            bot_dir, name, matrix, _norms(matrix), ids_arr, quantization=self._quantization
+        )
+        try:
+            with self._locked(bot_dir):
+                manifest = (
+                    _read_manifest(bot_dir)
+                    if os.path.exists(os.path.join(bot_dir, MANIFEST_FILE))
+                    else None
+                )
+                if manifest is None:
+                    manifest = {
+                        "version": 0,
+                        "dimension": matrix.shape[1],
+                        "next_seq": 1,
+                        "segments": [],
+                        "tombstones": [],
+                    }
+                if manifest["dimension"] != matrix.shape[1]:
+                    raise ValueError(
+                        f"Expected vectors of dimension {manifest['dimension']},"
+                        f" got {matrix.shape[1]}"
+                    )
+                seq = manifest["next_seq"]
+                view = self._load(bot_id)
+                replaced = _present_ids(view, ids_arr) if view else []
+                manifest["tombstones"].extend([vector_id, seq - 1] for vector_id in replaced)
+                manifest["segments"].append(self._segment_entry(name, seq, len(ids_arr), False))
+                manifest["next_seq"] = seq + 1
+                _write_manifest(bot_dir, manifest)
+                return self._compaction_plan(manifest) is not None
+        except BaseException:
+            _remove_segment(bot_dir, name)
+            raise
+
+    def _write_tombstones(self, bot_id: int, ids: Sequence[int]) -> bool:
+        bot_dir = self._bot_dir(bot_id)
+        if not os.path.exists(os.path.join(bot_dir, MANIFEST_FILE)):
+            return False
+        with self._locked(bot_dir):
+            manifest = _read_manifest(bot_dir)
+            view = self._load(bot_id)
+            present = _present_ids(view, np.asarray(ids, dtype=np.int64)) if view else []
+            if not present:
+                return False
+            newest = manifest["next_seq"] - 1
+            manifest["tombstones"].extend([vector_id, newest] for vector_id in present)
+            _write_manifest(bot_dir, manifest)
+            return self._compaction_plan(manifest) is not None
+
+    # Compaction
+
+    def _schedule_compaction(self, bot_id: int) -> None:
+        if bot_id in self._compacting:
+            return
+        self._compacting.add(bot_id)
+        task = asyncio.create_task(self._run_compaction(bot_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_compaction(self, bot_id: int) -> None:
+        try:
+            await asyncio.to_thread(self._compact, bot_id)
+        except Exception as e:
+            logger.error("Vector index compaction for bot %s failed: %s", bot_id, e)
+        finally:
+            self._compacting.discard(bot_id)
+
+    def _compaction_plan(self, manifest: Dict[str, Any]) -> Optional[List[str]]:
+        """Names of the segments to merge next, or None when the layout is fine."""
+        segments = manifest["segments"]
+        if (
+            len(segments) > 1
+            and len(manifest["tombstones"]) > sum(s["count"] for s in segments) // 2
+        ):
+            return [s["name"] for s in segments]
+        # Segments stored under another quantization setting are rewritten in the current one
+        stale = [s for s in segments if s.get("quantization") != self._quantization]
+        if stale and sum(s["count"] for s in stale) >= self._ivf_min_rows:
+            return [s["name"] for s in stale]
+        # Enough rows outside IVF segments to build one: merge them so searches stop
+        # scanning them all
+        exact = [s for s in segments if not s["ivf"]]
+        if exact and sum(s["count"] for s in exact) >= self._ivf_min_rows:
+            return [s["name"] for s in exact]
+        if len(segments) <= self._max_segments:
+            return None
+        # Size tiers: merge the newest run of segments no larger than what is already merged
+        run = segments[-2:]
+        total = sum(s["count"] for s in run)
+        for entry in reversed(segments[:-2]):
+            if entry["count"] > total:
+                break
+            run.insert(0, entry)
+            total += entry["count"]
+        return [s["name"] for s in run]
+
+    def _compact(self, bot_id: int) -> None:
+        bot_dir = self._bot_dir(bot_id)
+        while True:
+            view = self._load(bot_id)
+            if view is None:
+                return
+            plan = self._compaction_plan(_read_manifest(bot_dir))
+            if not plan:
+                return
+            merged = [segment for segment in view.segments if segment.name in plan]
+            if len(merged) != len(plan):
+                continue  # manifest moved on since the view was opened
+
+            vectors, norms, ids = _live_rows(merged)
+            name = uuid.uuid4().hex if len(ids) else None
+            ivf = False
+            if name is not None:
+                centroids = offsets = None
+                if len(ids) >= self._ivf_min_rows:
+                    vectors, norms, ids, centroids, offsets = self._ivf_layout(vectors, norms, ids)
+                    ivf = True
+                _save_segment(
+                    bot_dir, name, vectors, norms, ids, centroids, offsets, self._quantization
+                )
+
+            with self._locked(bot_dir):
+                manifest = _read_manifest(bot_dir)
+                names = {s["name"] for s in manifest["segments"]}
+                if not set(plan) <= names:
+                    if name is not None:
+                        _remove_segment(bot_dir, name)
+                    return  # another worker compacted these segments first
+                seq = max(segment.seq for segment in merged)
+                kept = [s for s in manifest["segments"] if s["name"] not in plan]
+                if name is not None:
+                    kept.append(self._segment_entry(name, seq, len(ids), ivf))
+                kept.sort(key=lambda s: s["seq"])
+                manifest["segments"] = kept
+                # Tombstones below the oldest remaining segment can no longer hide anything
+                oldest = kept[0]["seq"] if kept else manifest["next_seq"]
+                manifest["tombstones"] = [t for t in manifest["tombstones"] if t[1] >= oldest]
+                _write_manifest(bot_dir, manifest)
+
+            for old in plan:
+                _remove_segment(bot_dir, old)
+            logger.info(
+                "Compacted %d vector segments for bot %s into %d rows", len(plan), bot_id, len(ids)
+            )
+
+    def _ivf_layout(
+        self, vectors: np.ndarray, norms: np.ndarray, ids: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        unit = vectors / norms[:, None]
+        nlist = self._ann_nlist or int(np.sqrt(len(ids)))
+        nlist = max(1, min(nlist, len(ids)))
+        centroids = spherical_kmeans(unit, nlist)
+        assign = nearest_centroid(unit, centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assign, minlength=nlist))
+        return vectors[order], norms[order], ids[order], centroids, offsets
+
+    # Helpers
+
+    def _segment_entry(self, name: str, seq: int, count: int, ivf: bool) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"name": name, "seq": seq, "count": count, "ivf": ivf}
+        if self._quantization:
+            entry["quantization"] = self._quantization
+        return entry
+
+    def _bot_dir(self, bot_id: int) -> str:
+        return os.path.join(self._root_dir, f"bot_{int(bot_id)}")
+
+    @contextmanager
+    def _locked(self, bot_dir: str) -> Iterator[None]:
+        """Serialise manifest updates across threads and, where flock exists, processes."""
+        thread_lock = self._thread_locks.setdefault(bot_dir, threading.Lock())
+        with thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(bot_dir, _LOCK_FILE), "a+") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _read_manifest(bot_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(bot_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        manifest: Dict[str, Any] = json.load(f)
+    return manifest
+
+
+def _write_manifest(bot_dir: str, manifest: Dict[str, Any]) -> None:
+    manifest["version"] = manifest.get("version", 0) + 1
+    tmp_path = os.path.join(bot_dir, f"{MANIFEST_FILE}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(bot_dir, MANIFEST_FILE))
+
+
+def _segment_path(bot_dir: str, name: str, part: str) -> str:
+    return os.path.join(bot_dir, f"{name}.{part}.npy")
+
+
+def _save_segment(
+    bot_dir: str,
+    name: str,
+    vectors: np.ndarray,
+    norms: np.ndarray,
+    ids: np.ndarray,
+    centroids: Optional[np.ndarray] = None,
+    offsets: Optional[np.ndarray] = None,
+    quantization: Optional[str] = None,
+) -> None:
+    parts = {"ids": ids, "centroids": centroids, "offsets": offsets}
+    if quantization:
+        unit = (vectors / norms[:, None]).astype(np.float32)
+        parts["codes"], parts["scales"] = quantize(unit, quantization)
+        parts["unit"] = unit
+    else:
+        parts["vectors"], parts["norms"] = vectors, norms
+    for part, array in parts.items():
+        if array is not None:
+            np.save(_segment_path(bot_dir, name, part), np.ascontiguousarray(array))
+
+
+def _open_segment(bot_dir: str, entry: Dict[str, Any]) -> _Segment:
+    name = entry["name"]
+
+    def load(part: str) -> np.ndarray:
+        array: np.ndarray = np.load(_segment_path(bot_dir, name, part), mmap_mode="r")
+        return array
+
+    segment = _Segment(name=name, seq=entry["seq"], ids=load("ids"))
+    if entry.get("ivf"):
+        # Centroids are scored against every query, so keep them in memory
+        segment.centroids = np.array(load("centroids"))
+        segment.offsets = np.array(load("offsets"))
+    if entry.get("quantization"):
+        segment.codes = load("codes")
+        segment.scales = np.array(load("scales"))
+        segment.unit = _RowFile(_segment_path(bot_dir, name, "unit"))
+    else:
+        segment.vectors = load("vectors")
+        segment.norms = load("norms")
+    return segment
+
+
+def _remove_segment(bot_dir: str, name: str) -> None:
+    for part in _SEGMENT_FILES:
+        try:
+            os.remove(_segment_path(bot_dir, name, part))
+        except FileNotFoundError:
+            pass
+        except OSError as e:  # e.g. still mapped by another process on Windows
+            logger.warning("Could not remove vector segment file %s.%s: %s", name, part, e)
+
+
+def _norms(vectors: np.ndarray) -> np.ndarray:
+    norms: np.ndarray = np.linalg.norm(vectors, axis=1).astype(np.float32)
+    norms[norms == 0] = 1.0
+    return norms
+
+
+def _present_ids(view: _View, ids: np.ndarray) -> List[int]:
+    """Ids from `ids` that are live in some segment of the view."""
+    present: Set[int] = set()
+    for segment in view.segments:
+        mask = np.isin(segment.ids, ids)
+        if segment.dead is not None:
+            mask &= ~segment.dead
+        present.update(np.asarray(segment.ids[mask]).tolist())
+    return sorted(present)
+
+
+def _live_rows(segments: List[_Segment]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    vectors, norms, ids = [], [], []
+    for segment in segments:
+        alive: np.ndarray = (
+            np.ones(len(segment.ids), dtype=bool) if segment.dead is None else ~segment.dead
+        )
+        if segment.unit is not None:
+            # Quantized segments keep unit vectors only; compaction maps the file just while merging
+            vectors.append(np.asarray(np.load(segment.unit.path, mmap_mode="r")[alive]))
+            norms.append(np.ones(int(alive.sum()), dtype=np.float32))
+        elif segment.vectors is not None and segment.norms is not None:
+            vectors.append(np.asarray(segment.vectors[alive]))
+            norms.append(np.asarray(segment.norms[alive]))
+        else:
+            raise RuntimeError(
+                f"Vector segment {segment.name} has neither vectors nor unit vectors"
+            )
+        ids.append(np.asarray(segment.ids[alive]))
+    return np.concatenate(vectors), np.concatenate(norms), np.concatenate(ids)
@@ -0,0 +1,159 @@
+"""
+Single-Flight AI Service
+
+`IAIService` decorator that lets concurrent identical chat requests share
+one upstream call.
+
+Requests are keyed on the generation settings (model, temperature,
+max_tokens) and the message list with whitespace collapsed. Request
+`context` (conversation ids and the like) is not part of the key. While a
+call for a key is in flight, further identical requests join it instead of
+starting their own:
+
+- `chat_completion` callers await the same result.
+- `chat_completion_stream` callers read the same chunk sequence; a caller
+  that joins late first receives the chunks produced so far. The upstream
+  stream is closed once every reader has gone away.
+
+A request with a different temperature (or any other setting) has a
+different key and runs independently. Nothing is kept after the call
+completes. Counters are available from `stats()`; embedding and model
+methods are delegated unchanged.
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+from contextlib import aclosing
+from typing import AsyncGenerator, Dict, List, Optional
+
+from application.interfaces.ai_service import ChatRequest, ChatResponse, IAIService
+from infrastructure.external_services.delegating_ai_service import DelegatingAIService
+
+logger = logging.getLogger(__name__)
+
+
+class _StreamFlight:
+    """Chunks of one upstream stream, readable by any number of subscribers."""
+
+    def __init__(self) -> None:
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.readers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+    def push(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._notify()
+
+    async def wait(self) -> None:
+        await self._wake.wait()
+
+    def _notify(self) -> None:
+        wake, self._wake = self._wake, asyncio.Event()
+        wake.set()
+
+
+class SingleFlightAIService(DelegatingAIService):
+    def __init__(self, inner: IAIService) -> None:
+        super().__init__(inner)
+        self._completions: Dict[str, "asyncio.Future[ChatResponse]"] = {}
+        self._streams: Dict[str, _StreamFlight] = {}
+        self._upstream_calls = 0
+        self._shared_calls = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "upstream_calls": self._upstream_calls,
+            "shared_calls": self._shared_calls,
+            "in_flight": len(self._completions) + len(self._streams),
+        }
+
+    async def chat_completion(self, request: ChatRequest) -> ChatResponse:
+        key = request_key(request)
+        future = self._completions.get(key)
+        if future is None:
+            self._upstream_calls += 1
+            future = asyncio.ensure_future(self._inner.chat_completion(request))
+            self._completions[key] = future
+
+            def forget(done: "asyncio.Future[ChatResponse]") -> None:
+                self._completions.pop(key, None)
+                if not done.cancelled():
+                    done.exception()  # retrieved even if every caller gave up
+
+            future.add_done_callback(forget)
+        else:
+            self._shared_calls += 1
+        # Shielded: one caller giving up must not cancel the call for the others
+        response = await asyncio.shield(future)
+        return dataclasses.replace(
+            response, usage=dict(response.usage) if response.usage else response.usage
+        )
+
+    async def chat_completion_stream(self, request: ChatRequest) -> AsyncGenerator[str, None]:
+        key = request_key(request)
+        flight = self._streams.get(key)
+        if flight is None:
+            self._upstream_calls += 1
+            flight = _StreamFlight()
+            self._streams[key] = flight
+            flight.task = asyncio.create_task(self._produce(key, flight, request))
+        else:
+            self._shared_calls += 1
+
+        flight.readers += 1
+        position = 0
+        try:
+            while True:
+                while position < len(flight.chunks):
+                    yield flight.chunks[position]
+                    position += 1
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.wait()
+        finally:
+            flight.readers -= 1
+            if flight.readers == 0 and not flight.done and flight.task is not None:
+                # Nobody is listening any more
+                flight.task.cancel()
+                if self._streams.get(key) is flight:
+                    del self._streams[key]
+
+    async def _produce(self, key: str, flight: _StreamFlight, request: ChatRequest) -> None:
+        try:
+            async with aclosing(self._inner.chat_completion_stream(request)) as chunks:
+                async for chunk in chunks:
+                    flight.push(chunk)
+            flight.finish()
+        except asyncio.CancelledError:
+            flight.finish(asyncio.CancelledError())
+            raise
+        except Exception as e:
+            logger.warning("Shared chat stream failed: %s", e)
+            flight.finish(e)
+        finally:
+            if self._streams.get(key) is flight:
+                del self._streams[key]
+
+
+def request_key(request: ChatRequest) -> str:
+    """Hash of the generation settings and the normalized message list."""
+    payload = [
+        request.model,
+        request.temperature,
+        request.max_tokens,
+        [[message.role, " ".join(message.content.split())] for message in request.messages],
+    ]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
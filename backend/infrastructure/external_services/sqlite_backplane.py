@@ -0,0 +1,108 @@
+"""
+SQLite Backplane
+
+Single-host stand-in for the Redis backplane, for development and tests
+with several workers. Published messages are appended to a shared SQLite
+file and every instance polls for rows newer than the last one it has
+seen, skipping its own. Rows older than `retention_seconds` are pruned.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+from application.interfaces.message_backplane import BackplaneHandler, IMessageBackplane
+
+logger = logging.getLogger(__name__)
+
+_Row = Tuple[int, str, Optional[int], str]
+
+
+class SqliteBackplane(IMessageBackplane):
+    def __init__(
+        self, path: str, poll_interval_ms: float = 50.0, retention_seconds: float = 60.0
+    ) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._poll_interval = max(0.001, poll_interval_ms / 1000)
+        self._retention = retention_seconds
+        self._origin = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ws_events ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL,"
+                " user_id INTEGER, message TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        self._last_id = 0
+        self._handler: Optional[BackplaneHandler] = None
+        self._poller: Optional[asyncio.Task] = None
+
+    async def start(self, handler: BackplaneHandler) -> None:
+        self._handler = handler
+        # Only messages published from now on are delivered
+        self._last_id = await asyncio.to_thread(self._max_id)
+        self._poller = asyncio.create_task(self._poll())
+
+    async def publish(self, user_id: Optional[int], message: str) -> None:
+        await asyncio.to_thread(self._insert, user_id, message)
+
+    async def close(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+        with self._lock:
+            self._conn.close()
+
+    async def _poll(self) -> None:
+        last_prune = time.monotonic()
+        while True:
+            try:
+                rows = await asyncio.to_thread(self._fetch_after, self._last_id)
+                for row_id, origin, user_id, message in rows:
+                    self._last_id = row_id
+                    if origin != self._origin and self._handler is not None:
+                        await self._handler(user_id, message)
+                if time.monotonic() - last_prune > self._retention:
+                    last_prune = time.monotonic()
+                    await asyncio.to_thread(self._prune)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("SQLite backplane poll failed: %s", e)
+            await asyncio.sleep(self._poll_interval)
+
+    def _max_id(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM ws_events").fetchone()[0]
+
+    def _insert(self, user_id: Optional[int], message: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO ws_events (origin, user_id, message, created_at) VALUES (?, ?, ?, ?)",
+                (self._origin, user_id, message, time.time()),
+            )
+            self._conn.commit()
+
+    def _fetch_after(self, last_id: int) -> List[_Row]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, origin, user_id, message FROM ws_events WHERE id > ? ORDER BY id",
+                (last_id,),
+            ).fetchall()
+
+    def _prune(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM ws_events WHERE created_at < ?", (time.time() - self._retention,)
+            )
+            self._conn.commit()
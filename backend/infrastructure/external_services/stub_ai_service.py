@@ -0,0 +1,104 @@
+"""
+Infrastructure Implementation - Stub AI Service
+
+In-process stand-in for `IAIService`, used by tests and offline
+development (AI_PROVIDER=stub). It answers "AI response" and fixed
+embeddings without any I/O.
+
+Context caching is simulated: cached prefixes are kept in memory and
+`usage` reports how many prompt tokens were sent versus served from the
+cache (estimated at 4 characters per token), so prompt-prefix reuse can be
+exercised without the provider.
+"""
+
+import time
+import uuid
+from typing import AsyncGenerator, Dict, List, Optional
+
+from application.interfaces.ai_service import (
+    ChatMessage,
+    ChatRequest,
+    ChatResponse,
+    ContextCacheHandle,
+    IAIService,
+)
+
+
+class StubAIService(IAIService):
+    """Stub AI service."""
+
+    def __init__(self, api_key: str, model_name: str):
+        self.api_key = api_key
+        self.model_name = model_name
+        self._context_caches: Dict[str, ContextCacheHandle] = {}
+        # Prompt tokens sent with requests and served from context caches
+        self.prompt_tokens_sent = 0
+        self.prompt_tokens_cached = 0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def chat_completion(self, request: ChatRequest) -> ChatResponse:
+        sent, cached = self._prompt_usage(request)
+        usage = {
+            "prompt_tokens": sent + cached,
+            "cached_tokens": cached,
+            "total_tokens": sent + cached + 2,
+        }
+        return ChatResponse(content="AI response", model=self.model_name, usage=usage)
+
+    async def chat_completion_stream(self, request: ChatRequest) -> AsyncGenerator[str, None]:
+        self._prompt_usage(request)
+        yield "AI"
+        yield " response"
+
+    async def cache_context(
+        self, model: str, messages: List[ChatMessage], ttl_seconds: float
+    ) -> Optional[ContextCacheHandle]:
+        handle = ContextCacheHandle(
+            name=f"cachedContents/{uuid.uuid4().hex}",
+            model=model,
+            message_count=len(messages),
+            tokens=sum(_estimate_tokens(m.content) for m in messages),
+            expires_at=time.time() + ttl_seconds,
+        )
+        self._context_caches[handle.name] = handle
+        return handle
+
+    async def embed_text(self, text: str, model: Optional[str] = None) -> List[float]:
+        return [0.1, 0.2, 0.3]
+
+    async def embed_texts(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        return [[0.1, 0.2, 0.3] for _ in texts]
+
+    def get_available_models(self) -> List[str]:
+        return ["gemini-pro"]
+
+    def validate_model(self, model_name: str) -> bool:
+        return True
+
+    async def check_service_health(self) -> bool:
+        return True
+
+    def _prompt_usage(self, request: ChatRequest) -> tuple:
+        """(tokens sent, tokens served from a context cache) for the request."""
+        messages = request.messages
+        cached = 0
+        handle = (
+            self._context_caches.get(request.context_cache.name) if request.context_cache else None
+        )
+        if (
+            handle is not None
+            and handle.model == (request.model or self.model_name)
+            and handle.expires_at > time.time()
+        ):
+            messages = messages[handle.message_count :]
+            cached = handle.tokens
+        sent = sum(_estimate_tokens(m.content) for m in messages)
+        self.prompt_tokens_sent += sent
+        self.prompt_tokens_cached += cached
+        return sent, cached
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
@@ -0,0 +1,222 @@
+"""
+Token-Aware Text Chunker
+
+Splits document text into chunks that fit an embedding token budget while
+cutting at paragraph, sentence or line boundaries instead of mid-word.
+
+The text is scanned once with a single boundary regex to produce segments,
+all segment token counts are computed in one batch call, and chunks are then
+packed with prefix sums and binary search, so the cost is linear in the text
+size. Overlap between consecutive chunks is expressed in tokens.
+
+Token counts come from tiktoken when its encoding is available; otherwise a
+word-piece estimate (about four characters per token) is used.
+"""
+
+import logging
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import AsyncGenerator, AsyncIterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Boundary strength, highest preferred when choosing where to cut
+_RANK_WORD = 0
+_RANK_LINE = 1
+_RANK_SENTENCE = 2
+_RANK_PARAGRAPH = 3
+
+# The leading lookahead lets the regex engine skip ahead to candidate characters
+_BOUNDARY_RE = re.compile(
+    r"(?=[.!?\n])(?:"
+    r"(?P<para>\n[ \t\r\f\v]*\n\s*)"
+    r"|(?P<sent>[.!?]+[\"')\]]*\s+)"
+    r"|(?P<line>\n))"
+)
+_WORD_RE = re.compile(r"\S+\s*")
+_ESTIMATE_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken, falling back to a word-piece estimate."""
+
+    def __init__(self, encoding_name: Optional[str] = "cl100k_base") -> None:
+        self._encoding = None
+        if encoding_name:
+            try:
+                import tiktoken  # type: ignore
+
+                self._encoding = tiktoken.get_encoding(encoding_name)
+            except Exception as e:
+                logger.warning(
+                    "tiktoken encoding %s unavailable (%s); estimating token counts",
+                    encoding_name,
+                    e,
+                )
+
+    @property
+    def is_exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode_ordinary(text))
+        return len(_ESTIMATE_RE.findall(text))
+
+    def count_many(self, texts: Sequence[str]) -> List[int]:
+        if self._encoding is not None:
+            return [len(tokens) for tokens in self._encoding.encode_ordinary_batch(list(texts))]
+        findall = _ESTIMATE_RE.findall
+        return [len(findall(text)) for text in texts]
+
+
+class TokenChunker:
+    def __init__(
+        self,
+        max_tokens: int = 400,
+        overlap_tokens: int = 50,
+        counter: Optional[TokenCounter] = None,
+        min_fill: float = 0.5,
+    ) -> None:
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("overlap_tokens must be between 0 and max_tokens")
+        self._max_tokens = max_tokens
+        self._overlap_tokens = overlap_tokens
+        self._counter = counter or TokenCounter()
+        # A chunk may end at a stronger boundary as long as it keeps this share of the budget
+        self._min_fill_tokens = int(max_tokens * min_fill)
+        # Streamed text is chunked once this many characters are buffered
+        self._flush_chars = max_tokens * 32
+
+    @property
+    def counter(self) -> TokenCounter:
+        return self._counter
+
+    def chunk(self, text: str) -> List[str]:
+        chunks = []
+        for start, end in self.chunk_spans(text):
+            piece = text[start:end].strip()
+            if piece:
+                chunks.append(piece)
+        return chunks
+
+    def chunk_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Return (start, end) character offsets of each chunk."""
+        if not text:
+            return []
+        starts, ends, ranks = _segment(text)
+        counts = self._counter.count_many([text[s:e] for s, e in zip(starts, ends)])
+        if max(counts) > self._max_tokens:
+            starts, ends, ranks, counts = self._split_oversized(text, starts, ends, ranks, counts)
+        return self._pack(starts, ends, ranks, counts)
+
+    async def chunk_stream(self, parts: AsyncIterable[str]) -> AsyncGenerator[str, None]:
+        """Chunk text arriving in parts (e.g. PDF pages, joined with newlines) like `chunk`."""
+        buffer = ""
+        first = True
+        async for part in parts:
+            buffer = part if first else buffer + "\n" + part
+            first = False
+            if len(buffer) < self._flush_chars:
+                continue
+            spans = self.chunk_spans(buffer)
+            # The last chunk may still grow with the next part; keep it buffered
+            for start, end in spans[:-1]:
+                piece = buffer[start:end].strip()
+                if piece:
+                    yield piece
+            buffer = buffer[spans[-1][0] :]
+        for piece in self.chunk(buffer):
+            yield piece
+
+    def _split_oversized(
+        self, text: str, starts: List[int], ends: List[int], ranks: List[int], counts: List[int]
+    ) -> Tuple[List[int], List[int], List[int], List[int]]:
+        """Break segments longer than the budget into words (and words into fixed slices)."""
+        new_starts: List[int] = []
+        new_ends: List[int] = []
+        new_ranks: List[int] = []
+        pending: List[int] = []  # indexes into new_* whose counts must be computed
+        new_counts: List[int] = []
+        for start, end, rank, count in zip(starts, ends, ranks, counts):
+            if count <= self._max_tokens:
+                new_starts.append(start)
+                new_ends.append(end)
+                new_ranks.append(rank)
+                new_counts.append(count)
+                continue
+            first_new = len(new_starts)
+            for match in _WORD_RE.finditer(text, start, end):
+                w_start, w_end = match.span()
+                # A token covers at least one character, so max_tokens characters always fit
+                for s in range(w_start, w_end, self._max_tokens):
+                    pending.append(len(new_starts))
+                    new_starts.append(s)
+                    new_ends.append(min(s + self._max_tokens, w_end))
+                    new_ranks.append(_RANK_WORD)
+                    new_counts.append(0)
+            if len(new_starts) > first_new:
+                new_ranks[-1] = rank
+        for index, count in zip(
+            pending, self._counter.count_many([text[new_starts[i] : new_ends[i]] for i in pending])
+        ):
+            new_counts[index] = count
+        return new_starts, new_ends, new_ranks, new_counts
+
+    def _pack(
+        self, starts: List[int], ends: List[int], ranks: List[int], counts: List[int]
+    ) -> List[Tuple[int, int]]:
+        prefix = [0, *accumulate(counts)]
+        n = len(counts)
+        spans: List[Tuple[int, int]] = []
+        i = 0
+        while i < n:
+            # Largest e with tokens(i..e) <= budget
+            e = max(bisect_right(prefix, prefix[i] + self._max_tokens, i + 1) - 1, i + 1)
+            if e < n:
+                # Prefer the strongest boundary that still keeps the chunk reasonably full
+                best, best_rank = e, ranks[e - 1]
+                floor = prefix[i] + self._min_fill_tokens
+                k = e - 1
+                while k > i and prefix[k] >= floor:
+                    if ranks[k - 1] > best_rank:
+                        best, best_rank = k, ranks[k - 1]
+                    k -= 1
+                e = best
+            spans.append((starts[i], ends[e - 1]))
+            if e >= n:
+                break
+            # Next chunk starts at the earliest segment whose tail fits in the overlap
+            i = bisect_left(prefix, prefix[e] - self._overlap_tokens, i + 1, e)
+        return spans
+
+
+def _segment(text: str) -> Tuple[List[int], List[int], List[int]]:
+    """Single regex pass producing segment offsets and the strength of the boundary ending each."""
+    starts: List[int] = []
+    ends: List[int] = []
+    ranks: List[int] = []
+    position = 0
+    for match in _BOUNDARY_RE.finditer(text):
+        end = match.end()
+        if end <= position:
+            continue
+        kind = match.lastgroup
+        if kind == "para" or (kind == "sent" and match.group().count("\n") >= 2):
+            rank = _RANK_PARAGRAPH
+        elif kind == "sent":
+            rank = _RANK_SENTENCE
+        else:
+            rank = _RANK_LINE
+        starts.append(position)
+        ends.append(end)
+        ranks.append(rank)
+        position = end
+    if position < len(text):
+        starts.append(position)
+        ends.append(len(text))
+        ranks.append(_RANK_PARAGRAPH)
+    return starts, ends, ranks
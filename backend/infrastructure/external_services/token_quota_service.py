@@ -0,0 +1,243 @@
+"""
+Token Quota Service
+
+Enforces daily token quotas per user (`user_daily_tokens`) and per bot
+(`BotModel.max_daily_usage`) over a sliding window, without touching the
+database on the chat path.
+
+Usage is counted in memory in fixed slots (`slot_seconds`). Every
+`flush_interval_seconds` a background task adds the aggregated deltas to
+`usage_counters` rows and reloads the window totals of the users and bots
+seen recently, which include the usage of every other worker. A check
+reads `last loaded total + local deltas not yet in it`, so it is a
+dictionary lookup.
+
+The price of staying off the hot path is a short lag: other workers' usage
+is seen one flush later, usage leaving the window is released at the next
+flush, and a user's first request after a restart is checked against
+local usage only until the next flush loads their total.
+Quotas can therefore be exceeded by roughly one flush interval of traffic.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from application.interfaces.ai_service import AIQuotaExceededError
+from infrastructure.database.models.bot import BotModel
+from infrastructure.database.models.usage_counter import UsageCounterModel
+
+logger = logging.getLogger(__name__)
+
+USER = "user"
+BOT = "bot"
+
+_Key = Tuple[str, int]
+_Deltas = Dict[_Key, Dict[int, int]]
+
+# Subjects per totals query
+_LOAD_BATCH = 500
+
+
+class TokenQuotaService:
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        user_daily_tokens: int = 0,
+        window_seconds: int = 86400,
+        slot_seconds: int = 600,
+        flush_interval_seconds: float = 5.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._session_maker = session_maker
+        # 0 means unlimited
+        self._user_daily_tokens = user_daily_tokens
+        self._window = window_seconds
+        self._slot = max(1, slot_seconds)
+        self._flush_interval = flush_interval_seconds
+        self._clock = clock
+        # Window totals of all workers as of the last flush
+        self._loaded: Dict[_Key, int] = {}
+        # Local usage not yet included in `_loaded`, by slot: not written yet, being written,
+        # and written but not reloaded yet
+        self._pending: _Deltas = {}
+        self._writing: _Deltas = {}
+        self._written: _Deltas = {}
+        # Subjects to keep totals for, with the time they were last seen
+        self._seen: Dict[_Key, float] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._last_prune = 0.0
+        self._rejected = 0
+        self._flushes = 0
+        self._flush_failures = 0
+
+    def usage(self, scope: str, subject_id: int) -> int:
+        """Tokens used over the window, as far as this worker knows."""
+        key = (scope, subject_id)
+        self._seen[key] = self._clock()
+        oldest = self._window_start()
+        local = sum(
+            tokens
+            for deltas in (self._pending, self._writing, self._written)
+            for slot, tokens in deltas.get(key, {}).items()
+            if slot >= oldest
+        )
+        return self._loaded.get(key, 0) + local
+
+    def check(self, user_id: int, bot: BotModel) -> None:
+        """
+        Raises:
+            AIQuotaExceededError: If the user or the bot has used up its daily tokens
+        """
+        if self._user_daily_tokens and self.usage(USER, user_id) >= self._user_daily_tokens:
+            self._rejected += 1
+            raise AIQuotaExceededError("Daily token quota reached, try again later")
+        if bot.is_usage_limit_reached(self.usage(BOT, bot.id)):
+            self._rejected += 1
+            raise AIQuotaExceededError(
+                "This bot has reached its daily usage limit, try again later"
+            )
+
+    def record(self, user_id: int, bot_id: int, tokens: int) -> None:
+        if tokens <= 0:
+            return
+        now = self._clock()
+        slot = int(now // self._slot) * self._slot
+        for key in ((USER, user_id), (BOT, bot_id)):
+            slots = self._pending.setdefault(key, {})
+            slots[slot] = slots.get(slot, 0) + tokens
+            self._seen[key] = now
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subjects": len(self._seen),
+            "pending_subjects": len(self._pending),
+            "rejected": self._rejected,
+            "flushes": self._flushes,
+            "flush_failures": self._flush_failures,
+        }
+
+    async def flush(self) -> None:
+        """Write local deltas and reload the totals of recently seen subjects."""
+        async with self._lock:
+            self._forget_idle()
+            self._writing, self._pending = self._pending, {}
+            try:
+                if self._writing:
+                    await self._write(self._writing)
+                _merge(self._written, self._writing)
+                self._writing = {}
+                totals = await self._load(list(self._seen))
+            except Exception as e:
+                self._flush_failures += 1
+                logger.warning("Flushing token usage failed: %s", e)
+                # Unwritten deltas are retried with the next flush
+                _merge(self._pending, self._writing)
+                self._writing = {}
+                return
+            self._loaded = totals
+            self._written = {}
+            self._flushes += 1
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self.flush()
+
+    async def _write(self, batch: _Deltas) -> None:
+        async with self._session_maker() as session:
+            for (scope, subject_id), slots in batch.items():
+                for slot, tokens in slots.items():
+                    await _add_tokens(session, scope, subject_id, slot, tokens)
+            now = self._clock()
+            if now - self._last_prune > self._window:
+                # Rows that can no longer fall inside the window
+                await session.execute(
+                    delete(UsageCounterModel).where(
+                        UsageCounterModel.slot_start < self._window_start() - self._slot
+                    )
+                )
+                self._last_prune = now
+            await session.commit()
+
+    async def _load(self, keys: List[_Key]) -> Dict[_Key, int]:
+        totals: Dict[_Key, int] = {}
+        if not keys:
+            return totals
+        oldest = self._window_start()
+        async with self._session_maker() as session:
+            for scope in (USER, BOT):
+                ids = [subject_id for key_scope, subject_id in keys if key_scope == scope]
+                for start in range(0, len(ids), _LOAD_BATCH):
+                    stmt = (
+                        select(UsageCounterModel.subject_id, func.sum(UsageCounterModel.tokens))
+                        .where(
+                            and_(
+                                UsageCounterModel.scope == scope,
+                                UsageCounterModel.subject_id.in_(ids[start : start + _LOAD_BATCH]),
+                                UsageCounterModel.slot_start >= oldest,
+                            )
+                        )
+                        .group_by(UsageCounterModel.subject_id)
+                    )
+                    for subject_id, tokens in (await session.execute(stmt)).all():
+                        totals[(scope, subject_id)] = int(tokens or 0)
+        return totals
+
+    def _window_start(self) -> int:
+        """Start of the oldest slot that still counts."""
+        return int((self._clock() - self._window) // self._slot + 1) * self._slot
+
+    def _forget_idle(self) -> None:
+        cutoff = self._clock() - self._window
+        for key in [key for key, seen in self._seen.items() if seen < cutoff]:
+            del self._seen[key]
+            self._loaded.pop(key, None)
+
+
+async def _add_tokens(
+    session: AsyncSession, scope: str, subject_id: int, slot: int, tokens: int
+) -> None:
+    """Add to the slot's row, creating it if needed (another worker may create it concurrently)."""
+    where = and_(
+        UsageCounterModel.scope == scope,
+        UsageCounterModel.subject_id == subject_id,
+        UsageCounterModel.slot_start == slot,
+    )
+    stmt = update(UsageCounterModel).where(where).values(tokens=UsageCounterModel.tokens + tokens)
+    result = await session.execute(stmt.execution_options(synchronize_session=False))
+    if result.rowcount:
+        return
+    try:
+        async with session.begin_nested():
+            session.add(
+                UsageCounterModel(
+                    scope=scope, subject_id=subject_id, slot_start=slot, tokens=tokens
+                )
+            )
+    except IntegrityError:
+        await session.execute(stmt.execution_options(synchronize_session=False))
+
+
+def _merge(into: _Deltas, deltas: _Deltas) -> None:
+    for key, slots in deltas.items():
+        target = into.setdefault(key, {})
+        for slot, tokens in slots.items():
+            target[slot] = target.get(slot, 0) + tokens
@@ -0,0 +1,150 @@
+"""
+Upload Storage Service
+
+Streams uploaded files to disk in fixed-size chunks while computing their
+sha256, so memory per upload stays constant regardless of file size.
+Uploads that exceed the configured size limit are aborted and removed.
+
+Files are content-addressed: a finished upload is stored as
+`upload_dir/<sha256[:2]>/<sha256><ext>`, so identical uploads share one file
+on disk and the digest identifies the document content. Because several
+documents can share a file, nothing deletes it inline: files that no document
+references are collected later by a sweep (`list_files` / `remove_if_older`),
+and reusing a file refreshes its mtime so the sweep leaves in-flight uploads
+alone.
+"""
+
+import hashlib
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, List, Protocol
+
+import aiofiles
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncReadable(Protocol):
+    def read(self, size: int = -1) -> Awaitable[bytes]:
+        ...
+
+
+@dataclass
+class StoredUpload:
+    """Result of persisting an upload."""
+
+    path: str
+    size_bytes: int
+    sha256: str
+    # False when identical content was already stored and the upload reused that file
+    created: bool = True
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+
+    def __init__(self, limit_bytes: int):
+        super().__init__(f"File exceeds maximum upload size of {limit_bytes // (1024 * 1024)} MB")
+        self.limit_bytes = limit_bytes
+
+
+class UploadStorageService:
+    def __init__(self, upload_dir: str, max_bytes: int, chunk_size: int = 1024 * 1024) -> None:
+        self._upload_dir = upload_dir
+        self._max_bytes = max_bytes
+        self._chunk_size = chunk_size
+        os.makedirs(upload_dir, exist_ok=True)
+
+    @property
+    def upload_dir(self) -> str:
+        return self._upload_dir
+
+    def path_for(self, sha256: str, extension: str = "") -> str:
+        return os.path.join(self._upload_dir, sha256[:2], sha256 + extension)
+
+    async def save(self, source: AsyncReadable, extension: str = "") -> StoredUpload:
+        """
+        Copy `source` into content-addressed storage chunk by chunk.
+
+        Data is written to a `.part` file and moved to its content path only
+        once the whole upload has been received within the limit; if that path
+        already exists the new copy is dropped and the existing file's mtime is
+        refreshed, keeping it out of the orphan sweep until the upload commits.
+
+        Raises:
+            UploadTooLargeError: If more than `max_bytes` are read
+        """
+        tmp_path = os.path.join(self._upload_dir, f"{uuid.uuid4().hex}.part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(tmp_path, "wb") as out:
+                while True:
+                    chunk = await source.read(self._chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self._max_bytes:
+                        raise UploadTooLargeError(self._max_bytes)
+                    digest.update(chunk)
+                    await out.write(chunk)
+            sha256 = digest.hexdigest()
+            dest_path = self.path_for(sha256, extension)
+            created = not _touch(dest_path)
+            if created:
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                os.replace(tmp_path, dest_path)
+            else:
+                _remove_quietly(tmp_path)
+        except BaseException:
+            _remove_quietly(tmp_path)
+            raise
+        return StoredUpload(path=dest_path, size_bytes=size, sha256=sha256, created=created)
+
+    def discard(self, stored: StoredUpload) -> None:
+        """Undo `save`; a file that existed before the upload is left in place."""
+        if stored.created:
+            _remove_quietly(stored.path)
+
+    def list_files(self, older_than_seconds: float) -> List[str]:
+        """Paths of stored files not written or reused within `older_than_seconds`."""
+        cutoff = time.time() - older_than_seconds
+        paths: List[str] = []
+        for entry in os.scandir(self._upload_dir):
+            if not entry.is_dir():
+                continue
+            for item in os.scandir(entry.path):
+                if item.is_file() and item.stat().st_mtime < cutoff:
+                    paths.append(item.path)
+        return paths
+
+    def remove_if_older(self, path: str, older_than_seconds: float) -> bool:
+        """Delete a stored file unless an upload reused it within `older_than_seconds`."""
+        try:
+            if os.stat(path).st_mtime >= time.time() - older_than_seconds:
+                return False
+        except FileNotFoundError:
+            return False
+        _remove_quietly(path)
+        return True
+
+
+def _touch(path: str) -> bool:
+    """Refresh the mtime of an existing file; False if it does not exist."""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("Failed to remove upload %s: %s", path, e)
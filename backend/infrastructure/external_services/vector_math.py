@@ -0,0 +1,86 @@
+"""
+Vector Math
+
+NumPy helpers shared by the vector store implementations: normalisation,
+top-k selection, the spherical k-means used to build IVF lists and scalar
+quantization of unit vectors.
+"""
+
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+# Rows scored per matrix product when assigning vectors to IVF lists
+ASSIGN_BLOCK_ROWS = 16384
+
+# Storage types for quantized vectors, with the largest code magnitude used
+QUANTIZED_DTYPES = {"int8": (np.int8, 127.0), "float16": (np.float16, 1.0)}
+
+# Vectors as accepted by the stores: nested sequences from the API or a NumPy matrix
+VectorRows = Union[Sequence[Sequence[float]], np.ndarray]
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    unit: np.ndarray = matrix / norms
+    return unit
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indexes of the k highest scores, best first."""
+    if k >= len(scores):
+        order: np.ndarray = np.argsort(-scores, kind="stable")
+        return order
+    part = np.argpartition(-scores, k - 1)[:k]
+    best: np.ndarray = part[np.argsort(-scores[part], kind="stable")]
+    return best
+
+
+def nearest_centroid(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = vectors[start : start + ASSIGN_BLOCK_ROWS]
+        out[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def spherical_kmeans(data: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(data), k * 64)
+    if sample_size < len(data):
+        data = data[rng.choice(len(data), sample_size, replace=False)]
+    centroids: np.ndarray = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = nearest_centroid(data, centroids)
+        counts = np.bincount(assign, minlength=k)
+        nonempty = np.flatnonzero(counts)
+        starts = (np.cumsum(counts) - counts)[nonempty]
+        sums = np.add.reduceat(data[np.argsort(assign, kind="stable")], starts, axis=0)
+        # Empty lists keep their previous centroid
+        centroids[nonempty] = normalize(sums)
+    return centroids
+
+
+def quantize(unit: np.ndarray, kind: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row scalar quantization: `codes[i] * scales[i]` approximates `unit[i]`."""
+    dtype, code_max = QUANTIZED_DTYPES[kind]
+    scales = (
+        (np.abs(unit).max(axis=1) / code_max).astype(np.float32)
+        if len(unit)
+        else np.ones(0, np.float32)
+    )
+    scales[scales == 0] = 1.0
+    codes = unit / scales[:, None]
+    if dtype is np.int8:
+        codes = np.clip(np.rint(codes), -code_max, code_max)
+    return codes.astype(dtype), scales
+
+
+def quantized_scores(codes: np.ndarray, scales: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Approximate `unit @ q` from quantized rows, widening one block at a time."""
+    out = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(codes[start : start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        out[start : start + len(block)] = (block @ q) * scales[start : start + len(block)]
+    return out
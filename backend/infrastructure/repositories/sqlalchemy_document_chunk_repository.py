@@ -0,0 +1,85 @@
+"""
+Infrastructure Repository - SqlAlchemyDocumentChunkRepository
+
+Persists chunk text for ingested documents and resolves vector search hits
+(chunk ids) back to their content. Each chunk stores the sha256 of its text
+(see `hash_chunk`) so re-ingestion can keep chunks that did not change.
+"""
+
+import hashlib
+import logging
+from typing import List, Optional, Sequence
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infrastructure.database.models.document_chunk import DocumentChunkModel
+
+logger = logging.getLogger(__name__)
+
+
+def hash_chunk(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class SqlAlchemyDocumentChunkRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add_many(
+        self,
+        document_id: int,
+        bot_id: Optional[int],
+        contents: Sequence[str],
+        indexes: Optional[Sequence[int]] = None,
+    ) -> List[DocumentChunkModel]:
+        """Add chunks at the given chunk indexes (0..n-1 when omitted)."""
+        try:
+            models = [
+                DocumentChunkModel(
+                    document_id=document_id,
+                    bot_id=bot_id,
+                    chunk_index=i,
+                    content=content,
+                    content_sha256=hash_chunk(content),
+                )
+                for i, content in zip(
+                    indexes if indexes is not None else range(len(contents)), contents
+                )
+            ]
+            self.session.add_all(models)
+            await self.session.flush()
+            return models
+        except SQLAlchemyError as e:
+            logger.error("Error adding document chunks: %s", e)
+            await self.session.rollback()
+            raise
+
+    async def get_many(self, chunk_ids: Sequence[int]) -> List[DocumentChunkModel]:
+        """Return chunks in the order of `chunk_ids`, skipping ids that no longer exist."""
+        if not chunk_ids:
+            return []
+        stmt = select(DocumentChunkModel).where(DocumentChunkModel.id.in_(list(chunk_ids)))
+        result = await self.session.execute(stmt)
+        by_id = {model.id: model for model in result.scalars().all()}
+        return [by_id[i] for i in chunk_ids if i in by_id]
+
+    async def list_by_documents(self, document_ids: Sequence[int]) -> List[DocumentChunkModel]:
+        if not document_ids:
+            return []
+        stmt = (
+            select(DocumentChunkModel)
+            .where(DocumentChunkModel.document_id.in_(list(document_ids)))
+            .order_by(DocumentChunkModel.document_id, DocumentChunkModel.chunk_index)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def delete_many(self, chunk_ids: Sequence[int]) -> None:
+        if not chunk_ids:
+            return
+        await self.session.execute(
+            delete(DocumentChunkModel).where(DocumentChunkModel.id.in_(list(chunk_ids)))
+        )
+        await self.session.flush()
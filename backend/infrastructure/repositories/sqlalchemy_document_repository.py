@@ -5,7 +5,7 @@ Provides CRUD operations for DocumentModel and maps to simple dicts for app laye
 """
 
 import logging
-from typing import Optional, Sequence, Dict, Any
+from typing import Optional, Sequence, Set, Dict, Any
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -49,6 +49,65 @@ class SqlAlchemyDocumentRepository:
         result = await self.session.execute(stmt)
         return list(result.scalars().all())
 
+    async def list_by_bot(
+        self, bot_id: int, status: Optional[str] = None
+    ) -> Sequence[DocumentModel]:
+        stmt = select(DocumentModel).where(DocumentModel.bot_id == bot_id)
+        if status is not None:
+            stmt = stmt.where(DocumentModel.status == status)
+        result = await self.session.execute(stmt.order_by(DocumentModel.id))
+        return list(result.scalars().all())
+
+    async def get_by_content_hash(
+        self, owner_id: int, bot_id: Optional[int], content_sha256: str
+    ) -> Optional[DocumentModel]:
+        """Newest document of this owner and bot with the given content that has not failed."""
+        stmt = (
+            select(DocumentModel)
+            .where(
+                DocumentModel.owner_id == owner_id,
+                (
+                    DocumentModel.bot_id == bot_id
+                    if bot_id is not None
+                    else DocumentModel.bot_id.is_(None)
+                ),
+                DocumentModel.content_sha256 == content_sha256,
+                DocumentModel.status != "failed",
+            )
+            .order_by(DocumentModel.id.desc())
+            .limit(1)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_processed_by_hash(
+        self, content_sha256: str, exclude_id: int
+    ) -> Optional[DocumentModel]:
+        """Any other processed document with the given content, whose chunks can be copied."""
+        stmt = (
+            select(DocumentModel)
+            .where(
+                DocumentModel.content_sha256 == content_sha256,
+                DocumentModel.status == "processed",
+                DocumentModel.id != exclude_id,
+            )
+            .limit(1)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def referenced_file_paths(self, file_paths: Sequence[str]) -> Set[str]:
+        """The subset of `file_paths` that some document still points at."""
+        if not file_paths:
+            return set()
+        stmt = (
+            select(DocumentModel.file_path)
+            .where(DocumentModel.file_path.in_(file_paths))
+            .distinct()
+        )
+        result = await self.session.execute(stmt)
+        return set(result.scalars())
+
     async def update_status(self, doc_id: int, status: str, error_message: Optional[str] = None) -> Optional[DocumentModel]:
         model = await self.get_by_id(doc_id)
         if not model:
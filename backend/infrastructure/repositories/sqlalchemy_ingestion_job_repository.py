@@ -0,0 +1,142 @@
+"""
+Infrastructure Repository - SqlAlchemyIngestionJobRepository
+
+Persists and claims background document ingestion jobs. Claiming uses
+SELECT ... FOR UPDATE SKIP LOCKED so several workers (or processes) can
+share one jobs table without handing the same job out twice.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from infrastructure.database.models.ingestion_job import IngestionJobModel
+
+logger = logging.getLogger(__name__)
+
+
+class SqlAlchemyIngestionJobRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, data: Dict[str, Any]) -> IngestionJobModel:
+        try:
+            model = IngestionJobModel(**data)
+            self.session.add(model)
+            await self.session.flush()
+            await self.session.refresh(model)
+            return model
+        except SQLAlchemyError as e:
+            logger.error("Error adding ingestion job: %s", e)
+            await self.session.rollback()
+            raise
+
+    async def get_by_id(self, job_id: int) -> Optional[IngestionJobModel]:
+        stmt = select(IngestionJobModel).where(IngestionJobModel.id == job_id)
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def claim_next(self) -> Optional[IngestionJobModel]:
+        """Mark the oldest queued job as running and return it (None if the queue is empty).
+
+        Jobs for a document that another job is still ingesting wait their turn.
+        """
+        running = aliased(IngestionJobModel)
+        busy = (
+            select(running.id)
+            .where(
+                running.document_id == IngestionJobModel.document_id, running.status == "running"
+            )
+            .exists()
+        )
+        stmt = (
+            select(IngestionJobModel)
+            .where(IngestionJobModel.status == "queued", ~busy)
+            .order_by(IngestionJobModel.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.execute(stmt)
+        model = result.scalar_one_or_none()
+        if not model:
+            return None
+        # Conditional update: where SKIP LOCKED is unavailable (SQLite) another worker may have
+        # selected the same job, and only one of them gets to flip it to running
+        claimed = await self.session.execute(
+            update(IngestionJobModel)
+            .where(IngestionJobModel.id == model.id, IngestionJobModel.status == "queued")
+            .values(
+                status="running",
+                attempts=IngestionJobModel.attempts + 1,
+                started_at=datetime.now(timezone.utc),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if not claimed.rowcount:
+            return None
+        await self.session.refresh(model)
+        return model
+
+    async def mark_done(self, job_id: int) -> None:
+        await self._finish(job_id, "done", None)
+
+    async def mark_failed(self, job_id: int, error_message: str) -> Optional[IngestionJobModel]:
+        """Re-queue the job if it has attempts left, otherwise mark it failed."""
+        model = await self.get_by_id(job_id)
+        if not model:
+            return None
+        if model.attempts < model.max_attempts:
+            model.status = "queued"
+            model.error_message = error_message
+            model.started_at = None
+            await self.session.flush()
+            return model
+        return await self._finish(job_id, "failed", error_message)
+
+    async def requeue_stale(self, started_before: datetime) -> Tuple[int, List[IngestionJobModel]]:
+        """Return running jobs whose worker died (e.g. process restart) to the queue.
+
+        Jobs that have used up their attempts are marked failed instead, so a job that
+        takes the process down with it is not retried forever. Returns the number of
+        re-queued jobs and the jobs that were failed.
+        """
+        stale = (
+            IngestionJobModel.status == "running",
+            IngestionJobModel.started_at < started_before,
+        )
+        result = await self.session.execute(
+            select(IngestionJobModel).where(
+                *stale, IngestionJobModel.attempts >= IngestionJobModel.max_attempts
+            )
+        )
+        failed = list(result.scalars())
+        for model in failed:
+            model.status = "failed"
+            model.error_message = "Worker stopped before ingestion finished"
+            model.finished_at = datetime.now(timezone.utc)
+        await self.session.flush()
+
+        stmt = (
+            update(IngestionJobModel)
+            .where(*stale, IngestionJobModel.attempts < IngestionJobModel.max_attempts)
+            .values(status="queued", started_at=None)
+        )
+        result = await self.session.execute(stmt)
+        return int(result.rowcount or 0), failed
+
+    async def _finish(
+        self, job_id: int, status: str, error_message: Optional[str]
+    ) -> Optional[IngestionJobModel]:
+        model = await self.get_by_id(job_id)
+        if not model:
+            return None
+        model.status = status
+        model.error_message = error_message
+        model.finished_at = datetime.now(timezone.utc)
+        await self.session.flush()
+        return model
@@ -0,0 +1,60 @@
+"""
+Infrastructure Repository - SqlAlchemyMessageRepository
+
+Persists conversation messages and loads recent history for prompting.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infrastructure.database.models.conversation import MessageModel
+
+logger = logging.getLogger(__name__)
+
+
+class SqlAlchemyMessageRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def add(self, data: Dict[str, Any]) -> MessageModel:
+        try:
+            model = MessageModel(**data)
+            self.session.add(model)
+            await self.session.flush()
+            return model
+        except SQLAlchemyError as e:
+            logger.error("Error adding message: %s", e)
+            await self.session.rollback()
+            raise
+
+    async def list_recent(
+        self, conversation_id: int, limit: int = 20, after_id: Optional[int] = None
+    ) -> List[MessageModel]:
+        """Latest `limit` messages of a conversation newer than `after_id`, oldest first."""
+        stmt = select(MessageModel).where(MessageModel.conversation_id == conversation_id)
+        if after_id is not None:
+            stmt = stmt.where(MessageModel.id > after_id)
+        result = await self.session.execute(stmt.order_by(MessageModel.id.desc()).limit(limit))
+        return list(reversed(result.scalars().all()))
+
+    async def list_after(
+        self, conversation_id: int, after_id: Optional[int], limit: int
+    ) -> List[MessageModel]:
+        """Return up to `limit` messages newer than `after_id`, oldest first."""
+        stmt = select(MessageModel).where(MessageModel.conversation_id == conversation_id)
+        if after_id is not None:
+            stmt = stmt.where(MessageModel.id > after_id)
+        result = await self.session.execute(stmt.order_by(MessageModel.id).limit(limit))
+        return list(result.scalars().all())
+
+    async def count_after(self, conversation_id: int, after_id: Optional[int]) -> int:
+        stmt = select(func.count(MessageModel.id)).where(
+            MessageModel.conversation_id == conversation_id
+        )
+        if after_id is not None:
+            stmt = stmt.where(MessageModel.id > after_id)
+        return (await self.session.execute(stmt)).scalar_one()
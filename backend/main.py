@@ -48,7 +48,7 @@ from presentation.api.document_router import router as document_router
 from presentation.api.analytics_router import router as analytics_router
 from presentation.api.widget_router import router as widget_router
 from presentation.api.import_export_router import router as import_export_router
-from presentation.api.websocket_router import router as websocket_router
+from presentation.api.websocket_router import router as websocket_router, manager as ws_manager
 
 # Presentation layer middleware
 from presentation.middleware.logging_middleware import LoggingMiddleware
@@ -252,14 +252,14 @@ async def readiness_check():
         # Check database connectivity
         # Implementation would test actual connections
         
-        # Check external services
-        # Implementation would ping external APIs
+        # Check external services (reports degraded while the AI circuit breaker is open)
+        ai_healthy = await composition_root.get_ai_service().check_service_health()
         
         return {
             "status": "ready",
             "checks": {
                 "database": "healthy",
-                "external_services": "healthy",
+                "external_services": "healthy" if ai_healthy else "degraded",
                 "dependencies": "healthy"
             }
         }
@@ -274,6 +274,19 @@ async def readiness_check():
         )
 
 
+@app.get("/health/metrics", tags=["health"])
+async def metrics():
+    """
+    Internal service counters (e.g. embedding batch fill ratio).
+
+    Returns:
+        Counters grouped by service, or 404 when metrics are disabled
+    """
+    if not settings.monitoring.enable_metrics:
+        return JSONResponse(status_code=404, content={"detail": "Metrics are disabled"})
+    return {**composition_root.get_metrics(), "websockets": ws_manager.stats()}
+
+
 @app.get("/health/live", tags=["health"])
 async def liveness_check():
     """
@@ -15,6 +15,10 @@ from infrastructure.database.models.base import Base
 from infrastructure.database.models.user import UserModel
 from infrastructure.database.models.bot import BotModel
 from infrastructure.database.models.conversation import ConversationModel, MessageModel
+from infrastructure.database.models.document import DocumentModel
+from infrastructure.database.models.ingestion_job import IngestionJobModel
+from infrastructure.database.models.document_chunk import DocumentChunkModel
+from infrastructure.database.models.usage_counter import UsageCounterModel
 
 # Import our settings to get database URL
 from infrastructure.config.settings import Settings
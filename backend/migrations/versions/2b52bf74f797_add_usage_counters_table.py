@@ -0,0 +1,38 @@
+"""Add usage_counters table for daily token quotas
+
+Revision ID: 2b52bf74f797
+Revises: 9f4befe05339
+Create Date: 2026-10-16 21:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b52bf74f797'
+down_revision: Union[str, None] = '9f4befe05339'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('usage_counters',
+    sa.Column('scope', sa.String(length=10), nullable=False),
+    sa.Column('subject_id', sa.Integer(), nullable=False),
+    sa.Column('slot_start', sa.Integer(), nullable=False),
+    sa.Column('tokens', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scope', 'subject_id', 'slot_start', name='uq_usage_counters_slot')
+    )
+    op.create_index('idx_usage_counters_slot_start', 'usage_counters', ['slot_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_usage_counters_slot_start', table_name='usage_counters')
+    op.drop_table('usage_counters')
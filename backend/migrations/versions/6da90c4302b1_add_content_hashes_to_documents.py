@@ -0,0 +1,62 @@
+"""Add content hashes to documents and document_chunks
+
+Revision ID: 6da90c4302b1
+Revises: aa62e046ef53
+Create Date: 2026-10-16 20:47:00.000000
+
+The documents table predates the migrations and was created from the models,
+so it is created here on databases that only ever ran `alembic upgrade`.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6da90c4302b1'
+down_revision: Union[str, None] = 'aa62e046ef53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_documents_table() -> bool:
+    # Offline (--sql) scripts cannot inspect; they target databases built by these migrations alone
+    if context.is_offline_mode():
+        return False
+    return sa.inspect(op.get_bind()).has_table('documents')
+
+
+def upgrade() -> None:
+    if _has_documents_table():
+        op.add_column('documents', sa.Column('content_sha256', sa.String(length=64), nullable=True))
+    else:
+        op.create_table('documents',
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('bot_id', sa.Integer(), nullable=True),
+        sa.Column('file_name', sa.String(length=255), nullable=False),
+        sa.Column('file_path', sa.String(length=1024), nullable=False),
+        sa.Column('file_type', sa.String(length=50), nullable=False),
+        sa.Column('file_size_bytes', sa.Integer(), nullable=False),
+        sa.Column('content_sha256', sa.String(length=64), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('idx_documents_bot', 'documents', ['bot_id'], unique=False)
+        op.create_index('idx_documents_owner', 'documents', ['owner_id'], unique=False)
+        op.create_index('idx_documents_status', 'documents', ['status'], unique=False)
+        op.create_index(op.f('ix_documents_bot_id'), 'documents', ['bot_id'], unique=False)
+        op.create_index(op.f('ix_documents_owner_id'), 'documents', ['owner_id'], unique=False)
+    op.create_index('idx_documents_content_sha256', 'documents', ['content_sha256'], unique=False)
+    op.add_column('document_chunks', sa.Column('content_sha256', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    # The documents table itself is left in place, as it may predate this revision
+    op.drop_column('document_chunks', 'content_sha256')
+    op.drop_index('idx_documents_content_sha256', table_name='documents')
+    op.drop_column('documents', 'content_sha256')
@@ -0,0 +1,26 @@
+"""Add summary_through_message_id to conversations
+
+Revision ID: 9f4befe05339
+Revises: f19aa9bf52d1
+Create Date: 2026-10-16 21:06:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f4befe05339'
+down_revision: Union[str, None] = 'f19aa9bf52d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('conversations', sa.Column('summary_through_message_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('conversations', 'summary_through_message_id')
@@ -0,0 +1,41 @@
+"""Add document_chunks table for ingested chunk text
+
+Revision ID: aa62e046ef53
+Revises: b0a47d867171
+Create Date: 2026-10-16 20:31:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'aa62e046ef53'
+down_revision: Union[str, None] = 'b0a47d867171'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('document_chunks',
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('bot_id', sa.Integer(), nullable=True),
+    sa.Column('chunk_index', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_document_chunks_document_index', 'document_chunks', ['document_id', 'chunk_index'], unique=False)
+    op.create_index(op.f('ix_document_chunks_bot_id'), 'document_chunks', ['bot_id'], unique=False)
+    op.create_index(op.f('ix_document_chunks_document_id'), 'document_chunks', ['document_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_document_chunks_document_id'), table_name='document_chunks')
+    op.drop_index(op.f('ix_document_chunks_bot_id'), table_name='document_chunks')
+    op.drop_index('idx_document_chunks_document_index', table_name='document_chunks')
+    op.drop_table('document_chunks')
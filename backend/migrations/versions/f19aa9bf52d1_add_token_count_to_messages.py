@@ -0,0 +1,27 @@
+"""Add token_count to messages for context packing
+
+Revision ID: f19aa9bf52d1
+Revises: 6da90c4302b1
+Create Date: 2026-10-16 21:04:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f19aa9bf52d1'
+down_revision: Union[str, None] = '6da90c4302b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable: existing rows are backfilled the first time they are loaded
+    op.add_column('messages', sa.Column('token_count', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('messages', 'token_count')
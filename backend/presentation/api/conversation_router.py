@@ -6,10 +6,13 @@ Conversation endpoints using integer IDs and GET/POST pattern:
 - GET /conversations/{id}: retrieve single conversation
 - GET /conversations: list conversations
 - GET /conversations/delete/{id}: delete conversation by id
+- POST /conversations/{id}/messages/stream: send a message, reply streamed as SSE
 """
 
-from typing import Optional, List, Dict, Any
+import json
+from typing import AsyncGenerator, Optional, List, Dict, Any
 from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from presentation.api.user_router import get_current_user_id
 from application.use_cases.conversation.create_conversation_use_case import CreateConversationUseCase
@@ -22,8 +25,15 @@ from application.dtos.conversation_dtos import (
     UpdateConversationRequestDTO,
     DeleteConversationRequestDTO,
 )
-from application.exceptions.application_exceptions import ValidationException, AuthorizationException
+from application.exceptions.application_exceptions import (
+    ValidationException,
+    AuthorizationException,
+    ResourceNotFoundException,
+)
+from application.interfaces.ai_service import AIQuotaExceededError
+from infrastructure.external_services.chat_stream_service import ChatStreamEvent, ChatStreamService
 from composition_root import (
+    get_chat_stream_service,
     get_create_conversation_use_case,
     get_list_conversations_use_case,
     get_update_conversation_use_case,
@@ -148,3 +158,45 @@ async def delete_conversation(
     except (ValidationException, AuthorizationException) as e:
         raise HTTPException(status_code=422, detail=str(e))
 
+
+class MessagePayload(BaseModel):
+    message: str = Field(..., min_length=1, max_length=10000)
+
+
+def _sse(event: ChatStreamEvent) -> str:
+    return f"event: {event.event}\ndata: {json.dumps(event.data)}\n\n"
+
+
+@router.post("/{conversation_id}/messages/stream")
+async def stream_message(
+    conversation_id: int,
+    payload: MessagePayload,
+    current_user_id: int = Depends(get_current_user_id),
+    chat: ChatStreamService = Depends(get_chat_stream_service),
+) -> StreamingResponse:
+    """
+    Send a message and stream the assistant reply as Server-Sent Events.
+
+    Events: `start`, one `token` per chunk, then `done` (after the reply is
+    stored) or `error`. Each event is written as soon as it is produced; a
+    client that disconnects stops generation.
+    """
+    try:
+        turn = await chat.start_turn(current_user_id, conversation_id, payload.message)
+    except ValidationException as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ResourceNotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except AIQuotaExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    async def events() -> AsyncGenerator[str, None]:
+        async for event in chat.stream(turn):
+            yield _sse(event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
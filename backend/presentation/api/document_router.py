@@ -1,23 +1,40 @@
 """
 Document Upload API Router
 
-Provides endpoints for uploading documents to train bots.
+Provides endpoints for uploading documents to train bots. Uploads are persisted
+and queued; extraction, chunking and embedding run in the background ingestion
+workers, which report progress over the training WebSocket.
 """
 
 import os
-import uuid
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, status, Depends
+from fastapi import (
+    APIRouter, UploadFile, File, Form, HTTPException, Query, Response, status, Depends
+)
 
 from presentation.api.user_router import get_current_user_id
-from composition_root import get_database_session
-from infrastructure.external_services.document_processor_service import DocumentProcessorService
-from presentation.api.websocket_router import manager as ws_manager
+from application.interfaces.knowledge_retrieval import IKnowledgeRetrievalService
+from composition_root import (
+    get_database_session,
+    get_ingestion_service,
+    get_knowledge_retrieval_service,
+    get_upload_storage,
+)
+from infrastructure.config.settings import get_settings
+from infrastructure.external_services.document_ingestion_service import DocumentIngestionService
+from infrastructure.external_services.upload_storage_service import (
+    UploadStorageService,
+    UploadTooLargeError,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from infrastructure.repositories.sqlalchemy_bot_repository import SqlAlchemyBotRepository
 from infrastructure.repositories.sqlalchemy_document_repository import SqlAlchemyDocumentRepository
+from infrastructure.repositories.sqlalchemy_ingestion_job_repository import (
+    SqlAlchemyIngestionJobRepository,
+)
 
 
 logger = logging.getLogger(__name__)
@@ -29,64 +46,167 @@ router = APIRouter(
 
 
 ALLOWED_EXTS = {".pdf", ".txt", ".md"}
-UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "documents", "uploads")
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
-@router.post("/upload", status_code=status.HTTP_200_OK)
+@router.post("/upload", status_code=status.HTTP_202_ACCEPTED)
 async def upload_document(
+    response: Response,
     file: UploadFile = File(...),
+    bot_id: Optional[int] = Form(None),
+    document_id: Optional[int] = Form(None),
     current_user_id: int = Depends(get_current_user_id),
     session: AsyncSession = Depends(get_database_session),
+    ingestion: DocumentIngestionService = Depends(get_ingestion_service),
+    storage: UploadStorageService = Depends(get_upload_storage),
 ) -> Dict[str, Any]:
+    """
+    Upload a document, or new content for an existing one when `document_id` is given.
+
+    Content the owner already uploaded for the same bot resolves to the existing
+    document without queuing any work; replacing a document re-ingests it
+    incrementally, embedding only chunks that changed.
+    """
     # Validate file
     _, ext = os.path.splitext(file.filename or "")
     ext = ext.lower()
     if ext not in ALLOWED_EXTS:
         raise HTTPException(status_code=400, detail=f"Unsupported file type: {ext}")
 
-    # Persist file to disk
-    file_id = str(uuid.uuid4())
-    safe_name = f"{current_user_id}_{file_id}{ext}"
-    dest_path = os.path.join(UPLOAD_DIR, safe_name)
-    content = await file.read()
-    if not content:
+    repo = SqlAlchemyDocumentRepository(session)
+    existing = None
+    if document_id is not None:
+        existing = await repo.get_by_id(document_id)
+        if not existing or existing.owner_id != current_user_id:
+            raise HTTPException(status_code=404, detail="Document not found")
+        bot_id = existing.bot_id
+
+    # Chunks of documents attached to a bot are indexed into that bot's knowledge base
+    if bot_id is not None and existing is None:
+        bot = await SqlAlchemyBotRepository(session).get_by_id(bot_id)
+        if not bot or bot.owner_id.value != current_user_id:
+            raise HTTPException(status_code=404, detail="Bot not found")
+
+    # Stream file to content-addressed storage in fixed-size chunks, enforcing the size limit
+    try:
+        stored = await storage.save(file, ext)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    if not stored.size_bytes:
+        storage.discard(stored)
         raise HTTPException(status_code=400, detail="Empty file")
-    with open(dest_path, "wb") as f:
-        f.write(content)
 
-    # Save metadata
-    repo = SqlAlchemyDocumentRepository(session)
-    model = await repo.add(
+    # Same bytes as a document we already have: nothing to do, unless its ingestion failed
+    duplicate = None
+    if (
+        existing is not None
+        and existing.content_sha256 == stored.sha256
+        and existing.status != "failed"
+    ):
+        duplicate = existing
+    if existing is None:
+        duplicate = await repo.get_by_content_hash(current_user_id, bot_id, stored.sha256)
+    if duplicate is not None:
+        response.status_code = status.HTTP_200_OK
+        return {
+            "document_id": duplicate.id,
+            "job_id": None,
+            "bot_id": duplicate.bot_id,
+            "file_name": duplicate.file_name,
+            "file_size_bytes": duplicate.file_size_bytes,
+            "sha256": stored.sha256,
+            "status": duplicate.status,
+            "duplicate": True,
+            "message": "Document content already uploaded",
+        }
+
+    # Save metadata and the ingestion job in one transaction
+    fields = {
+        "file_name": file.filename or f"{stored.sha256}{ext}",
+        "file_path": stored.path,
+        "file_type": ext,
+        "file_size_bytes": stored.size_bytes,
+        "content_sha256": stored.sha256,
+        "status": "queued",
+        "error_message": None,
+    }
+    if existing is not None:
+        # The previous file is left for the ingestion service's orphan sweep: another
+        # upload of the same bytes may be about to reference it again
+        for key, value in fields.items():
+            setattr(existing, key, value)
+        model = existing
+    else:
+        model = await repo.add({"owner_id": current_user_id, "bot_id": bot_id, **fields})
+    job = await SqlAlchemyIngestionJobRepository(session).add(
         {
+            "document_id": model.id,
             "owner_id": current_user_id,
-            "bot_id": None,
-            "file_name": file.filename or safe_name,
-            "file_path": dest_path,
-            "file_type": ext,
-            "file_size_bytes": len(content),
-            "status": "uploaded",
-            "error_message": None,
+            "status": "queued",
+            "max_attempts": get_settings().ingestion.max_attempts,
         }
     )
-
-    # Kick off lightweight processing (synchronous for demo)
-    processor = DocumentProcessorService()
-    extracted = None
-    if ext == ".pdf":
-        extracted = await processor.extract_text_from_pdf(dest_path)
-    elif ext in {".txt", ".md"}:
-        extracted = content.decode("utf-8", errors="ignore")
-    chunks = processor.chunk_text(extracted or "") if extracted else []
-    await repo.update_status(model.id, "processed", None)
-    await ws_manager.send_to_user(current_user_id, f"document:{model.id}:processed:{len(chunks)}")
+    # Commit before waking the workers so they can see the job
+    await session.commit()
+    ingestion.notify()
 
     return {
         "document_id": model.id,
+        "job_id": job.id,
+        "bot_id": model.bot_id,
         "file_name": model.file_name,
-        "status": "processed",
-        "chunks": len(chunks),
-        "message": "Document uploaded and processed",
+        "file_size_bytes": stored.size_bytes,
+        "sha256": stored.sha256,
+        "status": "queued",
+        "duplicate": False,
+        "message": "Document uploaded and queued for processing",
+    }
+
+
+@router.get("/search", status_code=status.HTTP_200_OK)
+async def search_knowledge(
+    bot_id: int = Query(...),
+    q: str = Query(..., min_length=1, max_length=1000),
+    top_k: Optional[int] = Query(None, ge=1, le=50),
+    current_user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_database_session),
+    retrieval: IKnowledgeRetrievalService = Depends(get_knowledge_retrieval_service),
+) -> Dict[str, Any]:
+    """Search a bot's knowledge base with hybrid vector + keyword retrieval."""
+    bot = await SqlAlchemyBotRepository(session).get_by_id(bot_id)
+    if not bot or bot.owner_id.value != current_user_id:
+        raise HTTPException(status_code=404, detail="Bot not found")
+
+    chunks = await retrieval.retrieve(bot_id, q, top_k or get_settings().retrieval.top_k)
+    return {
+        "bot_id": bot_id,
+        "query": q,
+        "results": [
+            {
+                "chunk_id": chunk.chunk_id,
+                "document_id": chunk.document_id,
+                "content": chunk.content,
+                "score": chunk.score,
+                "vector_rank": chunk.vector_rank,
+                "keyword_rank": chunk.keyword_rank,
+            }
+            for chunk in chunks
+        ],
     }
 
 
+@router.get("/{document_id}", status_code=status.HTTP_200_OK)
+async def get_document_status(
+    document_id: int,
+    current_user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_database_session),
+) -> Dict[str, Any]:
+    model = await SqlAlchemyDocumentRepository(session).get_by_id(document_id)
+    if not model or model.owner_id != current_user_id:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {
+        "document_id": model.id,
+        "file_name": model.file_name,
+        "bot_id": model.bot_id,
+        "status": model.status,
+        "error_message": model.error_message,
+    }
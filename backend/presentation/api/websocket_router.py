@@ -1,49 +1,208 @@
 """
 WebSocket Router
 
-Connection manager to broadcast training/progress events to clients per user.
+Connection manager to broadcast training/progress events to clients per user,
+and a multiplexed chat channel.
+
+Chat protocol (`/ws/chat?token=<access token>`, JSON text frames):
+- client -> server:
+  {"type": "message", "conversation_id": 1, "content": "..."}
+  {"type": "cancel", "conversation_id": 1}
+  {"type": "ping"}
+- server -> client: the streamed turn events tagged by conversation,
+  {"type": "start" | "token" | "done" | "error", "conversation_id": 1, ...}
+  and {"type": "pong"}.
+
+Replies for different conversations stream concurrently over the same
+socket; each conversation has at most one reply in flight.
 """
 
 import asyncio
-from typing import Dict, Set
+import json
+import logging
+from contextlib import aclosing
+from typing import Any, Dict, Optional, Set
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, status
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from application.exceptions.application_exceptions import (
+    ResourceNotFoundException,
+    ValidationException,
+)
+from application.interfaces.ai_service import AIQuotaExceededError
+from application.interfaces.auth_service import IAuthService, TokenValidationError
+from application.interfaces.message_backplane import IMessageBackplane
+from composition_root import get_auth_service, get_chat_stream_service
+from infrastructure.external_services.chat_stream_service import ChatStreamService, ChatTurn
+
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter(prefix="/ws", tags=["websocket"], include_in_schema=False)
 
 
+class Outbox:
+    """
+    Bounded outbound queue of one socket, drained by its own writer task.
+
+    `offer` never waits: when the queue is full it either closes the socket
+    (`overflow="disconnect"`) or discards the oldest queued message
+    (`overflow="drop_oldest"`). `put` waits for room instead, which passes
+    the client's pace back to the producer.
+    """
+
+    def __init__(self, ws: WebSocket, max_queue: int = 256, overflow: str = "disconnect") -> None:
+        if overflow not in ("disconnect", "drop_oldest"):
+            raise ValueError("overflow must be 'disconnect' or 'drop_oldest'")
+        self.ws = ws
+        self._overflow = overflow
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue(max(1, max_queue))
+        self._writer = asyncio.create_task(self._drain())
+        self._closing: Optional[asyncio.Task] = None
+        self.closed = False
+        self.dropped = 0
+        self.overflowed = False
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def offer(self, message: str) -> bool:
+        """Queue a message without waiting; False when it was not queued."""
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            pass
+        if self._overflow == "drop_oldest":
+            self._queue.get_nowait()
+            self._queue.put_nowait(message)
+            self.dropped += 1
+            return True
+        self.dropped += 1
+        self.overflowed = True
+        self._closing = asyncio.create_task(self.close(code=status.WS_1013_TRY_AGAIN_LATER))
+        return False
+
+    async def put(self, message: str) -> None:
+        if self.closed:
+            raise ConnectionError("WebSocket is closed")
+        await self._queue.put(message)
+
+    async def close(self, code: Optional[int] = None) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._writer.cancel()
+        # Release producers blocked in put()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        if code is not None:
+            try:
+                await self.ws.close(code=code)
+            except Exception:
+                pass
+
+    async def _drain(self) -> None:
+        try:
+            while True:
+                await self.ws.send_text(await self._queue.get())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug("WebSocket send failed: %s", e)
+            self.closed = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+
+
 class WebSocketManager:
-    def __init__(self) -> None:
-        self._user_connections: Dict[int, Set[WebSocket]] = {}
-        self._lock = asyncio.Lock()
+    """
+    Per-user fan-out of progress messages.
+
+    Sending only queues the message on each connection's `Outbox`, so one
+    slow client never delays delivery to the others. With a backplane
+    attached, messages are also published to the other workers, which
+    deliver them to the sockets they hold.
+    """
+
+    def __init__(self, max_queue: int = 256, overflow: str = "disconnect") -> None:
+        self._user_connections: Dict[int, Dict[WebSocket, Outbox]] = {}
+        self._max_queue = max_queue
+        self._overflow = overflow
+        self._slow_disconnects = 0
+        self._dropped = 0
+        self._backplane: Optional[IMessageBackplane] = None
+        self._publish_failures = 0
+
+    async def attach_backplane(self, backplane: IMessageBackplane) -> None:
+        await backplane.start(self._deliver)
+        self._backplane = backplane
 
     async def connect(self, user_id: int, ws: WebSocket) -> None:
         await ws.accept()
-        async with self._lock:
-            self._user_connections.setdefault(user_id, set()).add(ws)
+        outbox = Outbox(ws, self._max_queue, self._overflow)
+        self._user_connections.setdefault(user_id, {})[ws] = outbox
 
     async def disconnect(self, user_id: int, ws: WebSocket) -> None:
-        async with self._lock:
-            conns = self._user_connections.get(user_id)
-            if not conns:
-                return
-            conns.discard(ws)
-            if not conns:
-                self._user_connections.pop(user_id, None)
+        conns = self._user_connections.get(user_id)
+        if not conns or ws not in conns:
+            return
+        outbox = conns.pop(ws)
+        if not conns:
+            self._user_connections.pop(user_id, None)
+        self._dropped += outbox.dropped
+        self._slow_disconnects += outbox.overflowed
+        await outbox.close()
 
     async def send_to_user(self, user_id: int, message: str) -> None:
-        conns = list(self._user_connections.get(user_id, set()))
-        for ws in conns:
-            try:
-                await ws.send_text(message)
-            except Exception:
-                await self.disconnect(user_id, ws)
+        self.send_local(user_id, message)
+        await self._publish(user_id, message)
 
     async def broadcast(self, message: str) -> None:
-        users = list(self._user_connections.keys())
-        for uid in users:
-            await self.send_to_user(uid, message)
+        self.send_local(None, message)
+        await self._publish(None, message)
+
+    def send_local(self, user_id: Optional[int], message: str) -> None:
+        """Queue a message on this worker's sockets only; user_id None means every user."""
+        if user_id is None:
+            targets = list(self._user_connections.values())
+        else:
+            targets = [self._user_connections.get(user_id, {})]
+        for conns in targets:
+            for outbox in list(conns.values()):
+                outbox.offer(message)
+
+    async def _deliver(self, user_id: Optional[int], message: str) -> None:
+        self.send_local(user_id, message)
+
+    async def _publish(self, user_id: Optional[int], message: str) -> None:
+        if self._backplane is None:
+            return
+        try:
+            await self._backplane.publish(user_id, message)
+        except Exception as e:
+            # Local delivery already happened; a backplane outage must not break the caller
+            self._publish_failures += 1
+            logger.warning("Backplane publish failed: %s", e)
+
+    def stats(self) -> Dict[str, int]:
+        outboxes = [
+            outbox for conns in self._user_connections.values() for outbox in conns.values()
+        ]
+        return {
+            "users": len(self._user_connections),
+            "connections": len(outboxes),
+            "queued": sum(outbox.queued for outbox in outboxes),
+            "dropped": self._dropped + sum(outbox.dropped for outbox in outboxes),
+            "slow_disconnects": (
+                self._slow_disconnects + sum(outbox.overflowed for outbox in outboxes)
+            ),
+            "backplane_publish_failures": self._publish_failures,
+        }
 
 
 manager = WebSocketManager()
@@ -53,11 +212,140 @@ manager = WebSocketManager()
 async def training_progress(websocket: WebSocket, user_id: int):
     await manager.connect(user_id, websocket)
     try:
-        await manager.send_to_user(user_id, "connected")
+        manager.send_local(user_id, "connected")
         while True:
             # keepalive / wait for client pings
             await websocket.receive_text()
-    except WebSocketDisconnect:
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the socket was closed on our side (slow consumer)
+        pass
+    finally:
         await manager.disconnect(user_id, websocket)
 
 
+# Replies one chat socket may stream at the same time
+MAX_ACTIVE_REPLIES = 8
+# Frames buffered per chat socket
+CHAT_QUEUE_SIZE = 64
+
+
+class ChatConnection:
+    """One authenticated chat socket and the replies streaming over it."""
+
+    def __init__(self, ws: WebSocket, user_id: int, chat: ChatStreamService) -> None:
+        self._user_id = user_id
+        self._chat = chat
+        self._replies: Dict[int, asyncio.Task] = {}
+        # Token frames are never dropped: replies wait for room, so a slow
+        # client slows its own model streams down
+        self._outbox = Outbox(ws, max_queue=CHAT_QUEUE_SIZE)
+
+    async def send(self, frame: Dict[str, Any]) -> None:
+        await self._outbox.put(json.dumps(frame))
+
+    async def handle(self, raw: str) -> None:
+        try:
+            frame = json.loads(raw)
+        except ValueError:
+            frame = None
+        if not isinstance(frame, dict):
+            await self.send({"type": "error", "detail": "Frames must be JSON objects"})
+            return
+
+        kind = frame.get("type")
+        if kind == "ping":
+            await self.send({"type": "pong"})
+            return
+        conversation_id = frame.get("conversation_id")
+        if not isinstance(conversation_id, int):
+            await self.send({"type": "error", "detail": "conversation_id is required"})
+            return
+        if kind == "message":
+            content = frame.get("content")
+            await self._start_reply(conversation_id, content if isinstance(content, str) else "")
+        elif kind == "cancel":
+            task = self._replies.get(conversation_id)
+            if task is not None:
+                task.cancel()
+        else:
+            detail = "Unknown frame type"
+            await self.send({"type": "error", "conversation_id": conversation_id, "detail": detail})
+
+    async def close(self) -> None:
+        tasks = list(self._replies.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._outbox.close()
+
+    async def _start_reply(self, conversation_id: int, content: str) -> None:
+        if conversation_id in self._replies:
+            detail = "A reply is already streaming for this conversation"
+        elif len(self._replies) >= MAX_ACTIVE_REPLIES:
+            detail = "Too many replies streaming on this connection"
+        else:
+            # The turn starts inside the task so the receive loop stays free
+            # for other frames, a "cancel" for this conversation included
+            task = asyncio.create_task(self._reply(conversation_id, content))
+            self._replies[conversation_id] = task
+            task.add_done_callback(lambda _: self._replies.pop(conversation_id, None))
+            return
+        await self.send({"type": "error", "conversation_id": conversation_id, "detail": detail})
+
+    async def _reply(self, conversation_id: int, content: str) -> None:
+        try:
+            turn = await self._chat.start_turn(self._user_id, conversation_id, content)
+        except asyncio.CancelledError:
+            return
+        except (ValidationException, ResourceNotFoundException, AIQuotaExceededError) as e:
+            await self.send({"type": "error", "conversation_id": conversation_id, "detail": str(e)})
+            return
+        await self._relay(turn)
+
+    async def _relay(self, turn: ChatTurn) -> None:
+        try:
+            async with aclosing(self._chat.stream(turn)) as events:
+                async for event in events:
+                    frame = {"type": event.event, "conversation_id": turn.conversation_id}
+                    await self.send({**frame, **event.data})
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            # The socket went away; the stream has been closed and its partial reply kept
+            logger.debug("Chat relay for conversation %s stopped: %s", turn.conversation_id, e)
+
+
+def _token_user_id(ws: WebSocket, auth_service: IAuthService) -> Optional[int]:
+    # Browsers cannot set headers on WebSocket requests, so the token may come as a query parameter
+    token = ws.query_params.get("token")
+    auth_header = ws.headers.get("Authorization", "")
+    if not token and auth_header.startswith("Bearer "):
+        token = auth_header[7:]
+    if not token:
+        return None
+    try:
+        return int(auth_service.validate_token(token).get("sub"))
+    except (TokenValidationError, TypeError, ValueError):
+        return None
+
+
+@router.websocket("/chat")
+async def chat_channel(
+    websocket: WebSocket,
+    auth_service: IAuthService = Depends(get_auth_service),
+    chat: ChatStreamService = Depends(get_chat_stream_service),
+):
+    user_id = _token_user_id(websocket, auth_service)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    connection = ChatConnection(websocket, user_id, chat)
+    try:
+        while True:
+            await connection.handle(await websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await connection.close()
@@ -5,6 +5,8 @@ Provides shared fixtures and configuration for all tests.
 Sets up test database, mock services, and common test utilities.
 """
 
+import asyncio
+
 import pytest
 from typing import AsyncGenerator, Any
 from datetime import datetime, timedelta
@@ -30,6 +32,8 @@ from presentation.api.widget_router import router as widget_router
 from presentation.api.import_export_router import router as import_export_router
 from presentation.api.websocket_router import router as websocket_router
 from composition_root import composition_root
+from application.interfaces.ai_service import ChatMessage, ChatRequest
+from infrastructure.external_services.stub_ai_service import StubAIService
 
 # Dependency providers to override
 from composition_root import (
@@ -54,6 +58,7 @@ from composition_root import (
     get_delete_conversation_use_case,
     get_database_session,
     get_analytics_service,
+    get_ingestion_service,
 )
 
 
@@ -274,9 +279,29 @@ async def test_app():
             model.error_message = error_message
             return model
 
-    # Monkeypatch the repository used by the router
+    class StubIngestionJobRepository:
+        def __init__(self, session: Any) -> None:  # session unused
+            self._next_id = 1
+
+        async def add(self, data: dict[str, Any]) -> Any:
+            job = _Stub(id=self._next_id, **data)
+            self._next_id += 1
+            return job
+
+    class StubIngestionService:
+        def notify(self) -> None:
+            pass
+
+    class StubSession:
+        async def commit(self) -> None:
+            pass
+
+    # Monkeypatch the repositories used by the router
     import presentation.api.document_router as _doc_router  # type: ignore
     _doc_router.SqlAlchemyDocumentRepository = StubDocumentRepository  # type: ignore[attr-defined]
+    _doc_router.SqlAlchemyIngestionJobRepository = (  # type: ignore[attr-defined]
+        StubIngestionJobRepository
+    )
 
     async def _stub_current_user_id(request: Request) -> int:
         auth_header = request.headers.get("Authorization")
@@ -291,8 +316,11 @@ async def test_app():
         return 1
 
     async def _stub_db_session() -> AsyncGenerator[Any, None]:
-        # Not used because we stub the repository inside the router
-        yield object()
+        # Only committed; the repositories inside the router are stubbed
+        yield StubSession()
+
+    async def _stub_ingestion_service() -> StubIngestionService:
+        return StubIngestionService()
 
     async def _stub_analytics_service() -> StubAnalyticsService:
         return StubAnalyticsService()
@@ -321,6 +349,7 @@ async def test_app():
     app.dependency_overrides[get_delete_conversation_use_case] = StubDeleteConversationUseCase
     app.dependency_overrides[get_database_session] = _stub_db_session
     app.dependency_overrides[get_analytics_service] = _stub_analytics_service
+    app.dependency_overrides[get_ingestion_service] = _stub_ingestion_service
 
     return app
 
@@ -529,4 +558,43 @@ def authenticated_headers():
     # In a real implementation, this would generate a valid JWT token
     return {
         "Authorization": "Bearer test-jwt-token",
-    }
\ No newline at end of file
+    }
+
+
+class RecordingAIService(StubAIService):
+    """Stub whose embeddings record every call and can be made to fail."""
+
+    def __init__(self) -> None:
+        super().__init__(api_key="test", model_name="gemini-pro")
+        self.calls: list = []
+        self.embedded: list = []
+        self.fail = False
+
+    async def embed_text(self, text, model=None):
+        return (await self.embed_texts([text], model))[0]
+
+    async def embed_texts(self, texts, model=None):
+        self.calls.append((list(texts), model))
+        self.embedded.extend(texts)
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("upstream unavailable")
+        return [[float(len(text)), 0.333333, -1.0] for text in texts]
+
+
+@pytest.fixture
+def recording_ai_service():
+    """AI service stub that records embedding calls."""
+    return RecordingAIService()
+
+
+@pytest.fixture
+def chat_request():
+    """Build a ChatRequest from (role, content) turns; a single user "Hi" by default."""
+
+    def _build(*turns, **fields):
+        turns = turns or (("user", "Hi"),)
+        messages = [ChatMessage(role=role, content=content) for role, content in turns]
+        return ChatRequest(messages=messages, **fields)
+
+    return _build
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from infrastructure.external_services.batching_embedding_service import BatchingEmbeddingService
+
+
+async def test_concurrent_calls_share_one_batch(recording_ai_service):
+    inner = recording_ai_service
+    batcher = BatchingEmbeddingService(inner, max_batch_size=100, max_wait_ms=20)
+
+    texts = ["a", "bb", "ccc", "bb"]
+    vectors = await asyncio.gather(*(batcher.embed_text(text) for text in texts))
+
+    assert [vector[0] for vector in vectors] == [1.0, 2.0, 3.0, 2.0]
+    # Duplicates are sent once
+    assert inner.calls == [(["a", "bb", "ccc"], None)]
+    stats = batcher.stats()["default"]
+    assert stats["batches"] == 1 and stats["timed_batches"] == 1
+    assert stats["fill_ratio"] == pytest.approx(3 / 100)
+
+
+async def test_batches_flush_at_the_model_limit(recording_ai_service):
+    inner = recording_ai_service
+    batcher = BatchingEmbeddingService(inner, max_wait_ms=1000, model_batch_limits={"small": 2})
+
+    vectors = await asyncio.gather(*(batcher.embed_text(f"t{i}", model="small") for i in range(4)))
+
+    assert len(vectors) == 4
+    assert [texts for texts, _ in inner.calls] == [["t0", "t1"], ["t2", "t3"]]
+    stats = batcher.stats()["small"]
+    assert stats["full_batches"] == 2 and stats["fill_ratio"] == 1.0
+
+    # Bulk calls are split to the same limit
+    await batcher.embed_texts(["x", "y", "z"], model="small")
+    assert [len(texts) for texts, _ in inner.calls[2:]] == [2, 1]
+    await batcher.close()
+
+
+async def test_failure_reaches_every_caller(recording_ai_service):
+    recording_ai_service.fail = True
+    batcher = BatchingEmbeddingService(recording_ai_service, max_wait_ms=5)
+
+    results = await asyncio.gather(
+        batcher.embed_text("a"), batcher.embed_text("b"), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert batcher.stats()["default"]["failed_batches"] == 1
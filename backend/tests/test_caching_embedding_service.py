@@ -0,0 +1,57 @@
+import numpy as np
+
+from infrastructure.external_services.caching_embedding_service import (
+    CachingEmbeddingService,
+    SqliteEmbeddingStore,
+)
+
+
+async def test_repeated_texts_are_served_from_memory(recording_ai_service):
+    inner = recording_ai_service
+    cache = CachingEmbeddingService(inner, default_model="gemini-pro")
+
+    first = await cache.embed_texts(["alpha", "beta", "alpha"])
+    second = await cache.embed_text("beta")
+    third = await cache.embed_texts(["beta", "gamma"])
+
+    assert inner.embedded == ["alpha", "beta", "gamma"]
+    assert first[1] == second == third[0]
+    # Values are rounded through float16 whether or not they were cached
+    assert first[0][1] == float(np.float16(0.333333))
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (3, 0, 3)
+
+
+async def test_disk_tier_survives_a_new_instance(tmp_path, recording_ai_service):
+    path = str(tmp_path / "embeddings.sqlite3")
+    inner = recording_ai_service
+    cache = CachingEmbeddingService(
+        inner, default_model="gemini-pro", store=SqliteEmbeddingStore(path)
+    )
+    vector = await cache.embed_text("persist me")
+    await cache.close()
+
+    restarted = CachingEmbeddingService(
+        inner, default_model="gemini-pro", store=SqliteEmbeddingStore(path)
+    )
+    assert await restarted.embed_text("persist me") == vector
+    # Another model is a different key
+    await restarted.embed_text("persist me", model="other-model")
+    await restarted.close()
+
+    assert inner.embedded == ["persist me", "persist me"]
+    assert restarted.stats()["disk_hits"] == 1
+
+
+async def test_memory_tier_is_bounded_by_bytes(recording_ai_service):
+    inner = recording_ai_service
+    # Room for two 3-dim float16 vectors plus bookkeeping
+    cache = CachingEmbeddingService(inner, default_model="gemini-pro", memory_max_bytes=420)
+
+    await cache.embed_texts(["a", "b", "c"])
+    await cache.embed_text("a")
+
+    stats = cache.stats()
+    assert stats["memory_entries"] == 2 and stats["memory_bytes"] <= 420
+    assert stats["evictions"] >= 1
+    assert inner.embedded == ["a", "b", "c", "a"]
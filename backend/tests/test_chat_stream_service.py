@@ -0,0 +1,277 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from application.exceptions.application_exceptions import ResourceNotFoundException
+from application.interfaces.ai_service import AIQuotaExceededError
+from infrastructure.database.models.base import Base
+from infrastructure.database.models.bot import BotModel
+from infrastructure.database.models.conversation import ConversationModel, MessageModel
+from infrastructure.database.models.document import DocumentModel
+from infrastructure.external_services.chat_stream_service import ChatStreamService
+from infrastructure.external_services.context_builder import ContextBuilder
+from infrastructure.external_services.conversation_summarizer import ConversationSummarizer
+from infrastructure.external_services.prompt_prefix_cache import PromptPrefixCache
+from infrastructure.external_services.response_cache import InMemoryResponseCache
+from infrastructure.external_services.stub_ai_service import StubAIService
+from infrastructure.external_services.token_quota_service import TokenQuotaService
+
+
+class _ScriptedAIService(StubAIService):
+    def __init__(self, chunks, fail_after=None) -> None:
+        super().__init__(api_key="test", model_name="gemini-pro")
+        self.chunks = chunks
+        self.fail_after = fail_after
+        self.requests = []
+        self.closed = False
+
+    async def chat_completion_stream(self, request):
+        self.requests.append(request)
+        try:
+            for i, chunk in enumerate(self.chunks):
+                if i == self.fail_after:
+                    raise RuntimeError("upstream reset")
+                await asyncio.sleep(0)
+                yield chunk
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+async def session_maker(tmp_path):
+    import infrastructure.database.models  # noqa: F401
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'chat.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with maker() as session:
+        session.add(
+            BotModel(
+                id=1, name="Helper", owner_id=1, model_name="gemini-pro", system_prompt="Be brief."
+            )
+        )
+        session.add(ConversationModel(id=1, user_id=1, bot_id=1, title="Chat"))
+        await session.commit()
+    yield maker
+    await engine.dispose()
+
+
+async def _messages(session_maker):
+    async with session_maker() as session:
+        result = await session.execute(select(MessageModel).order_by(MessageModel.id))
+        return result.scalars().all()
+
+
+async def _conversation(session_maker):
+    async with session_maker() as session:
+        return await session.get(ConversationModel, 1)
+
+
+async def test_tokens_are_relayed_in_order_and_reply_is_stored(session_maker):
+    ai = _ScriptedAIService(["Hel", "lo", " there"])
+    service = ChatStreamService(session_maker, ai)
+
+    turn = await service.start_turn(1, 1, "Hi")
+    events = [event async for event in service.stream(turn)]
+
+    assert [e.event for e in events] == ["start", "token", "token", "token", "done"]
+    assert "".join(e.data["text"] for e in events if e.event == "token") == "Hello there"
+    assert [(m.role, m.content) for m in ai.requests[0].messages] == [
+        ("system", "Be brief."),
+        ("user", "Hi"),
+    ]
+
+    stored = await _messages(session_maker)
+    assert [(m.role, m.content) for m in stored] == [("user", "Hi"), ("assistant", "Hello there")]
+    assert events[-1].data["message_id"] == stored[1].id
+    assert stored[1].message_metadata["streamed"] is True
+    conversation = await _conversation(session_maker)
+    assert conversation.message_count == 2 and conversation.total_tokens_used > 0
+
+    # The next turn sends the stored history
+    turn = await service.start_turn(1, 1, "Again")
+    [event async for event in service.stream(turn)]
+    assert [m.content for m in ai.requests[1].messages] == [
+        "Be brief.",
+        "Hi",
+        "Hello there",
+        "Again",
+    ]
+
+
+async def test_disconnect_stops_upstream_and_keeps_partial_reply(session_maker):
+    ai = _ScriptedAIService(["one ", "two ", "three"])
+    service = ChatStreamService(session_maker, ai)
+
+    stream = service.stream(await service.start_turn(1, 1, "Count"))
+    assert (await stream.__anext__()).event == "start"
+    assert (await stream.__anext__()).data == {"text": "one "}
+    await stream.aclose()
+    await service.close()
+
+    assert ai.closed
+    stored = await _messages(session_maker)
+    assert stored[-1].content == "one "
+    assert stored[-1].message_metadata["truncated"] is True
+    assert service.stats()["aborted"] == 1
+
+
+async def test_upstream_failure_ends_with_error_event(session_maker):
+    service = ChatStreamService(
+        session_maker, _ScriptedAIService(["partial", "lost"], fail_after=1)
+    )
+
+    events = [event async for event in service.stream(await service.start_turn(1, 1, "Hi"))]
+
+    assert events[-1].event == "error"
+    stored = await _messages(session_maker)
+    assert stored[-1].error_message == "upstream reset"
+    assert service.stats()["failed"] == 1
+
+
+async def test_other_users_conversation_is_not_found(session_maker):
+    service = ChatStreamService(session_maker, _ScriptedAIService([]))
+
+    with pytest.raises(ResourceNotFoundException):
+        await service.start_turn(2, 1, "Hi")
+    assert await _messages(session_maker) == []
+
+
+async def test_cached_reply_skips_the_ai_service_until_the_bot_changes(session_maker):
+    ai = _ScriptedAIService(["Nine ", "to five"])
+    cache = InMemoryResponseCache()
+    service = ChatStreamService(session_maker, ai, response_cache=cache, cache_max_temperature=0.3)
+    async with session_maker() as session:
+        (await session.get(BotModel, 1)).temperature = 0.0
+        for conversation_id in (2, 3):
+            session.add(
+                ConversationModel(id=conversation_id, user_id=1, bot_id=1, title="Other chat")
+            )
+        await session.commit()
+
+    first = [
+        e
+        async for e in service.stream(
+            await service.start_turn(1, 1, "What are your opening hours?")
+        )
+    ]
+    second = [
+        e
+        async for e in service.stream(await service.start_turn(1, 2, "what are your opening hours"))
+    ]
+
+    assert len(ai.requests) == 1
+    assert [e.data["text"] for e in second if e.event == "token"] == ["Nine to five"]
+    assert (first[-1].data["cached"], second[-1].data["cached"]) == (False, True)
+    stored = await _messages(session_maker)
+    assert stored[-1].content == "Nine to five" and stored[-1].message_metadata["cached"] is True
+
+    # A processed document changes the knowledge base fingerprint
+    async with session_maker() as session:
+        session.add(
+            DocumentModel(
+                owner_id=1,
+                bot_id=1,
+                file_name="hours.txt",
+                file_path="hours.txt",
+                file_type=".txt",
+                file_size_bytes=10,
+                status="processed",
+            )
+        )
+        await session.commit()
+    [
+        e
+        async for e in service.stream(
+            await service.start_turn(1, 3, "What are your opening hours?")
+        )
+    ]
+    assert len(ai.requests) == 2
+
+
+async def test_warm_bots_are_not_cached(session_maker):
+    ai = _ScriptedAIService(["Hi"])
+    service = ChatStreamService(
+        session_maker, ai, response_cache=InMemoryResponseCache(), cache_max_temperature=0.3
+    )
+
+    for _ in range(2):
+        [e async for e in service.stream(await service.start_turn(1, 1, "Hello"))]
+
+    assert len(ai.requests) == 2
+
+
+async def test_history_is_packed_under_the_token_budget(session_maker):
+    async with session_maker() as session:
+        for i in range(6):
+            # Stored before token counts were cached
+            session.add(
+                MessageModel(
+                    conversation_id=1, role="user", content=f"old message {i} " + "word " * 40
+                )
+            )
+        await session.commit()
+    ai = _ScriptedAIService(["ok"])
+    builder = ContextBuilder(max_prompt_tokens=120)
+    service = ChatStreamService(session_maker, ai, context_builder=builder)
+
+    [e async for e in service.stream(await service.start_turn(1, 1, "Latest question"))]
+
+    sent = [m.content for m in ai.requests[0].messages]
+    assert sent[0] == "Be brief." and sent[-1] == "Latest question"
+    # Only the newest history fits
+    assert 0 < len(sent) - 2 < 6 and sent[-2].startswith("old message 5")
+    assert ai.requests[0].context["prompt_tokens"] <= 120
+    stored = await _messages(session_maker)
+    assert all(m.token_count for m in stored)
+
+
+async def test_summarized_history_is_replaced_by_the_summary(session_maker):
+    async with session_maker() as session:
+        for i in range(4):
+            session.add(MessageModel(conversation_id=1, role="user", content=f"old message {i}"))
+        await session.flush()
+        conversation = await session.get(ConversationModel, 1)
+        conversation.context_summary = "The user asked about refunds."
+        conversation.summary_through_message_id = 3
+        await session.commit()
+    ai = _ScriptedAIService(["ok"])
+    summarizer = ConversationSummarizer(session_maker, ai)
+    service = ChatStreamService(session_maker, ai, summarizer=summarizer)
+
+    [e async for e in service.stream(await service.start_turn(1, 1, "And now?"))]
+    await summarizer.close()
+
+    sent = [m.content for m in ai.requests[0].messages]
+    assert sent[0] == "Be brief." and sent[1].endswith("The user asked about refunds.")
+    assert sent[2:] == ["old message 3", "And now?"]
+
+
+async def test_turns_are_refused_once_the_daily_quota_is_used(session_maker):
+    ai = _ScriptedAIService(["A fairly long answer"])
+    quota = TokenQuotaService(session_maker, user_daily_tokens=10)
+    service = ChatStreamService(session_maker, ai, quota=quota)
+
+    [e async for e in service.stream(await service.start_turn(1, 1, "Hi"))]
+    assert quota.usage("user", 1) >= 10
+
+    with pytest.raises(AIQuotaExceededError):
+        await service.start_turn(1, 1, "Again")
+    assert len(await _messages(session_maker)) == 2
+
+
+async def test_requests_carry_the_context_cache_handle_of_the_system_prompt(session_maker):
+    ai = _ScriptedAIService(["ok"])
+    prefixes = PromptPrefixCache(ai, min_provider_cache_tokens=1)
+    service = ChatStreamService(session_maker, ai, prompt_prefixes=prefixes)
+
+    for question in ("Hi", "Again"):
+        [e async for e in service.stream(await service.start_turn(1, 1, question))]
+
+    handles = [request.context_cache for request in ai.requests]
+    assert handles[0] is not None and handles[0] is handles[1]
+    assert handles[0].message_count == 1 and ai.requests[0].messages[0].content == "Be brief."
+    assert prefixes.stats()["registrations"] == 1
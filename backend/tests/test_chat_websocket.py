@@ -0,0 +1,127 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from application.exceptions.application_exceptions import ResourceNotFoundException
+from application.interfaces.auth_service import TokenValidationError
+from composition_root import get_auth_service, get_chat_stream_service
+from infrastructure.external_services.chat_stream_service import ChatStreamEvent
+from presentation.api.websocket_router import router
+
+
+class _FakeAuth:
+    def validate_token(self, token, token_type="access"):
+        if token != "good":
+            raise TokenValidationError("bad token")
+        return {"sub": "1"}
+
+
+class _FakeChat:
+    """Conversation 1 replies slowly, 2 quickly, 3 never starts; 404 for anything else."""
+
+    def __init__(self) -> None:
+        self.closed = []
+        self.abandoned_turns = []
+
+    async def start_turn(self, user_id, conversation_id, content):
+        if conversation_id == 3:
+            try:
+                await asyncio.Event().wait()
+            finally:
+                self.abandoned_turns.append(conversation_id)
+        if conversation_id not in (1, 2):
+            raise ResourceNotFoundException("Conversation not found")
+        return SimpleNamespace(conversation_id=conversation_id, content=content)
+
+    async def stream(self, turn):
+        delay = 0.05 if turn.conversation_id == 1 else 0.0
+        try:
+            yield ChatStreamEvent("start", {"conversation_id": turn.conversation_id})
+            for word in turn.content.split():
+                await asyncio.sleep(delay)
+                yield ChatStreamEvent("token", {"text": word})
+            yield ChatStreamEvent("done", {"conversation_id": turn.conversation_id})
+        finally:
+            self.closed.append(turn.conversation_id)
+
+
+def _client(chat):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_auth_service] = lambda: _FakeAuth()
+    app.dependency_overrides[get_chat_stream_service] = lambda: chat
+    return TestClient(app)
+
+
+def _receive_until_done(ws, count):
+    frames, done = [], 0
+    while done < count:
+        frame = ws.receive_json()
+        frames.append(frame)
+        done += frame["type"] in ("done", "error")
+    return frames
+
+
+def test_replies_for_two_conversations_share_one_socket():
+    with _client(_FakeChat()) as client, client.websocket_connect("/ws/chat?token=good") as ws:
+        ws.send_json({"type": "message", "conversation_id": 1, "content": "slow reply here"})
+        ws.send_json({"type": "message", "conversation_id": 2, "content": "fast one"})
+        frames = _receive_until_done(ws, 2)
+
+    by_conversation = {
+        cid: [f["text"] for f in frames if f["type"] == "token" and f["conversation_id"] == cid]
+        for cid in (1, 2)
+    }
+    assert by_conversation == {1: ["slow", "reply", "here"], 2: ["fast", "one"]}
+    # The fast conversation finished while the slow one was still streaming
+    done_order = [f["conversation_id"] for f in frames if f["type"] == "done"]
+    assert done_order == [2, 1]
+
+
+def test_errors_and_cancel_are_scoped_to_a_conversation():
+    chat = _FakeChat()
+    with _client(chat) as client, client.websocket_connect("/ws/chat?token=good") as ws:
+        ws.send_json({"type": "message", "conversation_id": 9, "content": "hi"})
+        assert ws.receive_json() == {
+            "type": "error",
+            "conversation_id": 9,
+            "detail": "Conversation not found",
+        }
+
+        ws.send_json({"type": "message", "conversation_id": 1, "content": "a b c d e f g h"})
+        assert ws.receive_json()["type"] == "start"
+        ws.send_json({"type": "cancel", "conversation_id": 1})
+        ws.send_json({"type": "ping"})
+        frames = []
+        while not frames or frames[-1]["type"] != "pong":
+            frames.append(ws.receive_json())
+
+    assert not any(f["type"] == "done" for f in frames)
+    assert chat.closed == [1]
+
+
+def test_a_slow_turn_start_does_not_block_other_frames():
+    chat = _FakeChat()
+    with _client(chat) as client, client.websocket_connect("/ws/chat?token=good") as ws:
+        ws.send_json({"type": "message", "conversation_id": 3, "content": "hi"})
+        ws.send_json({"type": "ping"})
+        assert ws.receive_json() == {"type": "pong"}
+
+        ws.send_json({"type": "cancel", "conversation_id": 3})
+        ws.send_json({"type": "message", "conversation_id": 2, "content": "still here"})
+        frames = _receive_until_done(ws, 1)
+
+    assert [f["text"] for f in frames if f["type"] == "token"] == ["still", "here"]
+    assert chat.abandoned_turns == [3]
+
+
+def test_invalid_token_is_rejected():
+    with _client(_FakeChat()) as client:
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with client.websocket_connect("/ws/chat?token=bad") as ws:
+                ws.receive_json()
+    assert exc.value.code == 1008
@@ -0,0 +1,65 @@
+from application.interfaces.ai_service import ChatMessage
+from infrastructure.external_services.context_builder import ContextBuilder
+
+
+class _WordCounter:
+    def count(self, text):
+        return len(text.split())
+
+
+def _history(*contents):
+    """Newest first, as the builder expects."""
+    return [(ChatMessage(role="user", content=c), len(c.split())) for c in reversed(contents)]
+
+
+def test_budget_respects_window_reply_and_cap():
+    builder = ContextBuilder(
+        _WordCounter(), max_prompt_tokens=1000, model_context_windows={"small": 900}
+    )
+
+    assert builder.budget("small", reply_tokens=200) == 700
+    assert builder.budget("other", reply_tokens=200) == 1000
+
+
+def test_oldest_history_is_dropped_first():
+    builder = ContextBuilder(_WordCounter(), max_prompt_tokens=30)
+    history = _history("one two three four", "five six seven eight", "nine ten eleven twelve")
+
+    packed = builder.build("new question", system_prompt="be brief", history=history)
+
+    # system + question use 12, each history message 8
+    assert [m.content for m in packed.messages] == [
+        "be brief",
+        "five six seven eight",
+        "nine ten eleven twelve",
+        "new question",
+    ]
+    assert packed.history_kept == 2 and packed.prompt_tokens <= 30
+
+
+def test_history_is_not_consumed_past_the_budget():
+    builder = ContextBuilder(_WordCounter(), max_prompt_tokens=20)
+    consumed = []
+
+    def newest_first():
+        for i in range(1000):
+            consumed.append(i)
+            yield ChatMessage(role="user", content="a b c d"), 4
+
+    packed = builder.build("q", history=newest_first())
+
+    assert packed.history_kept == 1 and len(consumed) == 2
+
+
+def test_knowledge_takes_its_share_then_leftover_room():
+    builder = ContextBuilder(_WordCounter(), max_prompt_tokens=100, knowledge_share=0.3)
+    chunks = ["alpha " * 10, "beta " * 10, "gamma " * 10]
+
+    crowded = builder.build("q", history=_history(*["w " * 12] * 10), chunks=chunks)
+    roomy = builder.build("q", chunks=chunks)
+
+    assert crowded.chunks_kept == 1 and crowded.chunks_dropped == 2
+    assert roomy.chunks_kept == 3
+    knowledge = roomy.messages[0].content
+    assert knowledge.index("[1] alpha") < knowledge.index("[3] gamma")
+    assert roomy.prompt_tokens <= 100
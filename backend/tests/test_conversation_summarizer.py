@@ -0,0 +1,119 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from application.interfaces.ai_service import ChatResponse
+from infrastructure.database.models.base import Base
+from infrastructure.database.models.bot import BotModel
+from infrastructure.database.models.conversation import ConversationModel, MessageModel
+from infrastructure.external_services.conversation_summarizer import ConversationSummarizer
+from infrastructure.external_services.stub_ai_service import StubAIService
+
+
+class _SummaryAIService(StubAIService):
+    def __init__(self, fail: bool = False) -> None:
+        super().__init__(api_key="test", model_name="gemini-pro")
+        self.requests = []
+        self.fail = fail
+
+    async def chat_completion(self, request):
+        self.requests.append(request)
+        if self.fail:
+            raise RuntimeError("upstream unavailable")
+        return ChatResponse(
+            content=f"summary {len(self.requests)}", model=request.model or "gemini-pro"
+        )
+
+
+@pytest.fixture
+async def session_maker(tmp_path):
+    import infrastructure.database.models  # noqa: F401
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'summary.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with maker() as session:
+        session.add(BotModel(id=1, name="Helper", owner_id=1, model_name="gemini-pro"))
+        session.add(ConversationModel(id=1, user_id=1, bot_id=1, title="Chat"))
+        await session.commit()
+    yield maker
+    await engine.dispose()
+
+
+async def _add_turns(session_maker, turns, start=0):
+    async with session_maker() as session:
+        for i in range(start, start + turns):
+            session.add(MessageModel(conversation_id=1, role="user", content=f"question {i}"))
+            session.add(MessageModel(conversation_id=1, role="assistant", content=f"answer {i}"))
+        await session.commit()
+
+
+async def _conversation(session_maker):
+    async with session_maker() as session:
+        return await session.get(ConversationModel, 1)
+
+
+async def test_old_turns_are_folded_and_recent_ones_kept(session_maker):
+    ai = _SummaryAIService()
+    summarizer = ConversationSummarizer(
+        session_maker, ai, model="gemini-1.5-flash", every_turns=2, keep_recent_messages=4
+    )
+
+    await _add_turns(session_maker, 3)
+    summarizer.schedule(1)
+    await summarizer.close()
+    # Six messages: fewer than the recent window plus two turns
+    assert ai.requests == []
+
+    await _add_turns(session_maker, 1, start=3)
+    summarizer.schedule(1)
+    await summarizer.close()
+
+    conversation = await _conversation(session_maker)
+    assert conversation.context_summary == "summary 1"
+    # Everything except the newest four messages
+    assert conversation.summary_through_message_id == 4
+    assert ai.requests[0].model == "gemini-1.5-flash"
+    prompt = ai.requests[0].messages[-1].content
+    assert "(none)" in prompt and "answer 1" in prompt and "question 2" not in prompt
+
+    await _add_turns(session_maker, 2, start=4)
+    summarizer.schedule(1)
+    await summarizer.close()
+
+    conversation = await _conversation(session_maker)
+    assert conversation.context_summary == "summary 2"
+    assert conversation.summary_through_message_id == 8
+    # The previous summary is extended, not rebuilt from the transcript
+    prompt = ai.requests[1].messages[-1].content
+    assert "summary 1" in prompt and "question 0" not in prompt
+    assert summarizer.stats()["folded_messages"] == 8
+
+
+async def test_long_backlog_is_caught_up_in_bounded_passes(session_maker):
+    ai = _SummaryAIService()
+    summarizer = ConversationSummarizer(
+        session_maker, ai, every_turns=1, keep_recent_messages=2, max_messages_per_pass=10
+    )
+    await _add_turns(session_maker, 20)
+
+    summarizer.schedule(1)
+    summarizer.schedule(1)
+    await summarizer.close()
+
+    assert len(ai.requests) == 4
+    conversation = await _conversation(session_maker)
+    assert conversation.summary_through_message_id == 38
+    assert summarizer.stats()["passes"] == 4
+
+
+async def test_failed_summary_leaves_the_conversation_unchanged(session_maker):
+    summarizer = ConversationSummarizer(session_maker, _SummaryAIService(fail=True), every_turns=1)
+    await _add_turns(session_maker, 20)
+
+    summarizer.schedule(1)
+    await summarizer.close()
+
+    conversation = await _conversation(session_maker)
+    assert conversation.context_summary is None and conversation.summary_through_message_id is None
+    assert summarizer.stats()["failures"] == 1
@@ -0,0 +1,365 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from infrastructure.database.models.base import Base
+from infrastructure.database.models.document_chunk import DocumentChunkModel
+from infrastructure.external_services.document_ingestion_service import DocumentIngestionService
+from infrastructure.external_services.document_processor_service import DocumentProcessorService
+from infrastructure.external_services.local_vector_store import LocalVectorStore
+from infrastructure.external_services.stub_ai_service import StubAIService
+from infrastructure.external_services.upload_storage_service import UploadStorageService
+from infrastructure.repositories.sqlalchemy_document_repository import SqlAlchemyDocumentRepository
+from infrastructure.repositories.sqlalchemy_ingestion_job_repository import (
+    SqlAlchemyIngestionJobRepository,
+)
+
+
+@pytest.fixture
+async def session_maker(tmp_path):
+    import infrastructure.database.models  # noqa: F401
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'ingestion.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _queue_document(session_maker, path, bot_id=None, content_sha256=None, **job_fields):
+    async with session_maker() as session:
+        doc = await SqlAlchemyDocumentRepository(session).add(
+            {
+                "owner_id": 1,
+                "bot_id": bot_id,
+                "content_sha256": content_sha256,
+                "file_name": "note.txt",
+                "file_path": str(path),
+                "file_type": ".txt",
+                "file_size_bytes": path.stat().st_size if path.exists() else 0,
+                "status": "queued",
+            }
+        )
+        job = await SqlAlchemyIngestionJobRepository(session).add(
+            {"document_id": doc.id, "owner_id": 1, "status": "queued", **job_fields}
+        )
+        await session.commit()
+        return doc.id, job.id
+
+
+async def _wait_for_status(session_maker, doc_id, expected, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        async with session_maker() as session:
+            doc = await SqlAlchemyDocumentRepository(session).get_by_id(doc_id)
+        if doc.status == expected or asyncio.get_running_loop().time() > deadline:
+            return doc
+        await asyncio.sleep(0.02)
+
+
+def _service(session_maker, events, vector_store=None):
+    async def notifier(user_id, message):
+        events.append((user_id, message))
+
+    return DocumentIngestionService(
+        session_maker=session_maker,
+        processor=DocumentProcessorService(),
+        ai_service=StubAIService(api_key="test", model_name="gemini-pro"),
+        vector_store=vector_store,
+        workers=2,
+        poll_interval_seconds=0.05,
+        notifier=notifier,
+    )
+
+
+async def test_worker_processes_queued_document(session_maker, tmp_path):
+    path = tmp_path / "note.txt"
+    path.write_text("hello world " * 300)
+    doc_id, job_id = await _queue_document(session_maker, path)
+
+    events = []
+    service = _service(session_maker, events)
+    await service.start()
+    service.notify()
+    try:
+        doc = await _wait_for_status(session_maker, doc_id, "processed")
+    finally:
+        await service.stop()
+
+    assert doc.status == "processed"
+    async with session_maker() as session:
+        job = await SqlAlchemyIngestionJobRepository(session).get_by_id(job_id)
+    assert job.status == "done"
+    assert job.attempts == 1
+    assert events and events[0][1].startswith(f"document:{doc_id}:processed:")
+
+
+async def test_bot_document_chunks_are_stored_and_indexed(session_maker, tmp_path):
+    path = tmp_path / "manual.txt"
+    path.write_text("Reset the router by holding the button. " * 200)
+    doc_id, _ = await _queue_document(session_maker, path, bot_id=7)
+
+    store = LocalVectorStore()
+    service = _service(session_maker, [], vector_store=store)
+    await service.start()
+    service.notify()
+    try:
+        doc = await _wait_for_status(session_maker, doc_id, "processed")
+    finally:
+        await service.stop()
+
+    assert doc.status == "processed"
+    async with session_maker() as session:
+        result = await session.execute(
+            select(DocumentChunkModel.id).where(DocumentChunkModel.document_id == doc_id)
+        )
+        chunk_ids = list(result.scalars())
+    assert len(chunk_ids) > 1
+    assert await store.count(7) == len(chunk_ids)
+    matches = await store.search(7, [0.1, 0.2, 0.3], top_k=3)
+    assert len(matches) == 3 and {m.id for m in matches} <= set(chunk_ids)
+
+
+async def test_failed_job_is_retried_then_marked_failed(session_maker, tmp_path):
+    doc_id, job_id = await _queue_document(session_maker, tmp_path / "missing.txt", max_attempts=2)
+
+    events = []
+    service = _service(session_maker, events)
+    await service.start()
+    try:
+        doc = await _wait_for_status(session_maker, doc_id, "failed")
+    finally:
+        await service.stop()
+
+    assert doc.status == "failed"
+    async with session_maker() as session:
+        job = await SqlAlchemyIngestionJobRepository(session).get_by_id(job_id)
+    assert job.status == "failed"
+    assert job.attempts == 2
+    assert events == [(1, f"document:{doc_id}:failed")]
+
+
+async def test_stale_running_job_is_requeued_on_start(session_maker, tmp_path):
+    path = tmp_path / "note.txt"
+    path.write_text("survives a restart")
+    doc_id, job_id = await _queue_document(session_maker, path)
+
+    # Simulate a worker that claimed the job and then died with the process
+    async with session_maker() as session:
+        job = await SqlAlchemyIngestionJobRepository(session).claim_next()
+        job.started_at = datetime.now(timezone.utc) - timedelta(hours=1)
+        await session.commit()
+
+    service = _service(session_maker, [])
+    await service.start()
+    try:
+        doc = await _wait_for_status(session_maker, doc_id, "processed")
+    finally:
+        await service.stop()
+
+    assert doc.status == "processed"
+
+
+async def test_stale_job_without_attempts_left_is_failed(session_maker, tmp_path):
+    path = tmp_path / "note.txt"
+    path.write_text("crashes the worker")
+    doc_id, job_id = await _queue_document(session_maker, path, max_attempts=1)
+
+    async with session_maker() as session:
+        job = await SqlAlchemyIngestionJobRepository(session).claim_next()
+        job.started_at = datetime.now(timezone.utc) - timedelta(hours=1)
+        await session.commit()
+
+    events = []
+    service = _service(session_maker, events)
+    await service.start()
+    try:
+        doc = await _wait_for_status(session_maker, doc_id, "failed")
+    finally:
+        await service.stop()
+
+    assert doc.status == "failed"
+    async with session_maker() as session:
+        job = await SqlAlchemyIngestionJobRepository(session).get_by_id(job_id)
+    assert job.status == "failed"
+    assert job.attempts == 1
+    assert events == [(1, f"document:{doc_id}:failed")]
+
+
+async def test_recently_started_job_is_not_requeued(session_maker, tmp_path):
+    path = tmp_path / "note.txt"
+    path.write_text("still being ingested")
+    _, job_id = await _queue_document(session_maker, path)
+
+    async with session_maker() as session:
+        jobs = SqlAlchemyIngestionJobRepository(session)
+        await jobs.claim_next()
+        requeued, failed = await jobs.requeue_stale(
+            datetime.now(timezone.utc) - timedelta(minutes=20)
+        )
+        await session.commit()
+        job = await jobs.get_by_id(job_id)
+
+    assert (requeued, failed) == (0, [])
+    assert job.status == "running"
+
+
+class _SlowProcessor(DocumentProcessorService):
+    async def chunk_text_stream(self, parts):
+        await asyncio.sleep(10)
+        yield "never"
+
+
+async def test_job_exceeding_timeout_is_failed(session_maker, tmp_path):
+    path = tmp_path / "note.txt"
+    path.write_text("takes too long")
+    doc_id, job_id = await _queue_document(session_maker, path, max_attempts=1)
+
+    service = DocumentIngestionService(
+        session_maker=session_maker,
+        processor=_SlowProcessor(),
+        ai_service=StubAIService(api_key="test", model_name="gemini-pro"),
+        workers=1,
+        poll_interval_seconds=0.05,
+        job_timeout_seconds=0.1,
+    )
+    await service.start()
+    service.notify()
+    try:
+        doc = await _wait_for_status(session_maker, doc_id, "failed")
+    finally:
+        await service.stop()
+
+    assert doc.status == "failed"
+    assert "did not finish" in doc.error_message
+    async with session_maker() as session:
+        job = await SqlAlchemyIngestionJobRepository(session).get_by_id(job_id)
+    assert job.status == "failed"
+
+
+def _counting_service(session_maker, ai, store):
+    return DocumentIngestionService(
+        session_maker=session_maker,
+        processor=DocumentProcessorService(),
+        ai_service=ai,
+        vector_store=store,
+        workers=1,
+        poll_interval_seconds=0.05,
+    )
+
+
+async def _chunks(session_maker, doc_id):
+    async with session_maker() as session:
+        result = await session.execute(
+            select(DocumentChunkModel)
+            .where(DocumentChunkModel.document_id == doc_id)
+            .order_by(DocumentChunkModel.chunk_index)
+        )
+        return list(result.scalars())
+
+
+async def test_reingestion_embeds_only_changed_chunks(
+    session_maker, tmp_path, recording_ai_service
+):
+    sections = [
+        f"Section {i} explains how part {i} of the device is serviced. " * 30 for i in range(12)
+    ]
+    path = tmp_path / "manual.txt"
+    path.write_text("\n\n".join(sections))
+    doc_id, _ = await _queue_document(session_maker, path, bot_id=7)
+    ai, store = recording_ai_service, LocalVectorStore()
+    service = _counting_service(session_maker, ai, store)
+    await service.start()
+    try:
+        await _wait_for_status(session_maker, doc_id, "processed")
+        before = await _chunks(session_maker, doc_id)
+        assert len(ai.embedded) == len(before) > 4
+
+        # Change the last section only, then queue the document again
+        sections[-1] = "The final section was rewritten for the new firmware. " * 30
+        path.write_text("\n\n".join(sections))
+        ai.embedded.clear()
+        async with session_maker() as session:
+            await SqlAlchemyDocumentRepository(session).update_status(doc_id, "queued")
+            await SqlAlchemyIngestionJobRepository(session).add(
+                {"document_id": doc_id, "owner_id": 1, "status": "queued"}
+            )
+            await session.commit()
+        service.notify()
+        await _wait_for_status(session_maker, doc_id, "processed")
+    finally:
+        await service.stop()
+
+    after = await _chunks(session_maker, doc_id)
+    new_ids = {c.id for c in after} - {c.id for c in before}
+    removed_ids = {c.id for c in before} - {c.id for c in after}
+    assert 0 < len(ai.embedded) < len(before)
+    assert sorted(ai.embedded) == sorted(c.content for c in after if c.id in new_ids)
+    assert [c.chunk_index for c in after] == list(range(len(after)))
+    assert removed_ids
+    assert await store.count(7) == len(after)
+    assert removed_ids.isdisjoint(
+        m.id for m in await store.search(7, [0.1, 0.2, 0.3], top_k=len(before) * 2)
+    )
+
+
+async def test_document_with_known_content_copies_chunks(
+    session_maker, tmp_path, recording_ai_service
+):
+    path = tmp_path / "manual.txt"
+    path.write_text("Reset the router by holding the button. " * 200)
+    first_id, _ = await _queue_document(session_maker, path, bot_id=7, content_sha256="abc")
+    ai, store = recording_ai_service, LocalVectorStore()
+    service = _counting_service(session_maker, ai, store)
+    await service.start()
+    try:
+        await _wait_for_status(session_maker, first_id, "processed")
+        # Same content for another bot: the file is gone, so only copied chunks can succeed
+        path.unlink()
+        second_id, _ = await _queue_document(session_maker, path, bot_id=8, content_sha256="abc")
+        service.notify()
+        await _wait_for_status(session_maker, second_id, "processed")
+    finally:
+        await service.stop()
+
+    first, second = await _chunks(session_maker, first_id), await _chunks(session_maker, second_id)
+    assert [c.content for c in second] == [c.content for c in first]
+    assert await store.count(8) == len(second)
+
+
+async def test_idle_worker_removes_unreferenced_upload_files(session_maker, tmp_path):
+    storage = UploadStorageService(str(tmp_path / "uploads"), max_bytes=1024 * 1024)
+    kept = storage.path_for("a" * 64, ".txt")
+    orphan = storage.path_for("b" * 64, ".txt")
+    for path in (kept, orphan):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("content")
+        os.utime(path, (0, 0))
+    await _queue_document(session_maker, Path(kept), status="done")
+
+    service = DocumentIngestionService(
+        session_maker=session_maker,
+        processor=DocumentProcessorService(),
+        ai_service=StubAIService(api_key="test", model_name="gemini-pro"),
+        workers=1,
+        poll_interval_seconds=0.02,
+        storage=storage,
+        orphan_grace_seconds=60,
+    )
+    await service.start()
+    try:
+        for _ in range(100):
+            if not os.path.exists(orphan):
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        await service.stop()
+
+    assert not os.path.exists(orphan)
+    assert os.path.exists(kept)
@@ -0,0 +1,88 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from infrastructure.external_services.document_processor_service import DocumentProcessorService
+from infrastructure.external_services.text_chunker import TokenChunker
+
+
+def _write_pdf(path, page_texts):
+    """Write a minimal PDF with one line of Helvetica text per page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids),
+        len(kids),
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    path.write_bytes(bytes(out))
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+@pytest.fixture(scope="module")
+def process_pool():
+    with ProcessPoolExecutor(
+        max_workers=2, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        yield pool
+
+
+async def test_iter_pdf_pages_yields_pages_in_order(tmp_path, process_pool):
+    texts = [f"Page number {i}" for i in range(7)]
+    pdf = tmp_path / "doc.pdf"
+    _write_pdf(pdf, texts)
+    processor = DocumentProcessorService(
+        executor=process_pool, pages_per_task=2, max_pending_tasks=2
+    )
+
+    pages = [page async for page in processor.iter_pdf_pages(str(pdf))]
+
+    assert [p.strip() for p in pages] == texts
+    assert await processor.extract_text_from_pdf(str(pdf)) == "\n".join(pages).strip()
+
+
+async def test_extract_text_from_pdf_returns_none_for_invalid_file(tmp_path):
+    bad = tmp_path / "bad.pdf"
+    bad.write_bytes(b"not a pdf")
+
+    assert await DocumentProcessorService().extract_text_from_pdf(str(bad)) is None
+
+
+async def test_chunk_text_stream_uses_token_chunker():
+    processor = DocumentProcessorService(chunker=TokenChunker(max_tokens=20, overlap_tokens=4))
+    pages = [f"Sentence {i} on this page. Another one here!" for i in range(30)]
+
+    streamed = [c async for c in processor.chunk_text_stream(_aiter(pages))]
+
+    assert streamed == processor.chunk_document("\n".join(pages))
@@ -7,10 +7,10 @@ async def test_upload_document_txt_success(test_client, authenticated_headers):
     content = b"hello world"
     files = {"file": ("note.txt", content, "text/plain")}
     resp = await test_client.post("/api/v1/documents/upload", headers=authenticated_headers, files=files)
-    assert resp.status_code == 200
+    assert resp.status_code == 202
     data = resp.json()
-    assert data["status"] == "processed"
-    assert data["chunks"] >= 0
+    assert data["status"] == "queued"
+    assert data["job_id"] >= 1
 
 
 @pytest.mark.api
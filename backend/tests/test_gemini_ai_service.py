@@ -0,0 +1,167 @@
+import asyncio
+
+import httpx
+import pytest
+
+from application.interfaces.ai_service import (
+    AIConfigurationError,
+    AIModelError,
+    AIQuotaExceededError,
+    AIServiceError,
+    ChatMessage,
+    ChatRequest,
+)
+from benchmarks.fake_gemini_server import FakeGeminiConfig, create_app
+from infrastructure.external_services.gemini_ai_service import HTTP2_AVAILABLE, GeminiAIService
+
+
+def _service(http2=True, **config):
+    config.setdefault("ttft_ms", 0)
+    config.setdefault("tokens_per_second", 10000)
+    app = create_app(FakeGeminiConfig(**config))
+    return GeminiAIService(
+        api_key="test",
+        model_name="gemini-pro",
+        base_url="http://fake",
+        http2=http2,
+        transport=httpx.ASGITransport(app=app),
+    )
+
+
+async def test_completion_and_stream_parse_gemini_responses(chat_request):
+    service = _service(reply_tokens=3)
+    request = chat_request(
+        ("system", "Be brief."), ("user", "Hi"), ("assistant", "Hello"), ("user", "Bye")
+    )
+
+    response = await service.chat_completion(request)
+    chunks = [chunk async for chunk in service.chat_completion_stream(request)]
+
+    assert response.content == "tok0 tok1 tok2 "
+    assert response.finish_reason == "STOP"
+    assert response.usage["completion_tokens"] == 3
+    assert "".join(chunks) == response.content
+    assert len(chunks) == 3
+    await service.close()
+
+
+async def test_embeddings_have_the_configured_dimensions_and_are_deterministic():
+    service = _service(embedding_dim=16)
+
+    single = await service.embed_text("hello")
+    batch = await service.embed_texts(["hello", "world"] * 60)
+
+    assert len(single) == 16
+    assert len(batch) == 120
+    assert batch[0] == single
+    assert batch[1] != single
+    await service.close()
+
+
+async def test_cached_context_replaces_the_prefix_in_requests():
+    service = _service(reply_tokens=1)
+    prefix = ChatMessage(role="system", content="You answer billing questions. " * 40)
+
+    handle = await service.cache_context("gemini-pro", [prefix], ttl_seconds=600)
+    request = ChatRequest(
+        messages=[prefix, ChatMessage(role="user", content="Hi")], context_cache=handle
+    )
+    body = service._generate_body(request, "gemini-pro")
+    response = await service.chat_completion(request)
+
+    assert handle.tokens > 0
+    assert body["cachedContent"] == handle.name
+    assert "systemInstruction" not in body
+    assert body["contents"] == [{"role": "user", "parts": [{"text": "Hi"}]}]
+    assert response.usage["cached_tokens"] == handle.tokens
+    await service.close()
+
+
+async def test_handle_for_another_model_is_ignored():
+    service = _service()
+    prefix = ChatMessage(role="system", content="Be brief.")
+    handle = await service.cache_context("gemini-1.5-flash", [prefix], ttl_seconds=600)
+
+    body = service._generate_body(
+        ChatRequest(messages=[prefix], context_cache=handle), "gemini-pro"
+    )
+
+    assert "cachedContent" not in body
+    assert body["systemInstruction"] == {"parts": [{"text": "Be brief."}]}
+    await service.close()
+
+
+@pytest.mark.parametrize(
+    "status, error",
+    [
+        (429, AIQuotaExceededError),
+        (403, AIConfigurationError),
+        (400, AIModelError),
+        (500, AIServiceError),
+    ],
+)
+async def test_http_errors_are_mapped(status, error, chat_request):
+    def handler(request):
+        return httpx.Response(status, json={"error": {"code": status, "message": "nope"}})
+
+    service = GeminiAIService(
+        api_key="test",
+        model_name="gemini-pro",
+        base_url="http://fake",
+        transport=httpx.MockTransport(handler),
+    )
+
+    with pytest.raises(error, match="nope"):
+        await service.chat_completion(chat_request(("user", "Hi")))
+    with pytest.raises(error):
+        [chunk async for chunk in service.chat_completion_stream(chat_request(("user", "Hi")))]
+    await service.close()
+
+
+async def test_injected_failures_and_health_check():
+    service = _service(error_rate=1.0)
+
+    with pytest.raises(AIServiceError, match="503"):
+        await service.embed_text("hello")
+    assert await service.check_service_health()
+    await service.close()
+
+
+async def test_warm_and_pool_stats(chat_request):
+    service = _service(http2=False, ttft_ms=20, reply_tokens=2)
+    request = chat_request(("user", "Hi"))
+
+    assert await service.warm(3) == 3
+    await asyncio.gather(*(service.chat_completion(request) for _ in range(4)))
+    stats = service.stats()
+
+    assert stats["requests"] == 7
+    assert stats["in_flight"] == 0
+    assert stats["peak_in_flight"] == 4
+    # No httpcore pool behind the test transport
+    assert "connections" not in stats
+    await service.close()
+
+
+@pytest.mark.skipif(not HTTP2_AVAILABLE, reason="h2 is not installed")
+async def test_warm_opens_one_http2_connection():
+    service = _service()
+
+    assert await service.warm(3) == 1
+    assert service.stats()["requests"] == 1
+    await service.close()
+
+
+async def test_pooled_client_reports_connections():
+    service = GeminiAIService(
+        api_key="test", model_name="gemini-pro", base_url="http://127.0.0.1:9", max_connections=4
+    )
+    await service.initialize()
+
+    stats = service.stats()
+
+    assert stats["connections"] == 0
+    assert stats["max_connections"] == 4
+    assert stats["utilisation"] == 0
+    assert await service.warm(1) == 0
+    await service.close()
@@ -0,0 +1,111 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from infrastructure.database.models.base import Base
+from infrastructure.external_services.bm25_index import Bm25Index, tokenize
+from infrastructure.external_services.hybrid_retrieval_service import (
+    HybridRetrievalService,
+    reciprocal_rank_fusion,
+)
+from infrastructure.external_services.local_vector_store import LocalVectorStore
+from infrastructure.external_services.stub_ai_service import StubAIService
+from infrastructure.repositories.sqlalchemy_document_chunk_repository import (
+    SqlAlchemyDocumentChunkRepository,
+)
+from infrastructure.repositories.sqlalchemy_document_repository import SqlAlchemyDocumentRepository
+
+
+@pytest.fixture
+async def session_maker(tmp_path):
+    import infrastructure.database.models  # noqa: F401
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'retrieval.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _add_document(session_maker, bot_id, contents, status="processed"):
+    async with session_maker() as session:
+        doc = await SqlAlchemyDocumentRepository(session).add(
+            {
+                "owner_id": 1,
+                "bot_id": bot_id,
+                "file_name": "kb.txt",
+                "file_path": "kb.txt",
+                "file_type": ".txt",
+                "file_size_bytes": 1,
+                "status": status,
+            }
+        )
+        chunks = await SqlAlchemyDocumentChunkRepository(session).add_many(doc.id, bot_id, contents)
+        await session.commit()
+        return doc.id, [chunk.id for chunk in chunks]
+
+
+def test_tokenize_indexes_compounds_whole_and_by_part():
+    assert tokenize("Error E-1042 on v2.3") == [
+        "error",
+        "e-1042",
+        "e",
+        "1042",
+        "on",
+        "v2.3",
+        "v2",
+        "3",
+    ]
+
+
+def test_bm25_ranks_exact_code_first_and_forgets_removed_chunks():
+    index = Bm25Index()
+    texts = [f"The printer reports a paper jam in tray {i}." for i in range(200)]
+    texts[137] = "Error E-1042 means the fuser unit overheated."
+    index.add(list(range(1000, 1200)), texts)
+
+    hits = index.search("what does e-1042 mean", top_k=3)
+    assert hits[0][0] == 1137
+
+    # Removing most chunks triggers a purge; the survivors must still be found
+    index.remove([i for i in range(1000, 1200) if i % 4 != 0])
+    assert len(index) == 50
+    assert index.search("e-1042") == []
+    assert [chunk_id for chunk_id, _ in index.search("tray 40", top_k=1)] == [1040]
+
+    # Re-adding an id replaces its text
+    index.add([1040], ["Error E-1042 again"])
+    assert index.search("e-1042", top_k=1)[0][0] == 1040
+    assert 1040 not in [chunk_id for chunk_id, _ in index.search("tray 40", top_k=50)]
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 4]], k=60)
+    assert fused[0][0] == 3
+    assert {item for item, _ in fused} == {1, 2, 3, 4}
+
+
+async def test_retrieval_follows_ingested_documents(session_maker):
+    ai = StubAIService(api_key="test", model_name="gemini-pro")
+    vectors = LocalVectorStore()
+    service = HybridRetrievalService(session_maker, ai, vectors, sync_interval_seconds=0)
+
+    doc_id, chunk_ids = await _add_document(
+        session_maker,
+        7,
+        ["Reset the router by holding the button.", "Code ZX-99 means the fan failed."],
+    )
+    await vectors.upsert(7, chunk_ids, [[0.1, 0.2, 0.3]] * len(chunk_ids))
+    await _add_document(session_maker, 7, ["ZX-99 draft"], status="processing")
+    await _add_document(session_maker, 8, ["ZX-99 belongs to another bot"])
+
+    results = await service.retrieve(7, "zx-99", top_k=5)
+    assert results[0].chunk_id == chunk_ids[1]
+    assert results[0].keyword_rank == 1
+    assert {r.document_id for r in results} == {doc_id}
+
+    # A document leaving the processed state drops out of the keyword index
+    async with session_maker() as session:
+        await SqlAlchemyDocumentRepository(session).update_status(doc_id, "processing")
+        await session.commit()
+    await vectors.delete(7, chunk_ids)
+    assert await service.retrieve(7, "zx-99") == []
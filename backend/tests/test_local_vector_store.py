@@ -0,0 +1,71 @@
+import numpy as np
+
+from infrastructure.external_services.local_vector_store import BotVectorIndex, LocalVectorStore
+
+
+def _unit(rows):
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def _exact_top_k(data, query, k):
+    scores = _unit(data) @ (query / np.linalg.norm(query))
+    return list(np.argsort(-scores)[:k])
+
+
+async def test_exact_search_matches_brute_force():
+    rng = np.random.default_rng(1)
+    data = rng.normal(size=(2000, 32)).astype(np.float32)
+    store = LocalVectorStore()
+    await store.upsert(1, list(range(100, 2100)), data)
+
+    query = rng.normal(size=32)
+    matches = await store.search(1, query.tolist(), top_k=10)
+
+    assert [m.id - 100 for m in matches] == _exact_top_k(data, query, 10)
+    assert all(a.score >= b.score for a, b in zip(matches, matches[1:]))
+    assert await store.search(2, query.tolist()) == []
+
+
+async def test_upsert_replaces_and_delete_removes():
+    store = LocalVectorStore()
+    await store.upsert(1, [1, 2], [[1.0, 0.0], [0.0, 1.0]])
+    await store.upsert(1, [1], [[0.0, -1.0]])
+
+    assert await store.count(1) == 2
+    assert [m.id for m in await store.search(1, [0.0, 1.0], top_k=2)] == [2, 1]
+
+    await store.delete(1, [2, 99])
+
+    assert await store.count(1) == 1
+    assert [m.id for m in await store.search(1, [0.0, 1.0], top_k=5)] == [1]
+
+
+def test_compaction_keeps_ids_searchable():
+    index = BotVectorIndex(dimension=4, initial_capacity=8)
+    rng = np.random.default_rng(2)
+    for _ in range(4):
+        index.upsert(list(range(1000)), rng.normal(size=(1000, 4)))
+    index.delete(list(range(500)))
+
+    assert len(index) == 500
+    assert index._size <= 1000  # dead rows were reclaimed
+    query = rng.normal(size=4)
+    assert {i for i, _ in index.search(query, 500)} == set(range(500, 1000))
+
+
+def test_ivf_mode_keeps_high_recall_on_clustered_data():
+    rng = np.random.default_rng(3)
+    centers = rng.normal(size=(50, 24))
+    data = (centers[rng.integers(0, 50, 6000)] + 0.3 * rng.normal(size=(6000, 24))).astype(
+        np.float32
+    )
+    index = BotVectorIndex(dimension=24, ann_min_vectors=4000, nprobe=8)
+    index.upsert(list(range(6000)), data)
+    assert index.is_approximate
+
+    recalls = []
+    for query in data[rng.integers(0, 6000, 20)] + 0.05 * rng.normal(size=(20, 24)):
+        hits = {i for i, _ in index.search(query, 10)}
+        recalls.append(len(hits & set(_exact_top_k(data, query, 10))) / 10)
+
+    assert np.mean(recalls) >= 0.9
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from application.interfaces.ai_service import AIServiceError, ChatResponse
+from infrastructure.external_services.model_routing_ai_service import ModelRoutingAIService
+from infrastructure.external_services.stub_ai_service import StubAIService
+
+
+class _ModelsAIService(StubAIService):
+    """Per-model delay (seconds) or failure."""
+
+    def __init__(self, delays, failing=()) -> None:
+        super().__init__(api_key="test", model_name="gemini-pro")
+        self.delays = delays
+        self.failing = set(failing)
+        self.started = []
+        self.cancelled = []
+        self.closed = []
+
+    async def chat_completion(self, request):
+        self.started.append(request.model)
+        try:
+            await asyncio.sleep(self.delays.get(request.model, 0))
+        except asyncio.CancelledError:
+            self.cancelled.append(request.model)
+            raise
+        if request.model in self.failing:
+            raise RuntimeError(f"{request.model} unavailable")
+        return ChatResponse(content=f"from {request.model}", model=request.model)
+
+    async def chat_completion_stream(self, request):
+        self.started.append(request.model)
+        try:
+            await asyncio.sleep(self.delays.get(request.model, 0))
+            if request.model in self.failing:
+                raise RuntimeError(f"{request.model} unavailable")
+            for word in ("from ", request.model):
+                yield word
+        finally:
+            self.closed.append(request.model)
+
+
+def _service(inner, hedge_after_ms=20.0):
+    return ModelRoutingAIService(
+        inner,
+        default_model="gemini-pro",
+        fallback_chains={"gemini-pro": ["gemini-1.5-flash"], "*": ["gemini-pro"]},
+        hedge_after_ms=hedge_after_ms,
+    )
+
+
+async def test_fast_primary_is_not_hedged(chat_request):
+    inner = _ModelsAIService({})
+    service = _service(inner)
+
+    response = await service.chat_completion(chat_request(model="gemini-pro"))
+
+    assert response.content == "from gemini-pro"
+    assert inner.started == ["gemini-pro"]
+    stats = service.stats()
+    assert stats["hedges"] == 0 and stats["models"]["gemini-pro"]["p95_ms"] is not None
+
+
+async def test_failure_falls_back_along_the_chain(chat_request):
+    inner = _ModelsAIService({}, failing={"gemini-pro"})
+    service = _service(inner, hedge_after_ms=0)
+
+    assert (
+        await service.chat_completion(chat_request(model="gemini-pro"))
+    ).content == "from gemini-1.5-flash"
+    # Models without their own chain use the "*" chain
+    assert service.candidates("gemini-ultra") == ["gemini-ultra", "gemini-pro"]
+    assert service.stats()["fallbacks"] == 1
+
+
+async def test_slow_primary_is_hedged_and_the_loser_cancelled(chat_request):
+    inner = _ModelsAIService({"gemini-pro": 5.0})
+    service = _service(inner)
+
+    response = await asyncio.wait_for(
+        service.chat_completion(chat_request(model="gemini-pro")), timeout=1
+    )
+
+    assert response.content == "from gemini-1.5-flash"
+    assert inner.cancelled == ["gemini-pro"]
+    assert service.stats()["hedges"] == 1
+
+
+async def test_stream_is_hedged_on_time_to_first_chunk(chat_request):
+    inner = _ModelsAIService({"gemini-pro": 5.0})
+    service = _service(inner)
+
+    chunks = [
+        chunk async for chunk in service.chat_completion_stream(chat_request(model="gemini-pro"))
+    ]
+    await asyncio.sleep(0)
+
+    assert "".join(chunks) == "from gemini-1.5-flash"
+    assert sorted(inner.closed) == ["gemini-1.5-flash", "gemini-pro"]
+
+
+async def test_error_when_every_model_fails(chat_request):
+    inner = _ModelsAIService({}, failing={"gemini-pro", "gemini-1.5-flash"})
+    service = _service(inner)
+
+    with pytest.raises(AIServiceError, match="All models failed"):
+        await service.chat_completion(chat_request(model="gemini-pro"))
+    assert inner.started == ["gemini-pro", "gemini-1.5-flash"]
@@ -0,0 +1,115 @@
+import asyncio
+
+from application.interfaces.ai_service import ChatMessage, ChatRequest
+from infrastructure.database.models.bot import BotModel
+from infrastructure.external_services.prompt_prefix_cache import PromptPrefixCache, canonicalize
+from infrastructure.external_services.stub_ai_service import StubAIService
+from infrastructure.external_services.text_chunker import TokenCounter
+
+
+class _CountingCounter(TokenCounter):
+    def __init__(self) -> None:
+        super().__init__(encoding_name=None)
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return super().count(text)
+
+
+class _RegisteringAIService(StubAIService):
+    def __init__(self, supported=True, fail=False) -> None:
+        super().__init__(api_key="test", model_name="gemini-pro")
+        self.supported = supported
+        self.fail = fail
+        self.registrations = 0
+
+    async def cache_context(self, model, messages, ttl_seconds):
+        self.registrations += 1
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("cache quota exceeded")
+        if not self.supported:
+            return None
+        return await super().cache_context(model, messages, ttl_seconds)
+
+
+def _bot(prompt):
+    return BotModel(id=1, name="Helper", owner_id=1, model_name="gemini-pro", system_prompt=prompt)
+
+
+def test_prefix_is_canonicalized_and_counted_once():
+    counter = _CountingCounter()
+    cache = PromptPrefixCache(StubAIService(api_key="test", model_name="gemini-pro"), counter)
+
+    first = cache.prefix(_bot("You help with billing.  \r\n\r\n\r\n\r\nBe brief.\r\n"))
+    again = cache.prefix(_bot("You help with billing.  \r\n\r\n\r\n\r\nBe brief.\r\n"))
+
+    assert first is again
+    assert first.text == "You help with billing.\n\nBe brief."
+    assert counter.calls == 1
+    # Formatting-only edits give the same canonical prefix
+    assert cache.prefix(_bot("You help with billing.\n\nBe brief.")).key == first.key
+    assert cache.prefix(_bot(None)) is None
+    assert canonicalize("  a \n\n\n\nb  ") == "a\n\nb"
+
+
+async def test_concurrent_turns_share_one_registration():
+    ai = _RegisteringAIService()
+    cache = PromptPrefixCache(ai, min_provider_cache_tokens=1)
+    prefix = cache.prefix(_bot("Be brief."))
+
+    handles = await asyncio.gather(*(cache.handle(prefix, "gemini-pro") for _ in range(5)))
+
+    assert ai.registrations == 1
+    assert len({h.name for h in handles}) == 1 and handles[0].message_count == 1
+    assert await cache.handle(prefix, "gemini-pro") is handles[0]
+    # Another model needs its own cache
+    assert (await cache.handle(prefix, "gemini-1.5-flash")).name != handles[0].name
+
+
+async def test_short_prefixes_and_unsupported_services_send_the_full_prompt():
+    ai = _RegisteringAIService(supported=False)
+    cache = PromptPrefixCache(ai, min_provider_cache_tokens=1)
+    prefix = cache.prefix(_bot("Be brief."))
+
+    assert await cache.handle(prefix, "gemini-pro") is None
+    assert await cache.handle(prefix, "gemini-pro") is None
+    assert ai.registrations == 1
+
+    assert await PromptPrefixCache(ai).handle(prefix, "gemini-pro") is None
+    assert ai.registrations == 1
+
+
+async def test_failed_registration_is_retried_later():
+    ai = _RegisteringAIService(fail=True)
+    cache = PromptPrefixCache(ai, min_provider_cache_tokens=1, retry_after_seconds=0.05)
+    prefix = cache.prefix(_bot("Be brief."))
+
+    assert await cache.handle(prefix, "gemini-pro") is None
+    assert await cache.handle(prefix, "gemini-pro") is None
+    assert ai.registrations == 1
+
+    ai.fail = False
+    await asyncio.sleep(0.06)
+    assert await cache.handle(prefix, "gemini-pro") is not None
+
+
+async def test_provider_skips_cached_messages():
+    ai = StubAIService(api_key="test", model_name="gemini-pro")
+    cache = PromptPrefixCache(ai, min_provider_cache_tokens=1)
+    prefix = cache.prefix(_bot("You answer questions about our product. " * 50))
+    handle = await cache.handle(prefix, "gemini-pro")
+    messages = [prefix.message, ChatMessage(role="user", content="Hi")]
+
+    cached = await ai.chat_completion(
+        ChatRequest(messages=messages, model="gemini-pro", context_cache=handle)
+    )
+    full = await ai.chat_completion(ChatRequest(messages=messages, model="gemini-pro"))
+    other_model = await ai.chat_completion(
+        ChatRequest(messages=messages, model="gemini-1.5-flash", context_cache=handle)
+    )
+
+    assert cached.usage["prompt_tokens"] == full.usage["prompt_tokens"]
+    assert cached.usage["cached_tokens"] == handle.tokens > 0
+    assert other_model.usage["cached_tokens"] == 0
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+from application.interfaces.ai_service import AIServiceError, ChatResponse
+from infrastructure.external_services.resilient_ai_service import (
+    AdaptiveLimiter,
+    ResilientAIService,
+)
+from infrastructure.external_services.stub_ai_service import StubAIService
+
+
+class _FlakyAIService(StubAIService):
+    def __init__(self) -> None:
+        super().__init__(api_key="test", model_name="gemini-pro")
+        self.calls = 0
+        self.running = 0
+        self.peak = 0
+        self.fail = False
+        self.delay = 0.0
+
+    async def chat_completion(self, request):
+        self.calls += 1
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("503 from upstream")
+            return ChatResponse(content="ok", model=request.model or "gemini-pro")
+        finally:
+            self.running -= 1
+
+    async def chat_completion_stream(self, request):
+        self.calls += 1
+        yield "o"
+        if self.fail:
+            raise RuntimeError("stream reset")
+        yield "k"
+
+
+async def test_concurrent_calls_are_capped_and_excess_waits(chat_request):
+    inner = _FlakyAIService()
+    inner.delay = 0.01
+    service = ResilientAIService(inner, default_model="gemini-pro", initial_limit=2, max_limit=2)
+
+    responses = await asyncio.gather(*(service.chat_completion(chat_request()) for _ in range(6)))
+
+    assert [r.content for r in responses] == ["ok"] * 6
+    assert inner.peak == 2
+    assert service.stats()["gemini-pro"]["limiter"]["in_flight"] == 0
+
+
+async def test_limit_grows_on_success_and_halves_once_per_round_of_failures():
+    limiter = AdaptiveLimiter(initial_limit=4, max_limit=8)
+
+    rounds = [await limiter.acquire() for _ in range(4)]
+    for started in rounds:
+        limiter.release(started, True)
+    assert limiter.limit == 4  # 4 + 4 * ~1/4, just below 5
+
+    rounds = [await limiter.acquire() for _ in range(4)]
+    # Four calls of the same round fail together: one decrease, not four
+    for started in rounds:
+        limiter.release(started, False)
+    assert limiter.limit == 2
+    assert limiter.stats()["decreases"] == 1
+
+
+async def test_queued_calls_fail_fast_after_the_queue_timeout(chat_request):
+    inner = _FlakyAIService()
+    inner.delay = 0.2
+    service = ResilientAIService(
+        inner, default_model="gemini-pro", initial_limit=1, max_limit=1, queue_timeout_seconds=0.01
+    )
+
+    results = await asyncio.gather(
+        *(service.chat_completion(chat_request()) for _ in range(2)), return_exceptions=True
+    )
+
+    assert results[0].content == "ok"
+    assert isinstance(results[1], AIServiceError)
+    assert inner.calls == 1
+
+
+async def test_slot_handed_over_as_the_wait_times_out_is_given_back(monkeypatch):
+    limiter = AdaptiveLimiter(initial_limit=1, max_limit=1)
+    started = await limiter.acquire()
+
+    async def handed_over_then_timed_out(fut, timeout):
+        limiter.release(started, None)  # wakes the waiter with the freed slot
+        assert fut.done()
+        raise asyncio.TimeoutError
+
+    monkeypatch.setattr(asyncio, "wait_for", handed_over_then_timed_out)
+    with pytest.raises(AIServiceError):
+        await limiter.acquire()
+
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.stats()["queued"] == 0
+
+
+async def test_breaker_opens_on_failures_and_recovers_after_a_probe(chat_request):
+    inner = _FlakyAIService()
+    inner.fail = True
+    service = ResilientAIService(inner, default_model="gemini-pro", min_calls=4, open_seconds=0.05)
+
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            await service.chat_completion(chat_request())
+    with pytest.raises(AIServiceError, match="circuit open"):
+        await service.chat_completion(chat_request())
+    assert inner.calls == 4
+    assert await service.check_service_health() is False
+    # Other models still reach the backend
+    with pytest.raises(RuntimeError):
+        await service.chat_completion(chat_request(model="gemini-1.5-flash"))
+    assert inner.calls == 5
+
+    await asyncio.sleep(0.06)
+    inner.fail = False
+    assert (await service.chat_completion(chat_request())).content == "ok"
+    assert await service.check_service_health() is True
+    assert service.stats()["gemini-pro"]["breaker"]["opened"] == 1
+
+
+async def test_stream_failures_count_but_abandoned_streams_do_not(chat_request):
+    inner = _FlakyAIService()
+    service = ResilientAIService(inner, default_model="gemini-pro", min_calls=2)
+
+    for _ in range(3):
+        stream = service.chat_completion_stream(chat_request())
+        assert await stream.__anext__() == "o"
+        await stream.aclose()
+    assert service.stats()["gemini-pro"]["breaker"]["failure_rate"] == 0.0
+
+    inner.fail = True
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            [chunk async for chunk in service.chat_completion_stream(chat_request())]
+    assert service.stats()["gemini-pro"]["breaker"]["state"] == "open"
+    assert service.stats()["gemini-pro"]["limiter"]["in_flight"] == 0
+
+
+class _FailingEmbeddings(_FlakyAIService):
+    async def embed_texts(self, texts, model=None):
+        raise RuntimeError("embedding backend down")
+
+
+async def test_embedding_failures_do_not_open_the_chat_models_breaker(chat_request):
+    inner = _FailingEmbeddings()
+    service = ResilientAIService(
+        inner, default_model="gemini-pro", embedding_model="text-embedding-004", min_calls=2
+    )
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await service.embed_texts(["a", "b"])
+
+    stats = service.stats()
+    assert stats["text-embedding-004"]["breaker"]["state"] != "closed"
+    assert "gemini-pro" not in stats
+    assert (await service.chat_completion(chat_request())).content == "ok"
+    assert await service.check_service_health()
@@ -0,0 +1,32 @@
+import time
+
+from application.interfaces.response_cache import CachedResponse
+from infrastructure.external_services.response_cache import InMemoryResponseCache
+
+
+async def test_entries_expire_and_least_recent_is_evicted(monkeypatch):
+    cache = InMemoryResponseCache(max_entries=2, ttl_seconds=60)
+    await cache.put(1, "a", CachedResponse("A"))
+    await cache.put(1, "b", CachedResponse("B"))
+    assert (await cache.get(1, "a")).content == "A"
+    await cache.put(2, "c", CachedResponse("C"))
+
+    # "b" was the least recently used
+    assert await cache.get(1, "b") is None
+    assert (await cache.get(1, "a")).content == "A"
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert await cache.get(2, "c") is None
+    assert cache.stats()["evictions"] == 1
+
+
+async def test_invalidation_only_touches_one_bot():
+    cache = InMemoryResponseCache()
+    await cache.put(1, "q", CachedResponse("one"))
+    await cache.put(2, "q", CachedResponse("two"))
+
+    await cache.invalidate_bot(1)
+
+    assert await cache.get(1, "q") is None
+    assert (await cache.get(2, "q")).content == "two"
@@ -0,0 +1,145 @@
+import json
+import os
+
+import numpy as np
+
+from infrastructure.external_services.segmented_vector_store import (
+    MANIFEST_FILE,
+    SegmentedVectorStore,
+)
+
+
+def _exact_ids(data, ids, query, k):
+    scores = (data @ query) / (np.linalg.norm(data, axis=1) * np.linalg.norm(query))
+    return [ids[i] for i in np.argsort(-scores)[:k]]
+
+
+def _manifest(root, bot_id):
+    with open(os.path.join(root, f"bot_{bot_id}", MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+async def test_segments_are_shared_between_store_instances(tmp_path):
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(300, 16)).astype(np.float32)
+    writer = SegmentedVectorStore(str(tmp_path))
+    for start in range(0, 300, 100):
+        await writer.upsert(3, list(range(start, start + 100)), data[start : start + 100])
+
+    # A second instance stands in for another uvicorn worker mapping the same files
+    reader = SegmentedVectorStore(str(tmp_path))
+    query = rng.normal(size=16)
+    matches = await reader.search(3, query.tolist(), top_k=5)
+
+    assert [m.id for m in matches] == _exact_ids(data, list(range(300)), query, 5)
+    assert await reader.count(3) == 300
+    assert len(_manifest(tmp_path, 3)["segments"]) == 3
+
+    await writer.upsert(3, [300], [data[0]])
+    assert await reader.count(3) == 301
+
+
+async def test_replaced_and_deleted_ids_are_hidden(tmp_path):
+    store = SegmentedVectorStore(str(tmp_path))
+    await store.upsert(1, [1, 2], [[1.0, 0.0], [0.0, 1.0]])
+    await store.upsert(1, [1], [[0.0, -1.0]])
+
+    assert await store.count(1) == 2
+    assert [m.id for m in await store.search(1, [0.0, 1.0], top_k=2)] == [2, 1]
+
+    await store.delete(1, [2, 42])
+
+    assert await store.count(1) == 1
+    assert [m.id for m in await store.search(1, [0.0, 1.0], top_k=5)] == [1]
+    assert await store.search(2, [0.0, 1.0]) == []
+
+    # Tombstones now outnumber half the rows, which triggers a full compaction
+    await store.close()
+    assert len(_manifest(tmp_path, 1)["segments"]) == 1
+    assert [m.id for m in await store.search(1, [0.0, 1.0], top_k=5)] == [1]
+
+
+async def test_compaction_merges_segments_and_drops_dead_rows(tmp_path):
+    rng = np.random.default_rng(1)
+    data = rng.normal(size=(400, 8)).astype(np.float32)
+    store = SegmentedVectorStore(str(tmp_path), max_segments=3)
+    for start in range(0, 400, 40):
+        await store.upsert(5, list(range(start, start + 40)), data[start : start + 40])
+        await store.close()
+    await store.delete(5, list(range(0, 20)))
+    await store.close()
+
+    manifest = _manifest(tmp_path, 5)
+    assert len(manifest["segments"]) <= 3
+    live_files = {
+        f"{s['name']}.{part}.npy"
+        for s in manifest["segments"]
+        for part in ("vectors", "norms", "ids")
+    }
+    assert {f for f in os.listdir(tmp_path / "bot_5") if f.endswith(".npy")} == live_files
+
+    query = rng.normal(size=8)
+    matches = await store.search(5, query.tolist(), top_k=10)
+    assert [m.id for m in matches] == _exact_ids(data[20:], list(range(20, 400)), query, 10)
+    assert await store.count(5) == 380
+
+
+async def test_large_merged_segments_use_ivf_layout(tmp_path):
+    rng = np.random.default_rng(2)
+    centers = rng.normal(size=(40, 24))
+    data = (centers[rng.integers(0, 40, 4000)] + 0.3 * rng.normal(size=(4000, 24))).astype(
+        np.float32
+    )
+    store = SegmentedVectorStore(str(tmp_path), max_segments=2, ivf_min_rows=2000, ann_nprobe=8)
+    for start in range(0, 4000, 1000):
+        await store.upsert(9, list(range(start, start + 1000)), data[start : start + 1000])
+        await store.close()
+
+    assert any(s["ivf"] for s in _manifest(tmp_path, 9)["segments"])
+    recalls = []
+    for query in data[rng.integers(0, 4000, 20)] + 0.05 * rng.normal(size=(20, 24)):
+        hits = {m.id for m in await store.search(9, query.tolist(), top_k=10)}
+        recalls.append(len(hits & set(_exact_ids(data, list(range(4000)), query, 10))) / 10)
+    assert np.mean(recalls) >= 0.9
+
+
+async def test_quantized_segments_are_rescored_in_full_precision(tmp_path):
+    rng = np.random.default_rng(3)
+    data = rng.normal(size=(600, 32)).astype(np.float32)
+    for kind, code_dtype in (("int8", np.int8), ("float16", np.float16)):
+        store = SegmentedVectorStore(str(tmp_path / kind), quantization=kind, rescore_factor=4)
+        await store.upsert(2, list(range(600)), data)
+
+        segment = _manifest(tmp_path / kind, 2)["segments"][0]
+        bot_dir = tmp_path / kind / "bot_2"
+        codes = np.load(bot_dir / f"{segment['name']}.codes.npy")
+        assert segment["quantization"] == kind
+        assert codes.dtype == code_dtype and codes.shape == data.shape
+        # Codes replace the float32 vectors; full precision lives only in the unit file
+        assert not (bot_dir / f"{segment['name']}.vectors.npy").exists()
+        assert np.load(bot_dir / f"{segment['name']}.unit.npy").dtype == np.float32
+        for query in rng.normal(size=(10, 32)):
+            matches = await store.search(2, query.tolist(), top_k=5)
+            assert [m.id for m in matches] == _exact_ids(data, list(range(600)), query, 5)
+            exact = (
+                data[matches[0].id]
+                @ query
+                / (np.linalg.norm(data[matches[0].id]) * np.linalg.norm(query))
+            )
+            assert abs(matches[0].score - exact) < 1e-5
+
+
+async def test_compaction_requantizes_segments_written_under_another_setting(tmp_path):
+    rng = np.random.default_rng(4)
+    data = rng.normal(size=(300, 16)).astype(np.float32)
+    await SegmentedVectorStore(str(tmp_path)).upsert(3, list(range(300)), data)
+
+    store = SegmentedVectorStore(str(tmp_path), ivf_min_rows=200, quantization="int8")
+    query = rng.normal(size=16)
+    expected = _exact_ids(data, list(range(300)), query, 5)
+    assert [m.id for m in await store.search(3, query.tolist(), top_k=5)] == expected
+    await store.upsert(3, [300], rng.normal(size=(1, 16)))
+    await store.close()
+
+    assert {s.get("quantization") for s in _manifest(tmp_path, 3)["segments"]} == {"int8"}
+    assert await store.count(3) == 301
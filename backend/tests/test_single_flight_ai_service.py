@@ -0,0 +1,117 @@
+import asyncio
+
+from application.interfaces.ai_service import ChatMessage, ChatRequest, ChatResponse
+from infrastructure.external_services.single_flight_ai_service import SingleFlightAIService
+from infrastructure.external_services.stub_ai_service import StubAIService
+
+
+class _CountingAIService(StubAIService):
+    def __init__(self, fail: bool = False) -> None:
+        super().__init__(api_key="test", model_name="gemini-pro")
+        self.completions = 0
+        self.streams = 0
+        self.stream_closed = False
+        self.fail = fail
+        self.release = asyncio.Event()
+
+    async def chat_completion(self, request):
+        self.completions += 1
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("upstream unavailable")
+        return ChatResponse(content="Nine to five", model="gemini-pro", usage={"total_tokens": 3})
+
+    async def chat_completion_stream(self, request):
+        self.streams += 1
+        try:
+            for chunk in ("Nine", " to", " five"):
+                await self.release.wait()
+                yield chunk
+                await asyncio.sleep(0)
+        finally:
+            self.stream_closed = True
+
+
+def _request(question, temperature=0.7, conversation_id=1):
+    return ChatRequest(
+        messages=[
+            ChatMessage(role="system", content="Be brief."),
+            ChatMessage(role="user", content=question),
+        ],
+        model="gemini-pro",
+        temperature=temperature,
+        context={"conversation_id": conversation_id},
+    )
+
+
+async def _collect(service, request):
+    return "".join([chunk async for chunk in service.chat_completion_stream(request)])
+
+
+async def test_identical_completions_share_one_call():
+    inner = _CountingAIService()
+    service = SingleFlightAIService(inner)
+
+    calls = [
+        service.chat_completion(_request("What are your opening hours?", conversation_id=i))
+        for i in range(3)
+    ] + [service.chat_completion(_request("what  are your opening hours?  ", conversation_id=9))]
+    pending = asyncio.gather(*calls)
+    await asyncio.sleep(0)
+    inner.release.set()
+    responses = await pending
+
+    # Whitespace is normalized, case is not
+    assert inner.completions == 2
+    assert {r.content for r in responses} == {"Nine to five"}
+    assert responses[0].usage is not responses[1].usage
+    assert service.stats() == {"upstream_calls": 2, "shared_calls": 2, "in_flight": 0}
+
+
+async def test_streams_share_chunks_unless_settings_differ():
+    inner = _CountingAIService()
+    service = SingleFlightAIService(inner)
+
+    first = asyncio.create_task(_collect(service, _request("Hours?")))
+    await asyncio.sleep(0)
+    inner.release.set()
+    await asyncio.sleep(0)
+    # Joins after the first chunk was produced and still gets the whole reply
+    late = asyncio.create_task(_collect(service, _request("Hours?")))
+    other_temperature = asyncio.create_task(_collect(service, _request("Hours?", temperature=0.2)))
+
+    assert await asyncio.gather(first, late, other_temperature) == ["Nine to five"] * 3
+    assert inner.streams == 2
+    assert service.stats()["shared_calls"] == 1
+
+
+async def test_failure_reaches_every_caller_and_is_not_kept():
+    inner = _CountingAIService(fail=True)
+    service = SingleFlightAIService(inner)
+
+    pending = asyncio.gather(
+        *(service.chat_completion(_request("Hours?")) for _ in range(2)), return_exceptions=True
+    )
+    await asyncio.sleep(0)
+    inner.release.set()
+    assert all(isinstance(result, RuntimeError) for result in await pending)
+
+    inner.fail = False
+    assert (await service.chat_completion(_request("Hours?"))).content == "Nine to five"
+    assert inner.completions == 2
+
+
+async def test_upstream_stream_closes_when_all_readers_leave():
+    inner = _CountingAIService()
+    service = SingleFlightAIService(inner)
+    inner.release.set()
+
+    readers = [service.chat_completion_stream(_request("Hours?")) for _ in range(2)]
+    assert [await reader.__anext__() for reader in readers] == ["Nine", "Nine"]
+    await readers[0].aclose()
+    assert not inner.stream_closed
+    await readers[1].aclose()
+    await asyncio.sleep(0)
+
+    assert inner.stream_closed
+    assert service.stats()["in_flight"] == 0
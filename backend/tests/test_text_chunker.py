@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from infrastructure.external_services.text_chunker import TokenChunker, TokenCounter
+
+COUNTER = TokenCounter(encoding_name=None)  # deterministic word-piece estimate
+
+
+def _corpus(sentences: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    words = [
+        "alpha",
+        "beta",
+        "gamma",
+        "delta",
+        "invoice",
+        "router",
+        "E1234",
+        "warranty",
+        "the",
+        "a",
+        "of",
+    ]
+    out = []
+    for i in range(sentences):
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(4, 25)))
+        out.append(sentence.capitalize() + rng.choice([".", "!", "?"]))
+        out.append("\n\n" if i % 7 == 6 else " ")
+    return "".join(out)
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+def test_chunks_respect_token_budget_and_word_boundaries():
+    text = _corpus(400)
+    chunker = TokenChunker(max_tokens=64, overlap_tokens=8, counter=COUNTER)
+
+    chunks = chunker.chunk(text)
+
+    assert len(chunks) > 10
+    assert all(COUNTER.count(c) <= 64 for c in chunks)
+    words = set(text.split())
+    assert all(c.split()[0] in words and c.split()[-1] in words for c in chunks)
+
+
+def test_chunks_end_at_sentence_boundaries_when_possible():
+    chunker = TokenChunker(max_tokens=64, overlap_tokens=0, counter=COUNTER)
+
+    chunks = chunker.chunk(_corpus(200))
+
+    assert all(c[-1] in ".!?" for c in chunks)
+
+
+def test_consecutive_chunks_overlap_by_at_most_overlap_tokens():
+    text = _corpus(100)
+    chunker = TokenChunker(max_tokens=50, overlap_tokens=10, counter=COUNTER)
+
+    spans = chunker.chunk_spans(text)
+
+    for (_, prev_end), (next_start, _) in zip(spans, spans[1:]):
+        assert next_start <= prev_end
+        assert COUNTER.count(text[next_start:prev_end]) <= 10
+
+
+def test_oversized_words_are_sliced_to_fit():
+    chunker = TokenChunker(max_tokens=16, overlap_tokens=2, counter=COUNTER)
+
+    chunks = chunker.chunk("intro. " + "x" * 500 + " outro.")
+
+    assert sum(c.count("x") for c in chunks) >= 500
+    assert chunks[0].startswith("intro.") and chunks[-1].endswith("outro.")
+    assert all(COUNTER.count(c) <= 16 for c in chunks)
+
+
+def test_invalid_overlap_is_rejected():
+    with pytest.raises(ValueError):
+        TokenChunker(max_tokens=10, overlap_tokens=10, counter=COUNTER)
+
+
+async def test_chunk_stream_matches_chunk_on_joined_parts():
+    parts = [_corpus(30, seed=i) for i in range(40)]
+    chunker = TokenChunker(max_tokens=48, overlap_tokens=6, counter=COUNTER)
+
+    streamed = [c async for c in chunker.chunk_stream(_aiter(parts))]
+
+    assert streamed == chunker.chunk("\n".join(parts))
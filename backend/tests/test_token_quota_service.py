@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from application.interfaces.ai_service import AIQuotaExceededError
+from infrastructure.database.models.base import Base
+from infrastructure.database.models.bot import BotModel
+from infrastructure.database.models.usage_counter import UsageCounterModel
+from infrastructure.external_services.token_quota_service import BOT, USER, TokenQuotaService
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+async def session_maker(tmp_path):
+    import infrastructure.database.models  # noqa: F401
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'quota.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+def _bot(max_daily_usage=None):
+    return BotModel(id=7, name="Helper", owner_id=1, max_daily_usage=max_daily_usage)
+
+
+async def test_user_quota_is_enforced_from_memory(session_maker):
+    quota = TokenQuotaService(session_maker, user_daily_tokens=1000, clock=_Clock())
+
+    quota.check(1, _bot())
+    quota.record(1, 7, 600)
+    quota.check(1, _bot())
+    quota.record(1, 7, 400)
+
+    with pytest.raises(AIQuotaExceededError):
+        quota.check(1, _bot())
+    quota.check(2, _bot())
+    assert quota.stats()["rejected"] == 1
+    # Nothing was written yet
+    async with session_maker() as session:
+        assert (await session.execute(select(UsageCounterModel))).scalars().all() == []
+
+
+async def test_flush_shares_usage_between_workers(session_maker):
+    clock = _Clock()
+    first = TokenQuotaService(session_maker, clock=clock)
+    second = TokenQuotaService(session_maker, clock=clock)
+    bot = _bot(max_daily_usage=500)
+
+    second.check(1, bot)  # the second worker has seen the bot before
+    first.record(1, 7, 300)
+    first.record(1, 7, 250)
+    await first.flush()
+    assert first.usage(BOT, 7) == 550
+    with pytest.raises(AIQuotaExceededError):
+        first.check(1, bot)
+
+    second.check(1, bot)  # not flushed yet: only its own usage is known
+    await second.flush()
+    with pytest.raises(AIQuotaExceededError):
+        second.check(1, bot)
+
+    # Deltas are aggregated per slot before they are written
+    async with session_maker() as session:
+        rows = (await session.execute(select(UsageCounterModel))).scalars().all()
+    assert sorted((row.scope, row.tokens) for row in rows) == [(BOT, 550), (USER, 550)]
+
+
+async def test_usage_leaves_the_sliding_window(session_maker):
+    clock = _Clock()
+    quota = TokenQuotaService(
+        session_maker, user_daily_tokens=100, window_seconds=3600, slot_seconds=600, clock=clock
+    )
+
+    quota.record(1, 7, 80)
+    await quota.flush()
+    clock.now += 1800
+    quota.record(1, 7, 20)
+    with pytest.raises(AIQuotaExceededError):
+        quota.check(1, _bot())
+
+    # The first 80 tokens are older than an hour after the next flush
+    clock.now += 2400
+    await quota.flush()
+    assert quota.usage(USER, 1) == 20
+    quota.check(1, _bot())
@@ -0,0 +1,83 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from infrastructure.external_services.upload_storage_service import (
+    UploadStorageService,
+    UploadTooLargeError,
+)
+
+
+class _AsyncSource:
+    """Minimal async reader mirroring UploadFile.read that records read sizes."""
+
+    def __init__(self, data: bytes) -> None:
+        self._buf = io.BytesIO(data)
+        self.read_sizes = []
+
+    async def read(self, size: int = -1) -> bytes:
+        self.read_sizes.append(size)
+        return self._buf.read(size)
+
+
+async def test_save_streams_in_chunks_and_hashes(tmp_path):
+    data = b"x" * 10_000 + b"tail"
+    storage = UploadStorageService(str(tmp_path), max_bytes=1024 * 1024, chunk_size=4096)
+    source = _AsyncSource(data)
+
+    stored = await storage.save(source, ".txt")
+
+    digest = hashlib.sha256(data).hexdigest()
+    assert stored.size_bytes == len(data)
+    assert stored.sha256 == digest
+    assert stored.path == str(tmp_path / digest[:2] / f"{digest}.txt")
+    assert (tmp_path / digest[:2] / f"{digest}.txt").read_bytes() == data
+    assert set(source.read_sizes) == {4096}
+
+
+async def test_identical_uploads_share_one_file(tmp_path):
+    storage = UploadStorageService(str(tmp_path), max_bytes=1024 * 1024)
+
+    first = await storage.save(_AsyncSource(b"same manual"), ".txt")
+    second = await storage.save(_AsyncSource(b"same manual"), ".txt")
+
+    assert first.created and not second.created
+    assert second.path == first.path
+    assert [p.name for p in tmp_path.rglob("*") if p.is_file()] == [f"{first.sha256}.txt"]
+
+    # Discarding the second upload must not delete the file the first one stored
+    storage.discard(second)
+    assert (tmp_path / first.sha256[:2] / f"{first.sha256}.txt").exists()
+
+
+async def test_save_aborts_once_limit_is_exceeded(tmp_path):
+    storage = UploadStorageService(str(tmp_path), max_bytes=8192, chunk_size=4096)
+    source = _AsyncSource(b"y" * 100_000)
+
+    with pytest.raises(UploadTooLargeError):
+        await storage.save(source, ".txt")
+
+    # Stops reading right after the chunk that crossed the limit and leaves nothing behind
+    assert len(source.read_sizes) == 3
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_reused_file_is_kept_out_of_the_orphan_sweep(tmp_path):
+    storage = UploadStorageService(str(tmp_path), max_bytes=1024 * 1024)
+    stored = await storage.save(_AsyncSource(b"replaced manual"), ".txt")
+    os.utime(stored.path, (0, 0))
+    assert storage.list_files(older_than_seconds=60) == [stored.path]
+
+    # A concurrent upload of the same bytes reuses the file and refreshes its mtime
+    again = await storage.save(_AsyncSource(b"replaced manual"), ".txt")
+
+    assert again.created is False
+    assert storage.list_files(older_than_seconds=60) == []
+    assert not storage.remove_if_older(stored.path, older_than_seconds=60)
+    assert os.path.exists(stored.path)
+
+    os.utime(stored.path, (0, 0))
+    assert storage.remove_if_older(stored.path, older_than_seconds=60)
+    assert not os.path.exists(stored.path)
@@ -1,6 +1,10 @@
+import asyncio
+
 import pytest
 from starlette.websockets import WebSocketDisconnect
 
+from presentation.api.websocket_router import WebSocketManager
+
 
 @pytest.mark.api
 async def test_websocket_training_connect(test_app):
@@ -15,3 +19,69 @@ async def test_websocket_training_connect(test_app):
             # Send a ping and ensure connection stays open
             ws.send_text("ping")
 
+
+class _FakeSocket:
+    def __init__(self, blocked: bool = False) -> None:
+        self.sent = []
+        self.closed_with = None
+        self.unblock = asyncio.Event()
+        if not blocked:
+            self.unblock.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        await self.unblock.wait()
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def test_slow_client_does_not_delay_others():
+    manager = WebSocketManager(max_queue=8)
+    slow, fast = _FakeSocket(blocked=True), _FakeSocket()
+    await manager.connect(1, slow)
+    await manager.connect(2, fast)
+
+    await manager.broadcast("hello")
+    await asyncio.sleep(0)
+
+    assert fast.sent == ["hello"] and slow.sent == []
+    slow.unblock.set()
+    await asyncio.sleep(0)
+    assert slow.sent == ["hello"]
+    await manager.disconnect(1, slow)
+    await manager.disconnect(2, fast)
+
+
+async def test_overflowing_client_is_disconnected():
+    manager = WebSocketManager(max_queue=2)
+    slow = _FakeSocket(blocked=True)
+    await manager.connect(1, slow)
+
+    for i in range(5):
+        await manager.send_to_user(1, f"progress {i}")
+    await asyncio.sleep(0)
+
+    assert slow.closed_with == 1013
+    assert manager.stats()["slow_disconnects"] == 1
+    await manager.disconnect(1, slow)
+    assert manager.stats()["connections"] == 0
+
+
+async def test_drop_oldest_keeps_latest_messages():
+    manager = WebSocketManager(max_queue=2, overflow="drop_oldest")
+    slow = _FakeSocket(blocked=True)
+    await manager.connect(1, slow)
+
+    for i in range(5):
+        await manager.send_to_user(1, f"progress {i}")
+    slow.unblock.set()
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert slow.sent == ["progress 3", "progress 4"]
+    assert manager.stats()["dropped"] == 3
+    await manager.disconnect(1, slow)
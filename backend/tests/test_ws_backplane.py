@@ -0,0 +1,77 @@
+import asyncio
+
+from infrastructure.external_services.sqlite_backplane import SqliteBackplane
+from presentation.api.websocket_router import WebSocketManager
+
+
+class _FakeSocket:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        pass
+
+
+async def _wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.01)
+
+
+async def test_messages_reach_sockets_on_other_workers(tmp_path):
+    path = str(tmp_path / "backplane.sqlite3")
+    worker_a, worker_b = WebSocketManager(), WebSocketManager()
+    backplanes = [
+        SqliteBackplane(path, poll_interval_ms=5),
+        SqliteBackplane(path, poll_interval_ms=5),
+    ]
+    await worker_a.attach_backplane(backplanes[0])
+    await worker_b.attach_backplane(backplanes[1])
+    on_a, on_b, other_user = _FakeSocket(), _FakeSocket(), _FakeSocket()
+    await worker_a.connect(1, on_a)
+    await worker_b.connect(1, on_b)
+    await worker_b.connect(2, other_user)
+
+    await worker_a.send_to_user(1, "processed")
+    await worker_b.broadcast("maintenance")
+    await _wait_for(lambda: len(on_a.sent) == 2 and len(on_b.sent) == 2 and other_user.sent)
+    await asyncio.sleep(0.05)
+
+    # Each socket gets every message exactly once (order only holds per publishing worker)
+    assert sorted(on_a.sent) == sorted(on_b.sent) == ["maintenance", "processed"]
+    assert other_user.sent == ["maintenance"]
+
+    for worker, user_id, ws in (
+        (worker_a, 1, on_a),
+        (worker_b, 1, on_b),
+        (worker_b, 2, other_user),
+    ):
+        await worker.disconnect(user_id, ws)
+    for backplane in backplanes:
+        await backplane.close()
+
+
+async def test_backplane_starts_after_existing_messages(tmp_path):
+    path = str(tmp_path / "backplane.sqlite3")
+    early = SqliteBackplane(path)
+    await early.publish(1, "before start")
+
+    received = []
+
+    async def handler(user_id, message):
+        received.append((user_id, message))
+
+    late = SqliteBackplane(path, poll_interval_ms=5)
+    await late.start(handler)
+    await early.publish(None, "after start")
+    await _wait_for(lambda: received)
+
+    assert received == [(None, "after start")]
+    await late.close()
+    await early.close()